@@ -1,26 +1,52 @@
 from flask import Flask
 
+from . import assets, carts, engine, facets, identity, metrics, outbox, replica
+from .cache import catalog_cache
 from .config import get_config
 from .extensions import db, migrate
+from .inventory import inventory_cli
+from .passwords import password_hasher
+from .rollups import rollups_cli
 
 
-def create_app() -> Flask:
+def create_app(config: dict | None = None) -> Flask:
     app = Flask(__name__)
 
     config_class = get_config()
     app.config.from_object(config_class)
+    if config:
+        app.config.update(config)
 
+    engine.configure(app)
     db.init_app(app)
+    engine.init_app(app)
+    replica.init_app(app)
+    metrics.init_app(app)
     migrate.init_app(app, db)
+    catalog_cache.init_app(app)
+    password_hasher.init_app(app)
+    carts.init_app(app)
+    identity.init_app(app)
+    assets.init_app(app)
 
     from .routes.main import bp as main_bp
     from .routes.shop import bp as shop_bp
     from .routes.auth import bp as auth_bp
     from .routes.admin import bp as admin_bp
+    from .routes.account import bp as account_bp
 
     app.register_blueprint(main_bp)
     app.register_blueprint(shop_bp, url_prefix="/shop")
     app.register_blueprint(auth_bp, url_prefix="/auth")
     app.register_blueprint(admin_bp, url_prefix="/admin")
+    app.register_blueprint(account_bp, url_prefix="/account")
+
+    app.cli.add_command(carts.carts_cli)
+    app.cli.add_command(inventory_cli)
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(identity.users_cli)
+    app.cli.add_command(assets.assets_cli)
+    app.cli.add_command(facets.facets_cli)
+    app.cli.add_command(outbox.outbox_cli)
 
     return app
@@ -0,0 +1,111 @@
+"""Сборка статики: имена с хешем содержимого и заранее сжатые копии.
+
+    flask --app wsgi assets build
+
+Файлы из app/static копируются в app/static/dist с хешем в имени
+(css/styles.css → dist/css/styles.3f1c9a0b2e.css), рядом кладутся .gz и,
+если установлен пакет brotli, .br. Соответствие имён записывается в
+dist/manifest.json; url_for('static', ...) подставляет имена из него, а nginx
+отдаёт dist/ с диска с кэшированием immutable. Без манифеста (локальная
+разработка) ссылки остаются прежними.
+
+Ссылки url(...) внутри CSS не переписываются: ресурсы, на которые ссылаются
+стили, лучше подключать абсолютным путём или через шаблон.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any
+
+import click
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+
+try:
+    import brotli
+except ImportError:  # необязательная зависимость
+    brotli = None
+
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+COMPRESSIBLE = {".css", ".js", ".json", ".svg", ".txt", ".map", ".xml", ".ico"}
+# Мелкие файлы сжатие почти не уменьшает, а nginx лишний раз проверяет диск.
+MIN_COMPRESS_SIZE = 256
+
+
+def _hashed_name(path: Path, content: bytes) -> str:
+    digest = hashlib.sha256(content).hexdigest()[:10]
+    return f"{path.stem}.{digest}{path.suffix}"
+
+
+def _write_compressed(target: Path, content: bytes) -> None:
+    # mtime=0: одинаковый вход даёт одинаковый .gz, сборка воспроизводима.
+    compressed = gzip.compress(content, compresslevel=9, mtime=0)
+    if len(compressed) < len(content):
+        target.with_name(target.name + ".gz").write_bytes(compressed)
+    if brotli is not None:
+        compressed = brotli.compress(content, quality=11)
+        if len(compressed) < len(content):
+            target.with_name(target.name + ".br").write_bytes(compressed)
+
+
+def build(static_folder: str | os.PathLike[str]) -> dict[str, str]:
+    """Собирает dist/ заново и возвращает манифест {исходное имя: имя с хешем}."""
+    root = Path(static_folder)
+    dist = root / DIST_DIR
+    if dist.exists():
+        shutil.rmtree(dist)
+
+    manifest: dict[str, str] = {}
+    for path in sorted(root.rglob("*")):
+        relative = path.relative_to(root)
+        if not path.is_file() or relative.parts[0] == DIST_DIR or path.name.startswith("."):
+            continue
+        content = path.read_bytes()
+        target = dist / relative.parent / _hashed_name(path, content)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content)
+        if path.suffix in COMPRESSIBLE and len(content) >= MIN_COMPRESS_SIZE:
+            _write_compressed(target, content)
+        manifest[relative.as_posix()] = target.relative_to(root).as_posix()
+
+    (dist / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return manifest
+
+
+def load_manifest(static_folder: str | os.PathLike[str]) -> dict[str, str]:
+    path = Path(static_folder) / DIST_DIR / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def init_app(app: Flask) -> None:
+    # Манифест читается один раз при старте (в мастере при preload_app).
+    manifest = load_manifest(app.static_folder) if app.static_folder else {}
+    app.extensions["static_manifest"] = manifest
+    if not manifest:
+        return
+
+    @app.url_defaults
+    def hashed_static_url(endpoint: str, values: dict[str, Any]) -> None:
+        if endpoint == "static" and "filename" in values:
+            values["filename"] = manifest.get(values["filename"], values["filename"])
+
+
+@click.group("assets")
+def assets_cli() -> None:
+    """Статика для продакшена."""
+
+
+@assets_cli.command("build")
+@with_appcontext
+def build_command() -> None:
+    """Собирает app/static/dist: имена с хешем, .gz/.br и manifest.json."""
+    manifest = build(current_app.static_folder)
+    click.echo(f"Собрано файлов: {len(manifest)} ({'gzip + brotli' if brotli is not None else 'gzip'})")
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from flask import Flask, current_app, g
+from sqlalchemy import select
+
+from .extensions import db
+from .models import CacheVersion
+from .utils import dialect_insert
+
+CATALOG_VERSION = "catalog"
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Потокобезопасный LRU-кэш с ограничением времени жизни записей."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class _CatalogCacheState:
+    def __init__(self, app: Flask) -> None:
+        self.enabled = app.config["CATALOG_CACHE_ENABLED"]
+        self.check_interval = app.config["CATALOG_CACHE_VERSION_CHECK"]
+        self.entries = LRUCache(app.config["CATALOG_CACHE_SIZE"], app.config["CATALOG_CACHE_TTL"])
+        self.version: int | None = None
+        self.checked_at = 0.0
+        self.invalidations = 0
+        self.lock = threading.Lock()
+
+
+class CatalogCache:
+    """Кэш чтения каталога внутри процесса воркера.
+
+    Данные каталога меняются только через админку. Каждая запись в админке
+    увеличивает счётчик в таблице cache_versions в той же транзакции; воркеры
+    сверяют его не чаще раза в CATALOG_CACHE_VERSION_CHECK секунд и сбрасывают
+    кэш, если версия изменилась. Так инвалидация доходит до всех воркеров
+    gunicorn без отдельного брокера сообщений.
+
+    Страницы каталога кэшируются строками из app.projections. Кэшируемые
+    ORM-объекты (категории) должны быть загружены полностью (включая связи):
+    после конца запроса они отсоединяются от сессии и используются только
+    для чтения.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+
+    def init_app(self, app: Flask) -> None:
+        app.extensions["catalog_cache"] = self
+
+    @property
+    def _state(self) -> _CatalogCacheState:
+        state = current_app.extensions.get("catalog_cache_state")
+        if state is None:
+            # В воркере gthread первые запросы приходят одновременно, а состояние должно быть одно.
+            with self._lock:
+                state = current_app.extensions.get("catalog_cache_state")
+                if state is None:
+                    state = current_app.extensions["catalog_cache_state"] = _CatalogCacheState(current_app)
+        return state
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        state = self._state
+        if not state.enabled:
+            return loader()
+
+        self._sync(state)
+        value = state.entries.get(key, _MISSING)
+        if value is _MISSING:
+            # Реплика может отставать от версии, которую воркер уже видел на основной
+            # базе: такие данные отдаём, но под новой версией не кэшируем.
+            if g.get("db_use_replica") and _read_version() != state.version:
+                return loader()
+            value = loader()
+            state.entries.set(key, value)
+        return value
+
+    def _sync(self, state: _CatalogCacheState) -> None:
+        now = time.monotonic()
+        if now - state.checked_at < state.check_interval:
+            return
+        with state.lock:
+            if now - state.checked_at < state.check_interval:
+                return
+            version = _read_version(primary=True)
+            if state.version is not None and version != state.version:
+                state.entries.clear()
+                state.invalidations += 1
+            state.version = version
+            state.checked_at = now
+
+    def invalidate(self) -> None:
+        """Помечает каталог изменённым. Вызывать до commit() транзакции админки."""
+        table = CacheVersion.__table__
+        stmt = dialect_insert(table).values(name=CATALOG_VERSION, version=1)
+        # Первую строку могут вставлять две транзакции админки сразу.
+        db.session.execute(
+            stmt.on_conflict_do_update(index_elements=["name"], set_={"version": table.c.version + 1})
+        )
+
+        state = self._state
+        state.entries.clear()
+        # Следующее обращение сверит версию заново и сбросит то, что успели
+        # положить в кэш до commit().
+        state.checked_at = 0.0
+
+    def stats(self) -> dict[str, Any]:
+        state = self._state
+        return {
+            **state.entries.stats(),
+            "enabled": state.enabled,
+            "version": state.version,
+            "invalidations": state.invalidations,
+        }
+
+
+def _read_version(primary: bool = False) -> int:
+    """Версия каталога; с primary=True — всегда с основной базы, даже если запрос читает с реплики."""
+    query = select(CacheVersion.version).where(CacheVersion.name == CATALOG_VERSION)
+    bind_arguments = {"bind": db.engine} if primary else None
+    return int(db.session.execute(query, bind_arguments=bind_arguments).scalar() or 0)
+
+
+catalog_cache = CatalogCache()
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+
+import click
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete, literal, select, update
+
+from .extensions import db
+from .models import Cart, CartItem
+from .utils import dialect_insert
+
+
+def new_cart_id() -> str:
+    return uuid.uuid4().hex
+
+
+class CartStore(ABC):
+    """Хранилище корзин на сервере: в cookie сессии лежит только id корзины.
+
+    Добавление и удаление меняют одну позицию, корзина целиком не
+    перезаписывается. Коммит — на вызывающем коде, как и в inventory.
+    """
+
+    @abstractmethod
+    def items(self, cart_id: str) -> dict[int, int]:
+        ...
+
+    @abstractmethod
+    def add(self, cart_id: str, product_id: int, qty: int, *, user_id: int | None = None) -> None:
+        ...
+
+    @abstractmethod
+    def remove(self, cart_id: str, product_id: int) -> bool:
+        ...
+
+    @abstractmethod
+    def clear(self, cart_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def cart_for_user(self, user_id: int) -> str | None:
+        ...
+
+    @abstractmethod
+    def merge(self, cart_id: str | None, user_id: int) -> str | None:
+        """Переносит анонимную корзину в корзину пользователя и возвращает её id."""
+
+
+class DatabaseCartStore(CartStore):
+    def items(self, cart_id: str) -> dict[int, int]:
+        rows = db.session.execute(select(CartItem.product_id, CartItem.qty).where(CartItem.cart_id == cart_id))
+        return {product_id: qty for product_id, qty in rows}
+
+    def _touch(self, cart_id: str, user_id: int | None) -> None:
+        now = datetime.utcnow()
+        stmt = dialect_insert(Cart.__table__).values(id=cart_id, user_id=user_id, created_at=now, updated_at=now)
+        db.session.execute(stmt.on_conflict_do_update(index_elements=["id"], set_={"updated_at": now}))
+
+    def add(self, cart_id: str, product_id: int, qty: int, *, user_id: int | None = None) -> None:
+        self._touch(cart_id, user_id)
+        table = CartItem.__table__
+        stmt = dialect_insert(table).values(cart_id=cart_id, product_id=product_id, qty=qty)
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["cart_id", "product_id"], set_={"qty": table.c.qty + stmt.excluded.qty}
+            )
+        )
+
+    def remove(self, cart_id: str, product_id: int) -> bool:
+        result = db.session.execute(
+            delete(CartItem).where(CartItem.cart_id == cart_id, CartItem.product_id == product_id)
+        )
+        return bool(result.rowcount)
+
+    def clear(self, cart_id: str) -> None:
+        db.session.execute(delete(CartItem).where(CartItem.cart_id == cart_id))
+
+    def cart_for_user(self, user_id: int) -> str | None:
+        return db.session.scalar(select(Cart.id).where(Cart.user_id == user_id))
+
+    def merge(self, cart_id: str | None, user_id: int) -> str | None:
+        user_cart = self.cart_for_user(user_id)
+        if cart_id is None or cart_id == user_cart:
+            return user_cart
+        if user_cart is None:
+            # Корзины у пользователя ещё нет — анонимная просто становится его корзиной.
+            db.session.execute(
+                update(Cart).where(Cart.id == cart_id, Cart.user_id.is_(None)).values(user_id=user_id)
+            )
+            return cart_id
+
+        table = CartItem.__table__
+        stmt = dialect_insert(table).from_select(
+            ["cart_id", "product_id", "qty"],
+            select(literal(user_cart), CartItem.product_id, CartItem.qty).where(CartItem.cart_id == cart_id),
+        )
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["cart_id", "product_id"], set_={"qty": table.c.qty + stmt.excluded.qty}
+            )
+        )
+        db.session.execute(delete(CartItem).where(CartItem.cart_id == cart_id))
+        db.session.execute(delete(Cart).where(Cart.id == cart_id, Cart.user_id.is_(None)))
+        self._touch(user_cart, user_id)
+        return user_cart
+
+
+class MemoryCartStore(CartStore):
+    """Корзины в памяти процесса — для тестов и локальной разработки."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._carts: dict[str, dict[int, int]] = {}
+        self._users: dict[int, str] = {}
+
+    def items(self, cart_id: str) -> dict[int, int]:
+        with self._lock:
+            return dict(self._carts.get(cart_id, {}))
+
+    def add(self, cart_id: str, product_id: int, qty: int, *, user_id: int | None = None) -> None:
+        with self._lock:
+            cart = self._carts.setdefault(cart_id, {})
+            cart[product_id] = cart.get(product_id, 0) + qty
+            if user_id is not None:
+                self._users.setdefault(user_id, cart_id)
+
+    def remove(self, cart_id: str, product_id: int) -> bool:
+        with self._lock:
+            return self._carts.get(cart_id, {}).pop(product_id, None) is not None
+
+    def clear(self, cart_id: str) -> None:
+        with self._lock:
+            self._carts.pop(cart_id, None)
+
+    def cart_for_user(self, user_id: int) -> str | None:
+        with self._lock:
+            return self._users.get(user_id)
+
+    def merge(self, cart_id: str | None, user_id: int) -> str | None:
+        with self._lock:
+            user_cart = self._users.get(user_id)
+            if cart_id is None or cart_id == user_cart:
+                return user_cart
+            if user_cart is None:
+                self._users[user_id] = cart_id
+                return cart_id
+            target = self._carts.setdefault(user_cart, {})
+            for product_id, qty in self._carts.pop(cart_id, {}).items():
+                target[product_id] = target.get(product_id, 0) + qty
+            return user_cart
+
+
+BACKENDS = {"database": DatabaseCartStore, "memory": MemoryCartStore}
+
+
+def init_app(app: Flask) -> None:
+    backend = app.config["CART_BACKEND"]
+    if backend not in BACKENDS:
+        raise RuntimeError(f"Неизвестный CART_BACKEND: {backend}")
+    app.extensions["cart_store"] = BACKENDS[backend]()
+
+
+def cart_store() -> CartStore:
+    return current_app.extensions["cart_store"]
+
+
+def purge_anonymous(days: int) -> int:
+    """Удаляет анонимные корзины, которые не менялись дольше `days` дней."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    stale = select(Cart.id).where(Cart.user_id.is_(None), Cart.updated_at < cutoff)
+    db.session.execute(delete(CartItem).where(CartItem.cart_id.in_(stale)))
+    return db.session.execute(delete(Cart).where(Cart.user_id.is_(None), Cart.updated_at < cutoff)).rowcount
+
+
+@click.group("carts")
+def carts_cli() -> None:
+    """Серверные корзины покупателей."""
+
+
+@carts_cli.command("purge")
+@click.option("--days", type=int, default=None, help="Возраст корзины; по умолчанию CART_ANONYMOUS_TTL_DAYS.")
+@with_appcontext
+def purge_command(days: int | None) -> None:
+    """Удаляет брошенные анонимные корзины (запускать по расписанию)."""
+    removed = purge_anonymous(days if days is not None else current_app.config["CART_ANONYMOUS_TTL_DAYS"])
+    db.session.commit()
+    click.echo(f"Удалено корзин: {removed}")
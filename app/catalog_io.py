@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import IO, Any, Iterable, Iterator
+
+from sqlalchemy import case, func, select
+
+from . import facets
+from .cache import catalog_cache
+from .extensions import db
+from .models import Category, Product, StockShard
+from .utils import SLUG_FALLBACK, dialect_insert, slugify
+
+FIELDS = ["name", "slug", "description", "price", "stock_qty", "category", "is_active"]
+FORMATS = ("csv", "jsonl")
+CHUNK_SIZE = 1000
+# Пределы колонок products.price (Numeric(10, 2)) и products.stock_qty (Integer).
+MAX_PRICE = Decimal("99999999.99")
+MAX_STOCK_QTY = 2**31 - 1
+MAX_ERRORS = 200
+
+_TRUE = {"1", "true", "yes", "y", "да", "on"}
+_FALSE = {"0", "false", "no", "n", "нет", "off"}
+
+
+class ImportFormatError(ValueError):
+    """Файл импорта не удаётся разобрать целиком (неверный формат или заголовок)."""
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    updated: int = 0
+    skipped: int = 0
+    errors: list[tuple[int, str]] = field(default_factory=list)
+
+    def error(self, line: int, message: str) -> None:
+        self.skipped += 1
+        # Полный список ошибок для большого файла не нужен — хватит первых MAX_ERRORS.
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, message))
+
+
+def _read_csv(stream: IO[bytes]) -> Iterator[tuple[int, dict[str, Any]]]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    if not reader.fieldnames or "name" not in reader.fieldnames:
+        raise ImportFormatError("В CSV нет заголовка с колонкой name.")
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _read_jsonl(stream: IO[bytes]) -> Iterator[tuple[int, dict[str, Any] | str]]:
+    for line_no, raw in enumerate(io.TextIOWrapper(stream, encoding="utf-8-sig"), start=1):
+        if not raw.strip():
+            continue
+        try:
+            row = json.loads(raw)
+        except ValueError:
+            yield line_no, "некорректный JSON"
+            continue
+        yield line_no, row if isinstance(row, dict) else "ожидается JSON-объект"
+
+
+def _text(row: dict[str, Any], key: str) -> str:
+    value = row.get(key)
+    return "" if value is None else str(value).strip()
+
+
+def _parse_bool(value: str) -> bool:
+    if not value:
+        return True
+    value = value.lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise ValueError(f"непонятное значение is_active: {value!r}")
+
+
+def _parse_row(row: dict[str, Any]) -> dict[str, Any]:
+    name = _text(row, "name")
+    if not name:
+        raise ValueError("не заполнено название")
+    category = _text(row, "category")
+    if not category:
+        raise ValueError("не указана категория")
+
+    try:
+        price = Decimal(_text(row, "price").replace(",", ".") or "0").quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise ValueError("некорректная цена") from None
+    # NaN переживает quantize(), а сравнение с ним бросает InvalidOperation.
+    if not price.is_finite():
+        raise ValueError("некорректная цена")
+    if price < 0:
+        raise ValueError("цена не может быть отрицательной")
+    if price > MAX_PRICE:
+        raise ValueError(f"цена больше {MAX_PRICE}")
+
+    try:
+        stock_qty = int(_text(row, "stock_qty") or 0)
+    except ValueError:
+        raise ValueError("некорректное количество") from None
+    if stock_qty > MAX_STOCK_QTY:
+        raise ValueError(f"количество больше {MAX_STOCK_QTY}")
+
+    explicit_slug = _text(row, "slug")
+    slug = slugify(explicit_slug or name)[:220]
+    # Иначе все такие строки получили бы один slug и затирали друг друга.
+    if slug == SLUG_FALLBACK and not explicit_slug:
+        raise ValueError("не удалось построить slug, укажите его явно")
+
+    return {
+        "name": name[:200],
+        "slug": slug,
+        "description": _text(row, "description") or None,
+        "price": price,
+        "stock_qty": max(0, stock_qty),
+        "category": category,
+        "is_active": _parse_bool(_text(row, "is_active")),
+    }
+
+
+def _resolve_categories(slugs: set[str], known: dict[str, int]) -> None:
+    missing = [slug for slug in slugs if slug not in known]
+    if missing:
+        known.update(db.session.execute(select(Category.slug, Category.id).where(Category.slug.in_(missing))).all())
+
+
+def _upsert(rows: list[dict[str, Any]]) -> None:
+    table = Product.__table__
+    stmt = dialect_insert(table)
+    # Остаток шардированного товара живёт в stock_shards, его меняют только через inventory.
+    set_ = {name: getattr(stmt.excluded, name) for name in ("name", "description", "price", "category_id", "is_active")}
+    set_["stock_qty"] = case((table.c.stock_shards == 0, stmt.excluded.stock_qty), else_=table.c.stock_qty)
+    set_["updated_at"] = stmt.excluded.updated_at
+    db.session.execute(stmt.on_conflict_do_update(index_elements=["slug"], set_=set_), rows)
+
+
+def _flush_chunk(
+    chunk: list[tuple[int, dict[str, Any]]], categories: dict[str, int], report: ImportReport, touched: set[int]
+) -> None:
+    _resolve_categories({row["category"] for _, row in chunk}, categories)
+
+    # Повтор slug в порции — ошибка строки: записывается первая из них. Строка
+    # в следующих порциях обновляет товар, как и любой уже существующий.
+    by_slug: dict[str, tuple[int, dict[str, Any]]] = {}
+    for line_no, row in chunk:
+        category_id = categories.get(row["category"])
+        if category_id is None:
+            report.error(line_no, f"категория {row['category']!r} не найдена")
+            continue
+        previous = by_slug.get(row["slug"])
+        if previous is not None:
+            report.error(line_no, f"slug {row['slug']!r} уже был в строке {previous[0]}")
+            continue
+        by_slug[row["slug"]] = (line_no, row)
+    if not by_slug:
+        return
+
+    # Товар может уехать из старой категории — её фасет тоже пересчитывается.
+    existing = dict(
+        db.session.execute(select(Product.slug, Product.category_id).where(Product.slug.in_(list(by_slug)))).all()
+    )
+    now = datetime.utcnow()
+    values = []
+    for slug, (_, row) in by_slug.items():
+        values.append(
+            {
+                "name": row["name"],
+                "slug": slug,
+                "description": row["description"],
+                "price": row["price"],
+                "stock_qty": row["stock_qty"],
+                "stock_shards": 0,
+                "category_id": categories[row["category"]],
+                "is_active": row["is_active"],
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+    _upsert(values)
+    touched.update(value["category_id"] for value in values)
+    touched.update(existing.values())
+    report.updated += len(existing)
+    report.created += len(values) - len(existing)
+
+
+def import_products(stream: IO[bytes], fmt: str, *, chunk_size: int = CHUNK_SIZE) -> ImportReport:
+    """Загружает товары из CSV/JSONL, не читая файл целиком в память.
+
+    Строки копятся порциями по chunk_size: категории и занятые slug проверяются
+    одним запросом на порцию, запись идёт одним INSERT ... ON CONFLICT (slug)
+    и коммитится сразу. Фасеты затронутых категорий пересчитываются один раз
+    в конце. Ошибочные строки пропускаются и попадают в отчёт.
+    """
+    if fmt not in FORMATS:
+        raise ImportFormatError(f"Неизвестный формат: {fmt}")
+    rows = _read_csv(stream) if fmt == "csv" else _read_jsonl(stream)
+
+    report = ImportReport()
+    categories: dict[str, int] = {}
+    chunk: list[tuple[int, dict[str, Any]]] = []
+    touched: set[int] = set()
+    committed = False
+    try:
+        for line_no, raw in rows:
+            if isinstance(raw, str):
+                report.error(line_no, raw)
+                continue
+            try:
+                chunk.append((line_no, _parse_row(raw)))
+            except ValueError as exc:
+                report.error(line_no, str(exc))
+                continue
+            if len(chunk) >= chunk_size:
+                _flush_chunk(chunk, categories, report, touched)
+                db.session.commit()
+                committed = True
+                chunk = []
+        if chunk:
+            _flush_chunk(chunk, categories, report, touched)
+    except Exception as exc:
+        db.session.rollback()
+        if committed:
+            # Предыдущие порции уже в базе: витрина не должна показывать каталог до импорта.
+            facets.refresh(touched)
+            catalog_cache.invalidate()
+            db.session.commit()
+        if isinstance(exc, UnicodeDecodeError):
+            raise ImportFormatError("Файл должен быть в кодировке UTF-8.") from None
+        raise
+
+    if report.created or report.updated:
+        facets.refresh(touched)
+        catalog_cache.invalidate()
+    db.session.commit()
+    return report
+
+
+def _export_rows() -> Iterator[dict[str, Any]]:
+    shard_stock = (
+        select(func.coalesce(func.sum(StockShard.qty), 0))
+        .where(StockShard.product_id == Product.id)
+        .correlate(Product)
+        .scalar_subquery()
+    )
+    query = (
+        select(
+            Product.name,
+            Product.slug,
+            Product.description,
+            Product.price,
+            Product.stock_qty + shard_stock,
+            Category.slug,
+            Product.is_active,
+        )
+        .join(Category, Category.id == Product.category_id)
+        .order_by(Product.id)
+        .execution_options(yield_per=CHUNK_SIZE)
+    )
+    for name, slug, description, price, stock_qty, category, is_active in db.session.execute(query):
+        yield {
+            "name": name,
+            "slug": slug,
+            "description": description or "",
+            "price": f"{price:.2f}",
+            "stock_qty": int(stock_qty),
+            "category": category,
+            "is_active": bool(is_active),
+        }
+
+
+def export_products(fmt: str) -> Iterable[str]:
+    """Отдаёт каталог построчно в формате, который понимает import_products."""
+    if fmt == "jsonl":
+        for row in _export_rows():
+            yield json.dumps(row, ensure_ascii=False) + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDS)
+    writer.writeheader()
+    for index, row in enumerate(_export_rows(), start=1):
+        writer.writerow({**row, "is_active": int(row["is_active"])})
+        if index % CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -7,6 +7,75 @@ class BaseConfig:
 
     APP_NAME = os.getenv("APP_NAME", "Football Shop")
     ITEMS_PER_PAGE = int(os.getenv("ITEMS_PER_PAGE", "12"))
+    ORDERS_PER_PAGE = int(os.getenv("ORDERS_PER_PAGE", "20"))
+
+    # Пул соединений на воркер gunicorn: воркеры × (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    # должно укладываться в max_connections PostgreSQL (или PgBouncer).
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+    DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+    # 0 — без ограничения; отдельным маршрутам задаётся через @statement_timeout.
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))
+    # 1 — подключение через PgBouncer в режиме pool_mode=transaction.
+    DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "0") == "1"
+
+    # Реплика для чтения каталога (GET в блюпринтах shop и main). Без неё всё идёт в основную базу.
+    DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL") or None
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+    REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", "2"))
+    # После записи покупатель столько секунд читает с основной базы (read-your-writes).
+    REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+    SEARCH_TS_CONFIG = os.getenv("SEARCH_TS_CONFIG", "russian")
+
+    CATALOG_CACHE_ENABLED = os.getenv("CATALOG_CACHE_ENABLED", "1") == "1"
+    CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "1024"))
+    CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "60"))
+    CATALOG_CACHE_VERSION_CHECK = float(os.getenv("CATALOG_CACHE_VERSION_CHECK", "1"))
+    CATALOG_MICROCACHE_SECONDS = int(os.getenv("CATALOG_MICROCACHE_SECONDS", "5"))
+
+    INVENTORY_HOLD_TTL = int(os.getenv("INVENTORY_HOLD_TTL", "900"))
+
+    # "database" — таблицы carts/cart_items; "memory" — словарь в процессе
+    # (только для разработки и тестов: у каждого воркера gunicorn он свой).
+    CART_BACKEND = os.getenv("CART_BACKEND", "database")
+    CART_ANONYMOUS_TTL_DAYS = int(os.getenv("CART_ANONYMOUS_TTL_DAYS", "30"))
+
+    # Формат werkzeug: "scrypt:N:r:p" или "pbkdf2:sha256:iterations".
+    # При смене параметров хеш пересчитывается при следующем входе.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "8"))
+    PASSWORD_HASH_WAIT = float(os.getenv("PASSWORD_HASH_WAIT", "5"))
+
+    # Снимок пользователя живёт в воркере не дольше IDENTITY_CACHE_TTL секунд:
+    # за это время до всех воркеров доходит отзыв прав или смена пароля.
+    IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "10000"))
+    IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", "5"))
+
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+    # Каталог для снимков метрик воркеров gunicorn; пусто — /metrics показывает один процесс.
+    METRICS_DIR = os.getenv("METRICS_DIR") or None
+    METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "1"))
+    # Сети, которым отдаётся /metrics, через запятую (например, 10.0.0.0/8); пусто — всем.
+    METRICS_ALLOWED_IPS = [net.strip() for net in os.getenv("METRICS_ALLOWED_IPS", "").split(",") if net.strip()]
+    # Запросы дольше этого пишутся в журнал вместе с самыми долгими SQL; 0 — выключено.
+    SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", "0"))
+
+    ROLLUP_SETTLE_SECONDS = int(os.getenv("ROLLUP_SETTLE_SECONDS", "30"))
+    ROLLUP_BATCH_ORDERS = int(os.getenv("ROLLUP_BATCH_ORDERS", "5000"))
+    # Дашборд сам добирает одну порцию новых заказов перед показом.
+    ROLLUP_REFRESH_ON_READ = os.getenv("ROLLUP_REFRESH_ON_READ", "1") == "1"
+
+    # Воркер outbox (flask outbox work): размер порции, пауза без задач, аренда взятой
+    # задачи (дольше самого долгого обработчика), попытки и базовая пауза между ними.
+    OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+    OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+    OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+    OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", "5"))
 
 
 class DevelopmentConfig(BaseConfig):
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from typing import Any, Callable, TypeVar
+
+from flask import Flask, current_app, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import NullPool
+
+from .extensions import db
+from .metrics import TimedQueuePool
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def engine_options(config: dict[str, Any]) -> dict[str, Any]:
+    """Параметры create_engine для SQLALCHEMY_ENGINE_OPTIONS.
+
+    Обычный режим: пул в каждом воркере (DB_POOL_SIZE + DB_MAX_OVERFLOW
+    соединений), проверка соединения перед выдачей из пула и statement_timeout
+    по умолчанию в параметрах подключения.
+
+    Режим PgBouncer (DB_PGBOUNCER=1, пул транзакций): соединения пулит
+    PgBouncer, поэтому приложение своих не держит (NullPool), а состояние
+    сессии не используется — таймаут ставится через SET LOCAL в каждой транзакции.
+    """
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    if url.get_backend_name() != "postgresql":
+        return {}
+
+    connect_args: dict[str, Any] = {
+        "connect_timeout": config["DB_CONNECT_TIMEOUT"],
+        "application_name": config["APP_NAME"],
+    }
+    if url.get_driver_name() == "psycopg":
+        # psycopg 3 готовит запросы на сервере, а за PgBouncer они живут не в том соединении.
+        connect_args["prepare_threshold"] = None
+
+    if config["DB_PGBOUNCER"]:
+        return {"poolclass": NullPool, "connect_args": connect_args}
+
+    if config["DB_STATEMENT_TIMEOUT_MS"]:
+        connect_args["options"] = f"-c statement_timeout={int(config['DB_STATEMENT_TIMEOUT_MS'])}"
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": config["DB_POOL_PRE_PING"],
+        "connect_args": connect_args,
+    }
+
+
+def configure(app: Flask) -> None:
+    """Заполняет SQLALCHEMY_ENGINE_OPTIONS, если они не заданы явно. Вызывать до db.init_app."""
+    if "SQLALCHEMY_ENGINE_OPTIONS" not in app.config:
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config)
+
+
+def statement_timeout(ms: int) -> Callable[[F], F]:
+    """Свой statement_timeout для маршрута (0 — без ограничения), например для отчётов и выгрузок."""
+
+    def decorator(view: F) -> F:
+        view.statement_timeout_ms = ms  # type: ignore[attr-defined]
+        return view
+
+    return decorator
+
+
+def _route_timeout() -> int | None:
+    if not has_request_context() or request.endpoint is None:
+        return None
+    view = current_app.view_functions.get(request.endpoint)
+    return getattr(view, "statement_timeout_ms", None)
+
+
+def _on_begin(conn) -> None:
+    timeout = _route_timeout()
+    if timeout is None:
+        if not current_app.config["DB_PGBOUNCER"] or not current_app.config["DB_STATEMENT_TIMEOUT_MS"]:
+            return
+        timeout = current_app.config["DB_STATEMENT_TIMEOUT_MS"]
+    # SET LOCAL действует до конца транзакции и не оставляет следов в соединении.
+    # Транзакция Connection ещё не открыта, поэтому запрос идёт напрямую в DBAPI:
+    # psycopg2 начнёт транзакцию этим же запросом.
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"SET LOCAL statement_timeout = {int(timeout)}")
+    finally:
+        cursor.close()
+
+
+def install_timeouts(engine: Engine) -> None:
+    """Подключает statement_timeout маршрутов (и режима PgBouncer) к движку."""
+    if engine.dialect.name == "postgresql":
+        event.listen(engine, "begin", _on_begin)
+
+
+def init_app(app: Flask) -> None:
+    with app.app_context():
+        install_timeouts(db.engine)
@@ -1,5 +1,27 @@
+from flask import current_app, g, has_app_context
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql import Select
 
-db = SQLAlchemy()
+
+class RoutingSession(Session):
+    """Сессия, которая отправляет чтение на реплику, если запрос это разрешил.
+
+    Реплика выбирается только для SELECT без FOR UPDATE и только пока в запросе
+    не было записи: первая же запись (или flush) переключает остаток запроса на
+    основную базу, чтобы он видел собственные изменения.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            if self._flushing or (clause is not None and not isinstance(clause, Select)):
+                g.db_wrote = True
+                g.db_use_replica = False
+            elif g.get("db_use_replica") and (clause is None or clause._for_update_arg is None):
+                return current_app.extensions["replica_engine"]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, NamedTuple
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, literal, select, update
+
+from .extensions import db
+from .models import Category, CategoryFacet, Product
+from .search import apply_search
+from .utils import dialect_insert
+
+
+class Facet(NamedTuple):
+    """Категория в навигации каталога: число активных товаров и диапазон цен."""
+
+    id: int
+    name: str
+    slug: str
+    created_at: datetime
+    product_count: int
+    min_price: Decimal | None
+    max_price: Decimal | None
+
+
+def apply_changes(
+    added: Iterable[tuple[int, Decimal]] = (), removed: Iterable[tuple[int, Decimal]] = ()
+) -> None:
+    """Поправляет фасеты на появившиеся и убранные активные товары. Коммит — на вызывающем коде.
+
+    added и removed — пары (category_id, цена). Число товаров меняется на
+    разницу, диапазон цен расширяется новыми ценами. Пересчитывать категорию
+    (refresh) приходится, только если ушёл товар с ценой на границе диапазона
+    или строки фасета ещё нет.
+    """
+    delta: dict[int, int] = defaultdict(int)
+    low: dict[int, Decimal] = {}
+    high: dict[int, Decimal] = {}
+    gone: dict[int, list[Decimal]] = defaultdict(list)
+    for category_id, price in added:
+        delta[category_id] += 1
+        low[category_id] = min(price, low.get(category_id, price))
+        high[category_id] = max(price, high.get(category_id, price))
+    for category_id, price in removed:
+        delta[category_id] -= 1
+        gone[category_id].append(price)
+    ids = sorted(delta)
+    if not ids:
+        return
+
+    # Блокировка строк фасетов: параллельная правка той же категории подождёт.
+    rows = db.session.execute(
+        select(CategoryFacet.category_id, CategoryFacet.product_count, CategoryFacet.min_price, CategoryFacet.max_price)
+        .where(CategoryFacet.category_id.in_(ids))
+        .with_for_update()
+    )
+    current = {row.category_id: row for row in rows}
+    now = datetime.utcnow()
+    stale = []
+    for category_id in ids:
+        facet = current.get(category_id)
+        if facet is None and delta[category_id] > 0 and not gone[category_id]:
+            # Первый товар категории: строки фасета ещё нет.
+            inserted = db.session.execute(
+                dialect_insert(CategoryFacet.__table__)
+                .values(
+                    category_id=category_id,
+                    product_count=delta[category_id],
+                    min_price=low[category_id],
+                    max_price=high[category_id],
+                    updated_at=now,
+                )
+                .on_conflict_do_nothing(index_elements=["category_id"])
+            )
+            if not inserted.rowcount:
+                stale.append(category_id)
+            continue
+        if facet is None or facet.product_count + delta[category_id] <= 0:
+            stale.append(category_id)
+            continue
+        if any(
+            facet.min_price is None or price <= facet.min_price or price >= facet.max_price
+            for price in gone[category_id]
+        ):
+            stale.append(category_id)
+            continue
+        min_price = min(p for p in (facet.min_price, low.get(category_id)) if p is not None)
+        max_price = max(p for p in (facet.max_price, high.get(category_id)) if p is not None)
+        db.session.execute(
+            update(CategoryFacet)
+            .where(CategoryFacet.category_id == category_id)
+            .values(
+                product_count=facet.product_count + delta[category_id],
+                min_price=min_price,
+                max_price=max_price,
+                updated_at=now,
+            )
+        )
+    refresh(stale)
+
+
+def refresh(category_ids: Iterable[int]) -> None:
+    """Пересчитывает фасеты перечисленных категорий. Коммит — на вызывающем коде.
+
+    Пересчёт одной категории читает только индекс
+    ix_products_category_active_price; для одиночных правок товаров есть
+    apply_changes, который обходится без него.
+    """
+    ids = sorted(set(category_ids))
+    if not ids:
+        return
+    now = datetime.utcnow()
+    # Категории, где не осталось активных товаров, в агрегат ниже не попадут.
+    db.session.execute(
+        update(CategoryFacet)
+        .where(CategoryFacet.category_id.in_(ids))
+        .values(product_count=0, min_price=None, max_price=None, updated_at=now)
+    )
+    table = CategoryFacet.__table__
+    stmt = dialect_insert(table).from_select(
+        ["category_id", "product_count", "min_price", "max_price", "updated_at"],
+        select(Product.category_id, func.count(Product.id), func.min(Product.price), func.max(Product.price), literal(now))
+        .where(Product.category_id.in_(ids), Product.is_active.is_(True))
+        .group_by(Product.category_id),
+    )
+    db.session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["category_id"],
+            set_={name: getattr(stmt.excluded, name) for name in ("product_count", "min_price", "max_price", "updated_at")},
+        )
+    )
+
+
+def rebuild() -> int:
+    """Пересчитывает фасеты всех категорий (после ручных правок в базе)."""
+    ids = list(db.session.scalars(select(Category.id)))
+    refresh(ids)
+    return len(ids)
+
+
+def category_facets() -> list[Facet]:
+    """Все категории с фасетами — одно чтение сводной таблицы по первичному ключу."""
+    rows = db.session.execute(
+        select(
+            Category.id,
+            Category.name,
+            Category.slug,
+            Category.created_at,
+            func.coalesce(CategoryFacet.product_count, 0),
+            CategoryFacet.min_price,
+            CategoryFacet.max_price,
+        )
+        .outerjoin(CategoryFacet, CategoryFacet.category_id == Category.id)
+        .order_by(Category.name.asc())
+    )
+    return [Facet._make(row) for row in rows]
+
+
+def search_facets(q: str, match: str, base: list[Facet]) -> list[Facet]:
+    """Фасеты с учётом строки поиска: категории без найденных товаров не показываются.
+
+    Сводная таблица здесь не помогает, поэтому считается GROUP BY по
+    найденным товарам; результат кэшируется вместе со страницей поиска.
+    """
+    query = db.session.query(
+        Product.category_id, func.count(Product.id), func.min(Product.price), func.max(Product.price)
+    ).filter(Product.is_active.is_(True))
+    query, _ = apply_search(query, q, match)
+    found = {row[0]: row[1:] for row in query.group_by(Product.category_id)}
+    return [facet._make((*facet[:4], *found[facet.id])) for facet in base if facet.id in found]
+
+
+@click.group("facets")
+def facets_cli() -> None:
+    """Фасеты каталога (число товаров и цены по категориям)."""
+
+
+@facets_cli.command("rebuild")
+@with_appcontext
+def rebuild_command() -> None:
+    """Пересчитывает фасеты всех категорий."""
+    count = rebuild()
+    db.session.commit()
+    click.echo(f"Пересчитано категорий: {count}")
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Iterable
+
+from flask import Response, current_app, make_response, request, session
+
+
+@dataclass(frozen=True)
+class Validators:
+    etag: str
+    last_modified: datetime | None
+    # False, если страница персональная (flash-сообщения, вошедший пользователь).
+    shared: bool
+
+
+def page_validators(
+    products: Iterable[Any], categories: Iterable[Any] = (), *extra: Any, dated: bool = False
+) -> Validators:
+    """ETag и Last-Modified страницы по набору показанных товаров и категорий.
+
+    В ETag входят id и updated_at каждого товара, поэтому он меняется и при
+    скрытии/удалении товара, а не только при его редактировании. Last-Modified
+    (dated=True) — только для страницы одного товара: у списка скрытие или
+    удаление товара не сдвигает максимум updated_at, и по If-Modified-Since
+    ушёл бы устаревший 304. Вызывать до рендеринга: шаблон забирает
+    flash-сообщения из сессии.
+    """
+    digest = hashlib.sha1()
+    last_modified: datetime | None = None
+
+    for product in products:
+        digest.update(f"p{product.id}:{product.updated_at.isoformat()};".encode())
+        if last_modified is None or product.updated_at > last_modified:
+            last_modified = product.updated_at
+    for category in categories:
+        digest.update(f"c{category.id}:{category.slug}:{category.name};".encode())
+        if last_modified is None or category.created_at > last_modified:
+            last_modified = category.created_at
+    for value in extra:
+        digest.update(f"x{value!r};".encode())
+
+    if not dated:
+        last_modified = None
+    elif last_modified is not None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+    # Вошедшему пользователю шапка показывает его имя — такую страницу нельзя отдавать другим.
+    shared = not session.get("_flashes") and not session.get("user_id")
+    return Validators(etag=digest.hexdigest(), last_modified=last_modified, shared=shared)
+
+
+def not_modified(validators: Validators) -> Response | None:
+    """Ответ 304, если у клиента актуальная копия страницы."""
+    if not validators.shared:
+        return None
+
+    if request.if_none_match:
+        fresh = request.if_none_match.contains(validators.etag)
+    elif request.if_modified_since and validators.last_modified is not None:
+        fresh = validators.last_modified <= request.if_modified_since
+    else:
+        fresh = False
+
+    if not fresh:
+        return None
+    return set_cache_headers(make_response("", 304), validators)
+
+
+def set_cache_headers(response: Response, validators: Validators) -> Response:
+    if not validators.shared:
+        response.cache_control.private = True
+        response.cache_control.no_store = True
+        return response
+
+    response.set_etag(validators.etag)
+    if validators.last_modified is not None:
+        response.last_modified = validators.last_modified
+    # Браузер всегда перепроверяет страницу, а nginx может держать её у себя
+    # CATALOG_MICROCACHE_SECONDS секунд (X-Accel-Expires клиенту не передаётся).
+    response.cache_control.public = True
+    response.cache_control.max_age = 0
+    response.cache_control.must_revalidate = True
+    response.headers["X-Accel-Expires"] = str(current_app.config["CATALOG_MICROCACHE_SECONDS"])
+    return response
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import click
+from flask import Flask, current_app, g, session
+from flask.cli import with_appcontext
+from sqlalchemy import select, update
+from werkzeug.security import check_password_hash
+
+from .cache import LRUCache
+from .extensions import db
+from .models import User
+from .passwords import LEGACY_GUEST_PASSWORD, LEGACY_HASH_PREFIX
+
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class Identity:
+    """Неизменяемый снимок пользователя, достаточный для шаблонов и проверок доступа."""
+
+    id: int
+    email: str
+    full_name: str | None
+    is_admin: bool
+    auth_version: int
+
+    is_authenticated = True
+
+
+def init_app(app: Flask) -> None:
+    app.extensions["identity_cache"] = LRUCache(app.config["IDENTITY_CACHE_SIZE"], app.config["IDENTITY_CACHE_TTL"])
+
+    @app.context_processor
+    def inject_current_user() -> dict[str, Identity | None]:
+        return {"current_user": current_identity()}
+
+    @app.teardown_request
+    def forget_request_identity(exc: BaseException | None) -> None:
+        # g живёт в контексте приложения, который может пережить запрос (CLI, тесты).
+        g.pop("identity", None)
+
+
+def _snapshots() -> LRUCache:
+    return current_app.extensions["identity_cache"]
+
+
+def _load(user_id: int) -> Identity | None:
+    row = db.session.execute(
+        select(User.id, User.email, User.full_name, User.is_admin, User.auth_version).where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    return Identity(row.id, row.email, row.full_name, bool(row.is_admin), int(row.auth_version or 0))
+
+
+def login(user: User) -> None:
+    session["user_id"] = user.id
+    session["auth_version"] = int(user.auth_version or 0)
+    g.pop("identity", None)
+
+
+def logout() -> None:
+    session.pop("user_id", None)
+    session.pop("auth_version", None)
+    # Ключ из cookie, выданных до появления снимков: права больше не берутся из сессии.
+    session.pop("is_admin", None)
+    # Корзина остаётся за аккаунтом; следующий посетитель на этом устройстве начинает с пустой.
+    session.pop("cart_id", None)
+    g.pop("identity", None)
+
+
+def current_identity() -> Identity | None:
+    """Текущий пользователь: не больше одного обращения к кэшу или БД за запрос."""
+    identity = g.get("identity", _MISSING)
+    if identity is not _MISSING:
+        return identity
+
+    identity = None
+    user_id = session.get("user_id")
+    if user_id:
+        cache = _snapshots()
+        identity = cache.get(user_id)
+        if identity is None:
+            identity = _load(int(user_id))
+            if identity is not None:
+                cache.set(user_id, identity)
+        # Пользователь удалён, сменил пароль или его сессии отозваны — сессия больше не действует.
+        if identity is None or identity.auth_version != session.get("auth_version", 0):
+            logout()
+            identity = None
+
+    g.identity = identity
+    return identity
+
+
+def forget(user_id: int) -> None:
+    """Сбрасывает снимок в этом воркере; остальные увидят изменения через IDENTITY_CACHE_TTL."""
+    _snapshots().delete(user_id)
+
+
+def set_admin(user_id: int, is_admin: bool) -> None:
+    """Меняет права; действующие сессии получают их вместе со свежим снимком. Коммит — на вызывающем коде."""
+    db.session.execute(update(User).where(User.id == user_id).values(is_admin=is_admin))
+    forget(user_id)
+
+
+def revoke_sessions(user_id: int) -> None:
+    """Завершает все сессии пользователя. Коммит — на вызывающем коде."""
+    db.session.execute(update(User).where(User.id == user_id).values(auth_version=User.auth_version + 1))
+    forget(user_id)
+
+
+@click.group("users")
+def users_cli() -> None:
+    """Учётные записи и права доступа."""
+
+
+def _user_by_email(email: str) -> User:
+    user = User.query.filter_by(email=email.strip().lower()).first()
+    if user is None:
+        raise click.ClickException(f"Пользователь {email} не найден")
+    return user
+
+
+@users_cli.command("set-admin")
+@click.argument("email")
+@click.option("--revoke", is_flag=True, help="Снять права администратора.")
+@with_appcontext
+def set_admin_command(email: str, revoke: bool) -> None:
+    """Выдаёт или отзывает права администратора."""
+    user = _user_by_email(email)
+    set_admin(user.id, not revoke)
+    db.session.commit()
+    click.echo(f"{user.email}: {'права сняты' if revoke else 'назначен администратором'}")
+
+
+@users_cli.command("logout-everywhere")
+@click.argument("email")
+@with_appcontext
+def logout_everywhere_command(email: str) -> None:
+    """Завершает все сессии пользователя."""
+    user = _user_by_email(email)
+    revoke_sessions(user.id)
+    db.session.commit()
+    click.echo(f"{user.email}: все сессии завершены")
+
+
+@users_cli.command("clear-guest-passwords")
+@click.option("--batch-size", type=int, default=500, show_default=True)
+@with_appcontext
+def clear_guest_passwords_command(batch_size: int) -> None:
+    """Стирает у гостей хеш старого общего пароля.
+
+    Вход с этим паролем и так запрещён; команда убирает сами хеши. Каждый
+    проверяется через scrypt, поэтому это не миграция: запускать после
+    выкладки, можно прерывать и запускать снова (порции коммитятся).
+    """
+    last_id, checked, cleared = 0, 0, 0
+    while True:
+        rows = db.session.execute(
+            select(User.id, User.password_hash)
+            .where(
+                User.id > last_id,
+                User.is_admin.is_(False),
+                User.password_hash.startswith(LEGACY_HASH_PREFIX, autoescape=True),
+            )
+            .order_by(User.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        guests = [row.id for row in rows if check_password_hash(row.password_hash, LEGACY_GUEST_PASSWORD)]
+        if guests:
+            db.session.execute(update(User).where(User.id.in_(guests)).values(password_hash=None))
+        db.session.commit()
+        checked += len(rows)
+        cleared += len(guests)
+    click.echo(f"Проверено хешей: {checked}, стёрто: {cleared}")
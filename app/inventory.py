@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Mapping
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete, func, insert, select, update
+
+from .extensions import db
+from .models import Product, StockHold, StockShard
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product_id: int, requested: int) -> None:
+        super().__init__(f"Недостаточно товара {product_id}: запрошено {requested}")
+        self.product_id = product_id
+        self.requested = requested
+
+
+def reserve(items: Mapping[int, int], *, holder: str, ttl: int | None = None) -> None:
+    """Атомарно резервирует товары `{product_id: qty}` за держателем `holder`.
+
+    Остаток списывается сразу, а на каждую позицию создаётся временная бронь,
+    которая истекает через `ttl` секунд (INVENTORY_HOLD_TTL по умолчанию).
+    Прежние брони того же держателя возвращаются на склад, поэтому повторный
+    вызов с изменённой корзиной безопасен. При нехватке товара выбрасывается
+    InsufficientStock — вызывающий код обязан откатить транзакцию, чтобы
+    вернуть уже списанные позиции.
+    """
+    if ttl is None:
+        ttl = current_app.config["INVENTORY_HOLD_TTL"]
+    expires_at = datetime.utcnow() + timedelta(seconds=ttl)
+
+    release(holder)
+    taken = _take_all(items)
+
+    rows = [
+        {
+            "holder": holder,
+            "product_id": product_id,
+            "shard_no": shard_no,
+            "qty": qty,
+            "expires_at": expires_at,
+        }
+        for product_id, shard_no, qty in taken
+    ]
+    if rows:
+        db.session.execute(insert(StockHold), rows)
+
+
+def sell(items: Mapping[int, int], *, holder: str | None = None) -> None:
+    """Окончательно списывает товары в транзакции заказа.
+
+    Брони держателя возвращаются и остаток списывается заново: бронь могла
+    истечь или корзина могла измениться после перехода к оформлению.
+    Как и reserve(), при нехватке требует отката транзакции.
+    """
+    if holder is not None:
+        release(holder)
+    _take_all(items)
+
+
+def _take_all(items: Mapping[int, int]) -> list[tuple[int, int | None, int]]:
+    shards_by_product = dict(
+        db.session.execute(
+            select(Product.id, Product.stock_shards).where(Product.id.in_(list(items)))
+        ).all()
+    )
+
+    taken: list[tuple[int, int | None, int]] = []
+    # Единый порядок блокировок по product_id исключает взаимные блокировки
+    # между покупателями с пересекающимися корзинами.
+    for product_id in sorted(items):
+        qty = int(items[product_id])
+        if qty <= 0:
+            continue
+        if product_id not in shards_by_product:
+            raise InsufficientStock(product_id, qty)
+
+        take = _take_sharded if shards_by_product[product_id] else _take_unsharded
+        parts = take(product_id, qty)
+        if parts is None and release_expired(product_id=product_id):
+            parts = take(product_id, qty)
+        if parts is None:
+            raise InsufficientStock(product_id, qty)
+
+        taken.extend((product_id, shard_no, part) for shard_no, part in parts)
+    return taken
+
+
+def _take_unsharded(product_id: int, qty: int) -> list[tuple[int | None, int]] | None:
+    result = db.session.execute(
+        update(Product)
+        .where(Product.id == product_id, Product.stock_qty >= qty)
+        .values(stock_qty=Product.stock_qty - qty)
+        .execution_options(synchronize_session=False)
+    )
+    return [(None, qty)] if result.rowcount == 1 else None
+
+
+def _take_sharded(product_id: int, qty: int) -> list[tuple[int | None, int]] | None:
+    # Быстрый путь: случайный незаблокированный шард, в котором хватает остатка.
+    # SKIP LOCKED не ждёт строки, занятые параллельными покупателями.
+    shard_no = db.session.execute(
+        select(StockShard.shard_no)
+        .where(StockShard.product_id == product_id, StockShard.qty >= qty)
+        .order_by(func.random())
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).scalar()
+    if shard_no is not None and _take_from_shard(product_id, shard_no, qty):
+        return [(shard_no, qty)]
+
+    # Медленный путь: ни в одном свободном шарде нет нужного количества —
+    # блокируем все шарды в фиксированном порядке и собираем по частям.
+    shards = db.session.execute(
+        select(StockShard.shard_no, StockShard.qty)
+        .where(StockShard.product_id == product_id, StockShard.qty > 0)
+        .order_by(StockShard.shard_no)
+        .with_for_update()
+    ).all()
+    if sum(row.qty for row in shards) < qty:
+        return None
+
+    taken: list[tuple[int | None, int]] = []
+    remaining = qty
+    for row in shards:
+        part = min(row.qty, remaining)
+        _take_from_shard(product_id, row.shard_no, part)
+        taken.append((row.shard_no, part))
+        remaining -= part
+        if remaining == 0:
+            break
+    return taken
+
+
+def _take_from_shard(product_id: int, shard_no: int, qty: int) -> bool:
+    result = db.session.execute(
+        update(StockShard)
+        .where(
+            StockShard.product_id == product_id,
+            StockShard.shard_no == shard_no,
+            StockShard.qty >= qty,
+        )
+        .values(qty=StockShard.qty - qty)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def _return_holds(holds) -> None:
+    for hold in holds:
+        if hold.shard_no is None:
+            db.session.execute(
+                update(Product)
+                .where(Product.id == hold.product_id)
+                .values(stock_qty=Product.stock_qty + hold.qty)
+                .execution_options(synchronize_session=False)
+            )
+        else:
+            db.session.execute(
+                update(StockShard)
+                .where(StockShard.product_id == hold.product_id, StockShard.shard_no == hold.shard_no)
+                .values(qty=StockShard.qty + hold.qty)
+                .execution_options(synchronize_session=False)
+            )
+
+
+def release(holder: str) -> int:
+    """Возвращает на склад все брони держателя. Возвращает число снятых броней."""
+    holds = db.session.execute(
+        delete(StockHold)
+        .where(StockHold.holder == holder)
+        .returning(StockHold.product_id, StockHold.shard_no, StockHold.qty)
+        .execution_options(synchronize_session=False)
+    ).all()
+    _return_holds(holds)
+    return len(holds)
+
+
+def release_expired(*, product_id: int | None = None, limit: int = 500) -> int:
+    """Возвращает на склад истёкшие брони (все или только по одному товару)."""
+    expired = select(StockHold.id).where(StockHold.expires_at <= datetime.utcnow())
+    if product_id is not None:
+        expired = expired.where(StockHold.product_id == product_id)
+    expired = expired.order_by(StockHold.id).limit(limit).with_for_update(skip_locked=True)
+
+    holds = db.session.execute(
+        delete(StockHold)
+        .where(StockHold.id.in_(expired.scalar_subquery()))
+        .returning(StockHold.product_id, StockHold.shard_no, StockHold.qty)
+        .execution_options(synchronize_session=False)
+    ).all()
+    _return_holds(holds)
+    return len(holds)
+
+
+def stock_levels(product_ids: list[int]) -> dict[int, int]:
+    """Свободный остаток по товарам с учётом шардов."""
+    levels = dict(
+        db.session.execute(
+            select(Product.id, Product.stock_qty).where(Product.id.in_(product_ids))
+        ).all()
+    )
+    sharded = db.session.execute(
+        select(StockShard.product_id, func.sum(StockShard.qty))
+        .where(StockShard.product_id.in_(product_ids))
+        .group_by(StockShard.product_id)
+    ).all()
+    for product_id, qty in sharded:
+        levels[product_id] = levels.get(product_id, 0) + int(qty or 0)
+    return levels
+
+
+def set_sharding(product_id: int, shards: int) -> None:
+    """Разносит остаток товара по `shards` счётчикам (0 — собрать обратно в stock_qty)."""
+    product = db.session.execute(
+        select(Product).where(Product.id == product_id).with_for_update()
+    ).scalar_one()
+    current = db.session.execute(
+        select(StockShard).where(StockShard.product_id == product_id).with_for_update()
+    ).scalars().all()
+
+    total = product.stock_qty + sum(shard.qty for shard in current)
+    db.session.execute(delete(StockShard).where(StockShard.product_id == product_id))
+
+    if shards <= 0:
+        product.stock_qty = total
+        product.stock_shards = 0
+        return
+
+    base, extra = divmod(total, shards)
+    for shard_no in range(shards):
+        db.session.add(StockShard(product_id=product_id, shard_no=shard_no, qty=base + (1 if shard_no < extra else 0)))
+    product.stock_qty = 0
+    product.stock_shards = shards
+
+
+@click.group("inventory")
+def inventory_cli() -> None:
+    """Управление складскими остатками."""
+
+
+@inventory_cli.command("release-expired")
+@with_appcontext
+def release_expired_command() -> None:
+    """Возвращает на склад истёкшие брони."""
+    total = 0
+    while True:
+        released = release_expired()
+        db.session.commit()
+        total += released
+        if not released:
+            break
+    click.echo(f"Снято броней: {total}")
+
+
+@inventory_cli.command("shard")
+@click.argument("slug")
+@click.option("--shards", type=int, default=8, show_default=True)
+@with_appcontext
+def shard_command(slug: str, shards: int) -> None:
+    """Разносит остаток товара по нескольким счётчикам (0 — отключить)."""
+    product = Product.query.filter_by(slug=slug).first()
+    if product is None:
+        raise click.ClickException("Товар не найден.")
+    set_sharding(product.id, shards)
+    db.session.commit()
+    click.echo(f"{slug}: шардов {shards}")
+
@@ -0,0 +1,342 @@
+"""Метрики приложения в текстовом формате Prometheus (/metrics).
+
+Каждый воркер считает метрики у себя в памяти. Если задан METRICS_DIR,
+фоновый поток воркера раз в METRICS_FLUSH_SECONDS (если что-то изменилось)
+сбрасывает снимок в файл <pid>.json, а /metrics складывает снимки всех воркеров: счётчики и гистограммы
+суммируются (в том числе от завершившихся воркеров), gauge — только по живым.
+Без METRICS_DIR /metrics показывает один процесс.
+"""
+from __future__ import annotations
+
+import ipaddress
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable, TypeVar
+
+from flask import Blueprint, Flask, Response, abort, current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from .extensions import db
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+# имя: (тип, описание, границы корзин гистограммы)
+METRICS: dict[str, tuple[str, str, tuple[float, ...] | None]] = {
+    "http_requests_total": ("counter", "Запросы по маршрутам и кодам ответа.", None),
+    "http_request_duration_seconds": ("histogram", "Время обработки запроса.", LATENCY_BUCKETS),
+    "http_requests_in_flight": ("gauge", "Запросы в обработке.", None),
+    "http_request_db_queries": ("histogram", "SQL-запросов за HTTP-запрос.", COUNT_BUCKETS),
+    "http_request_db_seconds": ("histogram", "Время в базе за HTTP-запрос.", LATENCY_BUCKETS),
+    "db_pool_checkout_seconds": ("histogram", "Ожидание соединения из пула.", POOL_BUCKETS),
+    "cart_size_items": ("histogram", "Единиц товара в корзине при просмотре.", COUNT_BUCKETS),
+    "checkout_lines": ("histogram", "Позиций в оформленном заказе.", COUNT_BUCKETS),
+}
+
+Labels = tuple[tuple[str, str], ...]
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Сколько самых долгих запросов к базе попадает в журнал медленных запросов.
+SLOW_LOG_STATEMENTS = 5
+
+
+class Registry:
+    """Метрики одного процесса."""
+
+    def __init__(self, directory: str | None = None, flush_interval: float = 1.0) -> None:
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, Labels], Any] = {}
+        self._dirty = False
+        self._flusher_pid: int | None = None
+
+    def inc(self, name: str, labels: Labels = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[name, labels] = self._values.get((name, labels), 0) + amount
+
+    def observe(self, name: str, value: float, labels: Labels = ()) -> None:
+        buckets = METRICS[name][2]
+        with self._lock:
+            # [счётчики по корзинам..., +Inf, сумма]
+            series = self._values.get((name, labels))
+            if series is None:
+                series = self._values[name, labels] = [0] * (len(buckets) + 1) + [0.0]
+            index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+            series[index] += 1
+            series[-1] += value
+
+    def snapshot(self) -> list[list[Any]]:
+        with self._lock:
+            return [
+                [name, [list(pair) for pair in labels], list(value) if isinstance(value, list) else value]
+                for (name, labels), value in self._values.items()
+            ]
+
+    def flush(self) -> None:
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        pid = os.getpid()
+        tmp = self.directory / f"{pid}.{threading.get_ident()}.tmp"
+        tmp.write_text(json.dumps({"pid": pid, "series": self.snapshot()}), encoding="utf-8")
+        os.replace(tmp, self.directory / f"{pid}.json")
+
+    def schedule_flush(self) -> None:
+        """Снимок уйдёт на диск фоновым потоком воркера в течение flush_interval."""
+        if self.directory is None:
+            return
+        self._dirty = True
+        # Потоки не переживают fork: у каждого воркера свой.
+        if self._flusher_pid != os.getpid():
+            with self._lock:
+                if self._flusher_pid != os.getpid():
+                    self._flusher_pid = os.getpid()
+                    threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True).start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            if self._dirty:
+                self._dirty = False
+                self.flush()
+
+    def _snapshots(self) -> Iterable[tuple[bool, list[list[Any]]]]:
+        yield True, self.snapshot()
+        if self.directory is None or not self.directory.exists():
+            return
+        for path in self.directory.glob("*.json"):
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            if data["pid"] != os.getpid():
+                yield _alive(data["pid"]), data["series"]
+
+    def collect(self) -> dict[tuple[str, Labels], Any]:
+        """Сумма по всем воркерам."""
+        total: dict[tuple[str, Labels], Any] = {}
+        for alive, series in self._snapshots():
+            for name, labels, value in series:
+                kind = METRICS[name][0] if name in METRICS else "counter"
+                if kind == "gauge" and not alive:
+                    continue
+                key = (name, tuple(tuple(pair) for pair in labels))
+                if isinstance(value, list):
+                    current = total.setdefault(key, [0] * len(value))
+                    total[key] = [a + b for a, b in zip(current, value)]
+                else:
+                    total[key] = total.get(key, 0) + value
+        return total
+
+    def render(self) -> str:
+        values = self.collect()
+        lines: list[str] = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            series = sorted((labels, value) for (metric, labels), value in values.items() if metric == name)
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind != "histogram":
+                lines.extend(f"{name}{_format_labels(labels)} {_format_number(value)}" for labels, value in series)
+                continue
+            for labels, value in series:
+                cumulative = 0
+                for bound, count in zip((*buckets, math.inf), value[:-1]):
+                    cumulative += count
+                    le = "+Inf" if bound == math.inf else _format_number(bound)
+                    lines.append(f"{name}_bucket{_format_labels((*labels, ('le', le)))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_number(value[-1])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def query_budget(limit: int) -> Callable[[F], F]:
+    """Сколько SQL-запросов может сделать маршрут; проверяется в тестах (tests/conftest.py)."""
+
+    def decorator(view: F) -> F:
+        view.query_budget = limit  # type: ignore[attr-defined]
+        return view
+
+    return decorator
+
+
+def registry() -> Registry | None:
+    if not has_app_context():
+        return None
+    return current_app.extensions.get("metrics")
+
+
+def observe(name: str, value: float, labels: Labels = ()) -> None:
+    """Наблюдение для гистограммы; без метрик (CLI, отключены) ничего не делает."""
+    metrics = registry()
+    if metrics is not None:
+        metrics.observe(name, value, labels)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool, который замеряет ожидание соединения (db_pool_checkout_seconds).
+
+    Подставляется через poolclass, поэтому переживает engine.dispose() после fork.
+    """
+
+    def connect(self):  # type: ignore[override]
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            observe("db_pool_checkout_seconds", time.perf_counter() - started)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info.get("metrics_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    if not has_request_context() or "metrics_started" not in g:
+        return
+    g.sql_count += 1
+    g.sql_seconds += elapsed
+    if g.sql_statements is not None:
+        g.sql_statements.append((elapsed, statement))
+
+
+def _on_error(context) -> None:
+    # after_cursor_execute при ошибке не вызывается — снимаем отметку сами.
+    if context.connection is not None and context.connection.info.get("metrics_started"):
+        context.connection.info["metrics_started"].pop()
+
+
+def instrument(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _on_error)
+
+
+def _endpoint_labels() -> Labels:
+    return (("endpoint", request.endpoint or "unmatched"), ("method", request.method))
+
+
+def _start_request() -> None:
+    g.metrics_started = time.perf_counter()
+    g.sql_count = 0
+    g.sql_seconds = 0.0
+    g.sql_statements = [] if current_app.config["SLOW_REQUEST_MS"] else None
+    current_app.extensions["metrics"].inc("http_requests_in_flight", (("endpoint", request.endpoint or "unmatched"),))
+
+
+def _remember_status(response: Response) -> Response:
+    g.metrics_status = response.status_code
+    return response
+
+
+def _finish_request(exc: BaseException | None) -> None:
+    started = g.pop("metrics_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    status = g.pop("metrics_status", 500)
+    sql_count = g.pop("sql_count")
+    sql_seconds = g.pop("sql_seconds")
+    statements = g.pop("sql_statements")
+
+    metrics: Registry = current_app.extensions["metrics"]
+    labels = _endpoint_labels()
+    metrics.inc("http_requests_in_flight", labels[:1], -1)
+    metrics.inc("http_requests_total", (*labels, ("status", str(status))))
+    metrics.observe("http_request_duration_seconds", elapsed, labels)
+    metrics.observe("http_request_db_queries", sql_count, labels)
+    metrics.observe("http_request_db_seconds", sql_seconds, labels)
+
+    slow_ms = current_app.config["SLOW_REQUEST_MS"]
+    if slow_ms and elapsed * 1000 >= slow_ms:
+        slowest = sorted(statements, key=lambda item: item[0], reverse=True)[:SLOW_LOG_STATEMENTS]
+        current_app.logger.warning(
+            "Медленный запрос %s %s: %.0f мс, SQL: %d запросов, %.0f мс%s",
+            request.method,
+            request.full_path.rstrip("?"),
+            elapsed * 1000,
+            sql_count,
+            sql_seconds * 1000,
+            "".join(f"\n  {seconds * 1000:.1f} мс: {' '.join(sql.split())[:500]}" for seconds, sql in slowest),
+        )
+    metrics.schedule_flush()
+
+
+bp = Blueprint("metrics", __name__)
+
+
+def _metrics_allowed(remote_addr: str | None) -> bool:
+    networks = current_app.config["METRICS_ALLOWED_IPS"]
+    if not networks:
+        return True
+    try:
+        address = ipaddress.ip_address(remote_addr or "")
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(net, strict=False) for net in networks)
+
+
+@bp.get("/metrics")
+def metrics_view():
+    # nginx закрывает /metrics снаружи, но до web можно достучаться и мимо него.
+    if not _metrics_allowed(request.remote_addr):
+        abort(403)
+    metrics: Registry = current_app.extensions["metrics"]
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+def init_app(app: Flask) -> None:
+    if not app.config["METRICS_ENABLED"]:
+        return
+    app.extensions["metrics"] = Registry(app.config["METRICS_DIR"], app.config["METRICS_FLUSH_SECONDS"])
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument(engine)
+    if "replica_engine" in app.extensions:
+        instrument(app.extensions["replica_engine"])
+    app.before_request(_start_request)
+    app.after_request(_remember_status)
+    app.teardown_request(_finish_request)
+    app.register_blueprint(bp)
+
+
+def flush(app: Flask) -> None:
+    """Сбрасывает снимок воркера на диск (вызывается при его завершении)."""
+    metrics = app.extensions.get("metrics")
+    if metrics is not None:
+        metrics.flush()
@@ -3,8 +3,6 @@ from __future__ import annotations
 from datetime import datetime
 from decimal import Decimal
 
-from werkzeug.security import check_password_hash, generate_password_hash
-
 from .extensions import db
 
 
@@ -13,20 +11,17 @@ class User(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(255), unique=True, nullable=False, index=True)
-    password_hash = db.Column(db.String(255), nullable=False)
+    # NULL у гостевых покупателей, оформивших заказ без регистрации.
+    password_hash = db.Column(db.String(255), nullable=True)
     full_name = db.Column(db.String(200), nullable=True)
     is_admin = db.Column(db.Boolean, nullable=False, default=False)
+    # Растёт при смене пароля или прав: сессии со старым значением перестают действовать.
+    auth_version = db.Column(db.Integer, nullable=False, default=0)
 
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
     orders = db.relationship("Order", back_populates="user", cascade="all, delete-orphan")
 
-    def set_password(self, password: str) -> None:
-        self.password_hash = generate_password_hash(password)
-
-    def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
-
 
 class Category(db.Model):
     __tablename__ = "categories"
@@ -42,6 +37,30 @@ class Category(db.Model):
 
 class Product(db.Model):
     __tablename__ = "products"
+    __table_args__ = (
+        # Ключ постраничной навигации каталога: (created_at, id) по убыванию.
+        db.Index("ix_products_created_at_id", "created_at", "id"),
+        # Пересчёт фасетов одной категории (число и диапазон цен) читает только индекс.
+        db.Index("ix_products_category_active_price", "category_id", "is_active", "price"),
+        # Витрина видит только активные товары: частичные индексы под ключ страницы
+        # каталога целиком и внутри категории. Условие совпадает с тем, что пишет
+        # Product.is_active.is_(True), иначе планировщик не применит индекс.
+        db.Index(
+            "ix_products_active_created_at_id",
+            "created_at",
+            "id",
+            postgresql_where=db.text("is_active IS true"),
+            sqlite_where=db.text("is_active IS 1"),
+        ),
+        db.Index(
+            "ix_products_active_category_created_at_id",
+            "category_id",
+            "created_at",
+            "id",
+            postgresql_where=db.text("is_active IS true"),
+            sqlite_where=db.text("is_active IS 1"),
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False, index=True)
@@ -50,6 +69,8 @@ class Product(db.Model):
 
     price = db.Column(db.Numeric(10, 2), nullable=False, default=Decimal("0.00"))
     stock_qty = db.Column(db.Integer, nullable=False, default=0)
+    # 0 — остаток хранится в stock_qty; N > 0 — остаток разнесён по N строкам stock_shards.
+    stock_shards = db.Column(db.Integer, nullable=False, default=0)
 
     is_active = db.Column(db.Boolean, nullable=False, default=True)
 
@@ -64,6 +85,12 @@ class Product(db.Model):
 
 class Order(db.Model):
     __tablename__ = "orders"
+    __table_args__ = (
+        # История заказов покупателя, новые сверху.
+        db.Index("ix_orders_user_created_at_id", "user_id", "created_at", "id"),
+        # Отчёты и сводные таблицы выбирают заказы за период.
+        db.Index("ix_orders_created_at", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     status = db.Column(db.String(30), nullable=False, default="new", index=True)
@@ -76,18 +103,15 @@ class Order(db.Model):
     customer_email = db.Column(db.String(255), nullable=True)
     delivery_address = db.Column(db.String(500), nullable=True)
 
+    # Записываются при оформлении, чтобы списки и отчёты не загружали позиции.
+    total_amount = db.Column(db.Numeric(12, 2), nullable=False, default=Decimal("0.00"))
+    items_count = db.Column(db.Integer, nullable=False, default=0)
+
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     items = db.relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
 
-    @property
-    def total_amount(self) -> Decimal:
-        total = Decimal("0.00")
-        for item in self.items:
-            total += item.line_total
-        return total
-
 
 class OrderItem(db.Model):
     __tablename__ = "order_items"
@@ -108,3 +132,132 @@ class OrderItem(db.Model):
     @property
     def line_total(self) -> Decimal:
         return Decimal(self.unit_price) * Decimal(self.qty)
+
+
+class Cart(db.Model):
+    __tablename__ = "carts"
+
+    # Случайный id — единственное, что хранится в cookie сессии.
+    id = db.Column(db.String(32), primary_key=True)
+    # У пользователя не больше одной корзины; NULL — анонимная корзина.
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=True, unique=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
+class CartItem(db.Model):
+    __tablename__ = "cart_items"
+
+    cart_id = db.Column(db.String(32), db.ForeignKey("carts.id", ondelete="CASCADE"), primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    qty = db.Column(db.Integer, nullable=False, default=1)
+
+
+class CacheVersion(db.Model):
+    __tablename__ = "cache_versions"
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class StockShard(db.Model):
+    __tablename__ = "stock_shards"
+
+    product_id = db.Column(db.Integer, db.ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    shard_no = db.Column(db.Integer, primary_key=True)
+    qty = db.Column(db.Integer, nullable=False, default=0)
+
+
+class StockHold(db.Model):
+    __tablename__ = "stock_holds"
+
+    id = db.Column(db.Integer, primary_key=True)
+    holder = db.Column(db.String(64), nullable=False, index=True)
+
+    product_id = db.Column(db.Integer, db.ForeignKey("products.id", ondelete="CASCADE"), nullable=False, index=True)
+    shard_no = db.Column(db.Integer, nullable=True)
+    qty = db.Column(db.Integer, nullable=False)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class DailyProductSales(db.Model):
+    __tablename__ = "daily_product_sales"
+
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True)
+    category_id = db.Column(db.Integer, nullable=False, index=True)
+
+    orders_count = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=Decimal("0.00"))
+
+
+class DailyCategorySales(db.Model):
+    """Продажи категории за день: заказ с несколькими товарами категории считается один раз."""
+
+    __tablename__ = "daily_category_sales"
+
+    day = db.Column(db.Date, primary_key=True)
+    category_id = db.Column(db.Integer, primary_key=True)
+
+    orders_count = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=Decimal("0.00"))
+
+
+class DailyOrderStats(db.Model):
+    __tablename__ = "daily_order_stats"
+
+    day = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(30), primary_key=True)
+
+    orders_count = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=Decimal("0.00"))
+
+
+class CategoryFacet(db.Model):
+    """Число активных товаров и диапазон цен категории для навигации каталога."""
+
+    __tablename__ = "category_facets"
+
+    category_id = db.Column(db.Integer, db.ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    product_count = db.Column(db.Integer, nullable=False, default=0)
+    min_price = db.Column(db.Numeric(10, 2), nullable=True)
+    max_price = db.Column(db.Numeric(10, 2), nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class RollupState(db.Model):
+    __tablename__ = "rollup_state"
+
+    name = db.Column(db.String(50), primary_key=True)
+    # Заказы с id не больше этого значения уже учтены в сводных таблицах.
+    last_order_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class OutboxJob(db.Model):
+    """Фоновая задача, записанная в одной транзакции с изменением, которое её породило."""
+
+    __tablename__ = "outbox_jobs"
+    __table_args__ = (
+        # Выборка воркера: ожидающие задачи, у которых подошло время, по порядку.
+        db.Index("ix_outbox_jobs_status_run_after_id", "status", "run_after", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(64), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    # pending — ждёт или выполняется, done — выполнена, failed — исчерпаны попытки.
+    status = db.Column(db.String(20), nullable=False, default="pending")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    # Не раньше этого момента; у задачи, взятой воркером, — конец аренды.
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, nullable=True)
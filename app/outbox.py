@@ -0,0 +1,219 @@
+"""Транзакционный outbox: фоновые задачи без внешнего брокера.
+
+Задача пишется в outbox_jobs той же транзакцией, что и породившее её
+изменение (например, заказ), поэтому не теряется и не появляется без него.
+Воркер (`flask outbox work`) забирает задачи порциями через
+SELECT ... FOR UPDATE SKIP LOCKED и сдвигает им run_after на время аренды:
+параллельные воркеры не берут одно и то же, а задачи упавшего воркера
+вернутся в работу, когда аренда истечёт. Задача может выполниться больше
+одного раза, поэтому обработчики должны быть идемпотентными.
+"""
+from __future__ import annotations
+
+import signal
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, NamedTuple
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete, func, select, update
+
+from . import rollups
+from .extensions import db
+from .models import OutboxJob
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+# Потолок паузы между попытками, сколько бы их ни было.
+MAX_BACKOFF_SECONDS = 3600
+
+Handler = Callable[[dict[str, Any]], None]
+HANDLERS: dict[str, Handler] = {}
+
+
+class ClaimedJob(NamedTuple):
+    id: int
+    kind: str
+    payload: dict[str, Any]
+    attempts: int
+
+
+def handler(kind: str) -> Callable[[Handler], Handler]:
+    """Регистрирует обработчик задач вида kind."""
+
+    def decorator(fn: Handler) -> Handler:
+        HANDLERS[kind] = fn
+        return fn
+
+    return decorator
+
+
+def enqueue(kind: str, payload: dict[str, Any], *, delay: float = 0) -> OutboxJob:
+    """Добавляет задачу в текущую транзакцию. Коммит — на вызывающем коде."""
+    if kind not in HANDLERS:
+        raise KeyError(f"Нет обработчика для задач {kind!r}")
+    job = OutboxJob(kind=kind, payload=payload, run_after=datetime.utcnow() + timedelta(seconds=delay))
+    db.session.add(job)
+    return job
+
+
+def backoff(attempts: int) -> float:
+    """Пауза перед следующей попыткой: OUTBOX_BACKOFF_SECONDS, дальше вдвое больше каждый раз."""
+    base = current_app.config["OUTBOX_BACKOFF_SECONDS"]
+    return min(base * 2 ** max(attempts - 1, 0), MAX_BACKOFF_SECONDS)
+
+
+def claim(limit: int) -> list[ClaimedJob]:
+    """Забирает до limit готовых задач и продлевает им аренду. Коммит — на вызывающем коде."""
+    now = datetime.utcnow()
+    ready = (
+        select(OutboxJob.id)
+        .where(OutboxJob.status == PENDING, OutboxJob.run_after <= now)
+        .order_by(OutboxJob.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    rows = db.session.execute(
+        update(OutboxJob)
+        .where(OutboxJob.id.in_(ready.scalar_subquery()))
+        .values(
+            attempts=OutboxJob.attempts + 1,
+            run_after=now + timedelta(seconds=current_app.config["OUTBOX_LEASE_SECONDS"]),
+        )
+        .returning(OutboxJob.id, OutboxJob.kind, OutboxJob.payload, OutboxJob.attempts)
+        .execution_options(synchronize_session=False)
+    ).all()
+    return sorted((ClaimedJob._make(row) for row in rows), key=lambda job: job.id)
+
+
+def _finish(job: ClaimedJob) -> None:
+    db.session.execute(
+        update(OutboxJob)
+        .where(OutboxJob.id == job.id)
+        .values(status=DONE, processed_at=datetime.utcnow(), last_error=None)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _fail(job: ClaimedJob, error: str) -> str:
+    now = datetime.utcnow()
+    if job.attempts >= current_app.config["OUTBOX_MAX_ATTEMPTS"]:
+        values = {"status": FAILED, "processed_at": now}
+    else:
+        values = {"run_after": now + timedelta(seconds=backoff(job.attempts))}
+    db.session.execute(
+        update(OutboxJob)
+        .where(OutboxJob.id == job.id)
+        .values(last_error=error, **values)
+        .execution_options(synchronize_session=False)
+    )
+    return values.get("status", PENDING)
+
+
+def run_batch(limit: int | None = None) -> dict[str, int]:
+    """Забирает порцию задач и выполняет их.
+
+    Каждая задача выполняется в своей транзакции вместе с отметкой о
+    выполнении: то, что обработчик записал в базу, и статус done фиксируются
+    вместе. При ошибке изменения обработчика откатываются, а задача
+    переносится на потом (или помечается failed после OUTBOX_MAX_ATTEMPTS).
+    """
+    jobs = claim(limit or current_app.config["OUTBOX_BATCH_SIZE"])
+    db.session.commit()
+
+    result = {DONE: 0, PENDING: 0, FAILED: 0}
+    for job in jobs:
+        fn = HANDLERS.get(job.kind)
+        try:
+            if fn is None:
+                raise LookupError(f"нет обработчика для задач {job.kind!r}")
+            fn(job.payload)
+            _finish(job)
+            db.session.commit()
+            result[DONE] += 1
+        except Exception as exc:
+            db.session.rollback()
+            current_app.logger.warning("Задача outbox #%s (%s), попытка %s: %r", job.id, job.kind, job.attempts, exc)
+            result[_fail(job, f"{type(exc).__name__}: {exc}")] += 1
+            db.session.commit()
+    return result
+
+
+def purge(older_than: timedelta) -> int:
+    """Удаляет выполненные задачи старше older_than."""
+    cutoff = datetime.utcnow() - older_than
+    result = db.session.execute(
+        delete(OutboxJob)
+        .where(OutboxJob.status == DONE, OutboxJob.processed_at < cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+@handler("order_placed")
+def _order_placed(payload: dict[str, Any]) -> None:
+    # Задача ставится с задержкой ROLLUP_SETTLE_SECONDS, так что заказ уже попадает в порцию
+    # сводных таблиц; сюда же подключаются письма, синхронизация склада и вебхуки.
+    rollups.refresh()
+
+
+@click.group("outbox")
+def outbox_cli() -> None:
+    """Фоновые задачи (транзакционный outbox)."""
+
+
+@outbox_cli.command("work")
+@click.option("--once", is_flag=True, help="Выполнить готовые задачи и выйти.")
+@click.option("--batch-size", type=int, default=None, help="Задач за одну выборку (OUTBOX_BATCH_SIZE).")
+@click.option("--poll", type=float, default=None, help="Пауза, когда задач нет, с (OUTBOX_POLL_SECONDS).")
+@with_appcontext
+def work_command(once: bool, batch_size: int | None, poll: float | None) -> None:
+    """Выполняет задачи, пока процесс не остановят (SIGTERM/Ctrl+C дожидаются конца порции)."""
+    poll = current_app.config["OUTBOX_POLL_SECONDS"] if poll is None else poll
+    stopping = False
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+
+    previous = {signum: signal.signal(signum, stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+    totals = {DONE: 0, PENDING: 0, FAILED: 0}
+    try:
+        while not stopping:
+            result = run_batch(batch_size)
+            for key, value in result.items():
+                totals[key] += value
+            if sum(result.values()):
+                continue
+            if once:
+                break
+            # Отдаём соединение в пул на время простоя.
+            db.session.remove()
+            time.sleep(poll)
+    finally:
+        for signum, old in previous.items():
+            signal.signal(signum, old)
+    click.echo(f"Выполнено: {totals[DONE]}, отложено: {totals[PENDING]}, с ошибкой: {totals[FAILED]}")
+
+
+@outbox_cli.command("status")
+@with_appcontext
+def status_command() -> None:
+    """Число задач по статусам."""
+    rows = db.session.execute(select(OutboxJob.status, func.count(OutboxJob.id)).group_by(OutboxJob.status)).all()
+    for status, count in sorted(rows):
+        click.echo(f"{status}: {count}")
+
+
+@outbox_cli.command("purge")
+@click.option("--days", type=int, default=7, show_default=True)
+@with_appcontext
+def purge_command(days: int) -> None:
+    """Удаляет выполненные задачи старше --days дней."""
+    removed = purge(timedelta(days=days))
+    db.session.commit()
+    click.echo(f"Удалено задач: {removed}")
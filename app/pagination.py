@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Generic, Sequence, TypeVar
+
+from sqlalchemy import tuple_
+
+T = TypeVar("T")
+
+
+@dataclass
+class Page(Generic[T]):
+    items: list[T]
+    next_cursor: str | None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, Decimal):
+        # Строкой, чтобы значение вернулось в запрос точно таким же (релевантность поиска).
+        return {"dec": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    if isinstance(value, dict) and "dec" in value:
+        return Decimal(value["dec"])
+    return value
+
+
+def _python_type(column: Any) -> type | None:
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def _has_type(value: Any, expected: type | None) -> bool:
+    if expected is None:
+        return True
+    if isinstance(value, bool):
+        return expected is bool
+    if isinstance(value, int) and expected in (int, float):
+        # Число вне BIGINT база не сравнит, а ответит ошибкой.
+        return -(2**63) <= value < 2**63
+    if isinstance(value, Decimal):
+        return expected is Decimal and value.is_finite()
+    return isinstance(value, expected)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str | None, size: int, types: Sequence[type | None] | None = None) -> list[Any] | None:
+    """Возвращает значения курсора или None, если курсор отсутствует или повреждён.
+
+    Курсор присылает клиент, поэтому с types значения ещё и сверяются с
+    ожидаемыми типами Python: иначе подделанный курсор дошёл бы до базы и
+    закончился ошибкой типа вместо первой страницы.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(raw, list) or len(raw) != size:
+            return None
+        values = [_decode_value(v) for v in raw]
+    except (ValueError, TypeError, InvalidOperation, binascii.Error):
+        return None
+    if types is not None and not all(_has_type(v, t) for v, t in zip(values, types)):
+        return None
+    return values
+
+
+def keyset_page(
+    query,
+    columns: Sequence[Any],
+    key: Callable[[T], Sequence[Any]],
+    cursor: str | None,
+    per_page: int,
+) -> Page[T]:
+    """Страница по убыванию `columns` начиная сразу после `cursor`.
+
+    Сравнение строк `(a, b) < (x, y)` обслуживается составным индексом,
+    поэтому стоимость страницы не зависит от её номера.
+    """
+    after = decode_cursor(cursor, len(columns), [_python_type(column) for column in columns])
+    if after is not None:
+        query = query.filter(tuple_(*columns) < tuple_(*after))
+
+    rows = query.order_by(*[column.desc() for column in columns]).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(key(rows[-1]))
+    return Page(items=rows, next_cursor=next_cursor)
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable
+
+from flask import Flask, current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+# Пароль, который до миграции 0006 ставился гостям при оформлении заказа.
+# Он известен всем, поэтому входить с ним нельзя, даже если хеш совпадает.
+LEGACY_GUEST_PASSWORD = "temporary-password"
+# Такие хеши делались методом werkzeug по умолчанию; у остальных проверять нечего.
+LEGACY_HASH_PREFIX = "scrypt:32768:8:1$"
+
+
+class HashingBusy(Exception):
+    """Очередь на хеширование паролей переполнена."""
+
+
+@lru_cache(maxsize=8)
+def _method_prefix(method: str) -> str:
+    # "scrypt" в хеше записывается с параметрами по умолчанию: "scrypt:32768:8:1".
+    return generate_password_hash("", method).split("$", 1)[0]
+
+
+def needs_rehash(password_hash: str | None, method: str) -> bool:
+    if not password_hash:
+        return False
+    return password_hash.split("$", 1)[0] != _method_prefix(method)
+
+
+class PasswordHasher:
+    """Ограниченный пул для хеширования паролей.
+
+    scrypt намеренно дорог по CPU и памяти. Пул выполняет не больше
+    PASSWORD_HASH_WORKERS хешей одновременно и держит в очереди не больше
+    PASSWORD_HASH_QUEUE запросов; остальные ждут не дольше PASSWORD_HASH_WAIT
+    секунд и получают HashingBusy, поэтому всплеск входов не отнимает воркеры у каталога.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pid: int | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._slots: threading.BoundedSemaphore | None = None
+
+    def init_app(self, app: Flask) -> None:
+        app.extensions["password_hasher"] = self
+
+    def _pool(self) -> tuple[ThreadPoolExecutor, threading.BoundedSemaphore]:
+        # Потоки не переживают fork, поэтому пул создаётся заново в каждом воркере.
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                workers = current_app.config["PASSWORD_HASH_WORKERS"]
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+                self._slots = threading.BoundedSemaphore(workers + current_app.config["PASSWORD_HASH_QUEUE"])
+                self._pid = os.getpid()
+            return self._executor, self._slots
+
+    def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        executor, slots = self._pool()
+        if not slots.acquire(timeout=current_app.config["PASSWORD_HASH_WAIT"]):
+            raise HashingBusy()
+        try:
+            return executor.submit(fn, *args).result()
+        finally:
+            slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, current_app.config["PASSWORD_HASH_METHOD"])
+
+    def verify(self, password_hash: str | None, password: str) -> bool:
+        if not password_hash:
+            return False
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str | None) -> bool:
+        return needs_rehash(password_hash, current_app.config["PASSWORD_HASH_METHOD"])
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,171 @@
+"""Модели чтения для страниц со списками товаров.
+
+Вместо ORM-объектов Product выбираются только нужные странице колонки вместе
+с категорией (один JOIN) и упаковываются в именованные кортежи: без
+identity map, отслеживания изменений и ленивых связей. Такие строки
+неизменяемы, поэтому их можно класть в кэш каталога как есть.
+Изменения товаров (админка, склад) по-прежнему идут через ORM-сущности.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, NamedTuple
+
+from sqlalchemy import func
+
+from .extensions import db
+from .models import Category, Order, OrderItem, Product
+from .pagination import Page, keyset_page
+
+# Сколько символов описания показывает карточка в каталоге.
+SUMMARY_LENGTH = 160
+
+
+class ProductCard(NamedTuple):
+    """Товар в каталоге и в списке админки."""
+
+    id: int
+    slug: str
+    name: str
+    price: Decimal
+    summary: str | None
+    is_active: bool
+    created_at: datetime
+    updated_at: datetime
+    category_name: str
+
+
+class ProductDetail(NamedTuple):
+    """Страница товара: карточка с полным описанием."""
+
+    id: int
+    slug: str
+    name: str
+    price: Decimal
+    description: str | None
+    updated_at: datetime
+    category_name: str
+    category_slug: str
+
+
+class CartProduct(NamedTuple):
+    """Товар в корзине и при оформлении заказа."""
+
+    id: int
+    name: str
+    price: Decimal
+    category_name: str
+
+
+class OrderSummary(NamedTuple):
+    """Заказ в истории покупателя; итоги записаны при оформлении."""
+
+    id: int
+    status: str
+    total_amount: Decimal
+    items_count: int
+    created_at: datetime
+
+
+class OrderLine(NamedTuple):
+    """Позиция заказа в истории покупателя."""
+
+    order_id: int
+    product_id: int
+    product_name: str | None
+    product_slug: str | None
+    qty: int
+    unit_price: Decimal
+
+    @property
+    def line_total(self) -> Decimal:
+        return Decimal(self.unit_price) * self.qty
+
+
+def _card_columns() -> list[Any]:
+    return [
+        Product.id,
+        Product.slug,
+        Product.name,
+        Product.price,
+        # На символ больше, чтобы знать, обрезано ли описание.
+        func.substr(Product.description, 1, SUMMARY_LENGTH + 1).label("summary"),
+        Product.is_active,
+        Product.created_at,
+        Product.updated_at,
+        Category.name.label("category_name"),
+    ]
+
+
+def card_query():
+    """Запрос строк для ProductCard; фильтры и сортировки — на вызывающем коде."""
+    return db.session.query(*_card_columns()).join(Product.category)
+
+
+def to_card(row: Any) -> ProductCard:
+    card = ProductCard._make(row[: len(ProductCard._fields)])
+    if card.summary and len(card.summary) > SUMMARY_LENGTH:
+        card = card._replace(summary=card.summary[:SUMMARY_LENGTH].rstrip() + "…")
+    return card
+
+
+def product_detail(slug: str) -> ProductDetail | None:
+    row = (
+        db.session.query(
+            Product.id,
+            Product.slug,
+            Product.name,
+            Product.price,
+            Product.description,
+            Product.updated_at,
+            Category.name,
+            Category.slug,
+        )
+        .join(Product.category)
+        .filter(Product.slug == slug, Product.is_active.is_(True))
+        .first()
+    )
+    return ProductDetail._make(row) if row is not None else None
+
+
+def cart_products(product_ids: list[int]) -> dict[int, CartProduct]:
+    rows = (
+        db.session.query(Product.id, Product.name, Product.price, Category.name)
+        .join(Product.category)
+        .filter(Product.id.in_(product_ids), Product.is_active.is_(True))
+    )
+    return {row[0]: CartProduct._make(row) for row in rows}
+
+
+def order_history(user_id: int, cursor: str | None, per_page: int) -> Page[OrderSummary]:
+    """Страница заказов покупателя, новые сверху; позиции не читаются."""
+    query = db.session.query(
+        Order.id, Order.status, Order.total_amount, Order.items_count, Order.created_at
+    ).filter(Order.user_id == user_id)
+    page = keyset_page(
+        query,
+        columns=(Order.created_at, Order.id),
+        key=lambda row: (row.created_at, row.id),
+        cursor=cursor,
+        per_page=per_page,
+    )
+    return Page(items=[OrderSummary._make(row) for row in page.items], next_cursor=page.next_cursor)
+
+
+def order_lines(order_ids: list[int]) -> dict[int, list[OrderLine]]:
+    """Позиции сразу всех заказов страницы — один запрос по индексу order_items.order_id."""
+    lines: dict[int, list[OrderLine]] = {order_id: [] for order_id in order_ids}
+    if not order_ids:
+        return lines
+    rows = (
+        db.session.query(
+            OrderItem.order_id, OrderItem.product_id, Product.name, Product.slug, OrderItem.qty, OrderItem.unit_price
+        )
+        .outerjoin(Product, Product.id == OrderItem.product_id)
+        .filter(OrderItem.order_id.in_(order_ids))
+        .order_by(OrderItem.order_id, OrderItem.id)
+    )
+    for row in rows:
+        lines[row[0]].append(OrderLine._make(row))
+    return lines
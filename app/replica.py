@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+
+from flask import Flask, current_app, g, request, session
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+from .engine import engine_options, install_timeouts
+
+# Чтение с реплики разрешено только GET/HEAD этих блюпринтов.
+READ_BLUEPRINTS = {"shop", "main"}
+PRIMARY_UNTIL_KEY = "_primary_until"
+
+_LAG_SQL = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+class _ReplicaState:
+    def __init__(self) -> None:
+        self.lag = 0.0
+        self.checked_at = 0.0
+        self.usable = True
+        self.lock = threading.Lock()
+
+
+def init_app(app: Flask) -> None:
+    url = app.config.get("DATABASE_REPLICA_URL")
+    if not url:
+        return
+    # Отдельный движок, а не SQLALCHEMY_BINDS: create_all и миграции не должны трогать реплику.
+    engine = create_engine(url, **engine_options({**app.config, "SQLALCHEMY_DATABASE_URI": url}))
+    install_timeouts(engine)
+    app.extensions["replica_engine"] = engine
+    app.extensions["replica_state"] = _ReplicaState()
+    app.before_request(_route_request)
+    app.after_request(_remember_write)
+    app.teardown_request(_reset_route)
+
+
+def replica_engine() -> Engine:
+    return current_app.extensions["replica_engine"]
+
+
+def _measure_lag() -> float:
+    engine = replica_engine()
+    if engine.dialect.name != "postgresql":
+        return 0.0
+    try:
+        with engine.connect() as connection:
+            return float(connection.execute(text(_LAG_SQL)).scalar() or 0)
+    except Exception:
+        current_app.logger.exception("Реплика недоступна")
+        return math.inf
+
+
+def replica_usable() -> bool:
+    """Отставание реплики в пределах REPLICA_MAX_LAG_SECONDS; проверяется не чаще раза в REPLICA_LAG_CHECK_SECONDS."""
+    state: _ReplicaState = current_app.extensions["replica_state"]
+    now = time.monotonic()
+    if now - state.checked_at >= current_app.config["REPLICA_LAG_CHECK_SECONDS"]:
+        with state.lock:
+            if now - state.checked_at >= current_app.config["REPLICA_LAG_CHECK_SECONDS"]:
+                state.lag = _measure_lag()
+                usable = state.lag <= current_app.config["REPLICA_MAX_LAG_SECONDS"]
+                if usable != state.usable:
+                    current_app.logger.warning(
+                        "Чтение с реплики %s (отставание %.1f с)", "возобновлено" if usable else "отключено", state.lag
+                    )
+                state.usable = usable
+                state.checked_at = now
+    return state.usable
+
+
+def _route_request() -> None:
+    if request.method not in ("GET", "HEAD") or request.blueprint not in READ_BLUEPRINTS:
+        return
+    # Недавно писавший покупатель читает с основной базы, пока реплика его не догонит.
+    if session.get(PRIMARY_UNTIL_KEY, 0) > time.time():
+        return
+    g.db_use_replica = replica_usable()
+
+
+def _remember_write(response):
+    if g.get("db_wrote"):
+        sticky = current_app.config["REPLICA_STICKY_SECONDS"]
+        session[PRIMARY_UNTIL_KEY] = int(time.time() + sticky) + 1
+    return response
+
+
+def _reset_route(exc: BaseException | None) -> None:
+    g.pop("db_use_replica", None)
+    g.pop("db_wrote", None)
+
+
+def stats() -> dict[str, float | bool]:
+    state: _ReplicaState = current_app.extensions["replica_state"]
+    return {"lag": state.lag, "usable": state.usable}
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from sqlalchemy import func, select
+
+from .extensions import db
+from .models import Category, Order, OrderItem, Product
+
+
+@dataclass(frozen=True)
+class RevenueRow:
+    key: object
+    label: str
+    orders: int
+    units: int
+    revenue: Decimal
+
+
+def _bounds(start: date, end: date) -> tuple[datetime, datetime]:
+    # Диапазон включает оба конца: [start 00:00, end + 1 день 00:00).
+    return datetime.combine(start, time.min), datetime.combine(end + timedelta(days=1), time.min)
+
+
+def as_date(value) -> date:
+    # SQLite возвращает date() строкой, PostgreSQL — объектом date.
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def money(value) -> Decimal:
+    return Decimal(str(value or 0)).quantize(Decimal("0.01"))
+
+
+def revenue_by_day(start: date, end: date, *, status: str | None = None) -> list[RevenueRow]:
+    since, until = _bounds(start, end)
+    day = func.date(Order.created_at).label("day")
+    query = (
+        select(
+            day,
+            func.count(Order.id),
+            func.coalesce(func.sum(Order.items_count), 0),
+            func.coalesce(func.sum(Order.total_amount), 0),
+        )
+        .where(Order.created_at >= since, Order.created_at < until)
+        .group_by(day)
+        .order_by(day)
+    )
+    if status is not None:
+        query = query.where(Order.status == status)
+
+    rows = []
+    for value, orders, units, revenue in db.session.execute(query):
+        value = as_date(value)
+        rows.append(RevenueRow(value, value.isoformat(), int(orders), int(units), money(revenue)))
+    return rows
+
+
+def revenue_by_status(start: date, end: date) -> list[RevenueRow]:
+    since, until = _bounds(start, end)
+    query = (
+        select(
+            Order.status,
+            func.count(Order.id),
+            func.coalesce(func.sum(Order.items_count), 0),
+            func.coalesce(func.sum(Order.total_amount), 0),
+        )
+        .where(Order.created_at >= since, Order.created_at < until)
+        .group_by(Order.status)
+        .order_by(Order.status)
+    )
+    return [
+        RevenueRow(status, status, int(orders), int(units), money(revenue))
+        for status, orders, units, revenue in db.session.execute(query)
+    ]
+
+
+def revenue_by_category(start: date, end: date) -> list[RevenueRow]:
+    since, until = _bounds(start, end)
+    query = (
+        select(
+            Category.id,
+            Category.name,
+            func.count(func.distinct(OrderItem.order_id)),
+            func.coalesce(func.sum(OrderItem.qty), 0),
+            func.coalesce(func.sum(OrderItem.qty * OrderItem.unit_price), 0),
+        )
+        .select_from(OrderItem)
+        .join(Order, Order.id == OrderItem.order_id)
+        .join(Product, Product.id == OrderItem.product_id)
+        .join(Category, Category.id == Product.category_id)
+        .where(Order.created_at >= since, Order.created_at < until)
+        .group_by(Category.id, Category.name)
+        .order_by(func.sum(OrderItem.qty * OrderItem.unit_price).desc())
+    )
+    return [
+        RevenueRow(category_id, name, int(orders), int(units), money(revenue))
+        for category_id, name, orders, units, revenue in db.session.execute(query)
+    ]
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete, func, select
+
+from .extensions import db
+from .models import (
+    Category,
+    DailyCategorySales,
+    DailyOrderStats,
+    DailyProductSales,
+    Order,
+    OrderItem,
+    Product,
+    RollupState,
+)
+from .reports import RevenueRow, as_date, money
+from .utils import dialect_insert
+
+STATE_NAME = "sales"
+
+
+def _upsert_add(table, keys: list[str], replaced: list[str], added: list[str], source) -> None:
+    """INSERT ... SELECT: счётчики `added` прибавляются к существующей строке, `replaced` перезаписываются."""
+    stmt = dialect_insert(table).from_select(keys + replaced + added, source)
+    set_ = {name: getattr(stmt.excluded, name) for name in replaced}
+    set_.update({name: getattr(table.c, name) + getattr(stmt.excluded, name) for name in added})
+    db.session.execute(stmt.on_conflict_do_update(index_elements=keys, set_=set_))
+
+
+def _apply_orders(after_id: int, upto_id: int) -> None:
+    in_range = (Order.id > after_id, Order.id <= upto_id)
+    day = func.date(Order.created_at)
+
+    _upsert_add(
+        DailyOrderStats.__table__,
+        ["day", "status"],
+        [],
+        ["orders_count", "units", "revenue"],
+        select(day, Order.status, func.count(Order.id), func.sum(Order.items_count), func.sum(Order.total_amount))
+        .where(*in_range)
+        .group_by(day, Order.status),
+    )
+    _upsert_add(
+        DailyProductSales.__table__,
+        ["day", "product_id"],
+        ["category_id"],
+        ["orders_count", "units", "revenue"],
+        select(
+            day,
+            OrderItem.product_id,
+            func.max(Product.category_id),
+            func.count(func.distinct(OrderItem.order_id)),
+            func.sum(OrderItem.qty),
+            func.sum(OrderItem.qty * OrderItem.unit_price),
+        )
+        .select_from(OrderItem)
+        .join(Order, Order.id == OrderItem.order_id)
+        .join(Product, Product.id == OrderItem.product_id)
+        .where(*in_range)
+        .group_by(day, OrderItem.product_id),
+    )
+    # Отдельно от товаров: сумма их orders_count посчитала бы заказ с N товарами категории N раз.
+    _upsert_add(
+        DailyCategorySales.__table__,
+        ["day", "category_id"],
+        [],
+        ["orders_count", "units", "revenue"],
+        select(
+            day,
+            Product.category_id,
+            func.count(func.distinct(OrderItem.order_id)),
+            func.sum(OrderItem.qty),
+            func.sum(OrderItem.qty * OrderItem.unit_price),
+        )
+        .select_from(OrderItem)
+        .join(Order, Order.id == OrderItem.order_id)
+        .join(Product, Product.id == OrderItem.product_id)
+        .where(*in_range)
+        .group_by(day, Product.category_id),
+    )
+
+
+def refresh() -> int:
+    """Добавляет в сводные таблицы заказы, появившиеся после прошлого запуска.
+
+    Обрабатывается не больше ROLLUP_BATCH_ORDERS заказов за вызов и только
+    заказы старше ROLLUP_SETTLE_SECONDS: к этому моменту транзакции с меньшими
+    id гарантированно завершены, и отметка last_order_id ничего не пропускает.
+    Возвращает число учтённых заказов. Коммит — на вызывающем коде.
+    """
+    state = db.session.execute(
+        select(RollupState).where(RollupState.name == STATE_NAME).with_for_update()
+    ).scalar_one_or_none()
+    if state is None:
+        state = RollupState(name=STATE_NAME, last_order_id=0)
+        db.session.add(state)
+        db.session.flush()
+
+    settled = datetime.utcnow() - timedelta(seconds=current_app.config["ROLLUP_SETTLE_SECONDS"])
+    batch = (
+        select(Order.id)
+        .where(Order.id > state.last_order_id, Order.created_at <= settled)
+        .order_by(Order.id)
+        .limit(current_app.config["ROLLUP_BATCH_ORDERS"])
+        .subquery()
+    )
+    upto_id, count = db.session.execute(select(func.max(batch.c.id), func.count(batch.c.id))).one()
+    if not count:
+        return 0
+
+    _apply_orders(state.last_order_id, upto_id)
+    state.last_order_id = upto_id
+    return int(count)
+
+
+def rebuild() -> int:
+    """Пересчитывает сводные таблицы с нуля (после ручных правок заказов)."""
+    db.session.execute(delete(DailyOrderStats))
+    db.session.execute(delete(DailyProductSales))
+    db.session.execute(delete(DailyCategorySales))
+    db.session.execute(delete(RollupState).where(RollupState.name == STATE_NAME))
+    db.session.flush()
+
+    total = 0
+    while True:
+        processed = refresh()
+        total += processed
+        if not processed:
+            return total
+
+
+def sales_by_day(start: date, end: date) -> list[RevenueRow]:
+    query = (
+        select(
+            DailyOrderStats.day,
+            func.sum(DailyOrderStats.orders_count),
+            func.sum(DailyOrderStats.units),
+            func.sum(DailyOrderStats.revenue),
+        )
+        .where(DailyOrderStats.day >= start, DailyOrderStats.day <= end)
+        .group_by(DailyOrderStats.day)
+        .order_by(DailyOrderStats.day)
+    )
+    rows = []
+    for day, orders, units, revenue in db.session.execute(query):
+        day = as_date(day)
+        rows.append(RevenueRow(day, day.isoformat(), int(orders), int(units), money(revenue)))
+    return rows
+
+
+def sales_by_status(start: date, end: date) -> list[RevenueRow]:
+    query = (
+        select(
+            DailyOrderStats.status,
+            func.sum(DailyOrderStats.orders_count),
+            func.sum(DailyOrderStats.units),
+            func.sum(DailyOrderStats.revenue),
+        )
+        .where(DailyOrderStats.day >= start, DailyOrderStats.day <= end)
+        .group_by(DailyOrderStats.status)
+        .order_by(DailyOrderStats.status)
+    )
+    return [
+        RevenueRow(status, status, int(orders), int(units), money(revenue))
+        for status, orders, units, revenue in db.session.execute(query)
+    ]
+
+
+def top_products(start: date, end: date, limit: int = 10) -> list[RevenueRow]:
+    revenue = func.sum(DailyProductSales.revenue)
+    totals = (
+        select(
+            DailyProductSales.product_id,
+            func.sum(DailyProductSales.orders_count).label("orders"),
+            func.sum(DailyProductSales.units).label("units"),
+            revenue.label("revenue"),
+        )
+        .where(DailyProductSales.day >= start, DailyProductSales.day <= end)
+        .group_by(DailyProductSales.product_id)
+        .order_by(revenue.desc())
+        .limit(limit)
+        .subquery()
+    )
+    query = (
+        select(totals.c.product_id, Product.name, totals.c.orders, totals.c.units, totals.c.revenue)
+        .outerjoin(Product, Product.id == totals.c.product_id)
+        .order_by(totals.c.revenue.desc())
+    )
+    return [
+        RevenueRow(product_id, name or f"#{product_id}", int(orders), int(units), money(revenue))
+        for product_id, name, orders, units, revenue in db.session.execute(query)
+    ]
+
+
+def sales_by_category(start: date, end: date) -> list[RevenueRow]:
+    totals = (
+        select(
+            DailyCategorySales.category_id,
+            func.sum(DailyCategorySales.orders_count).label("orders"),
+            func.sum(DailyCategorySales.units).label("units"),
+            func.sum(DailyCategorySales.revenue).label("revenue"),
+        )
+        .where(DailyCategorySales.day >= start, DailyCategorySales.day <= end)
+        .group_by(DailyCategorySales.category_id)
+        .subquery()
+    )
+    query = (
+        select(totals.c.category_id, Category.name, totals.c.orders, totals.c.units, totals.c.revenue)
+        .outerjoin(Category, Category.id == totals.c.category_id)
+        .order_by(totals.c.revenue.desc())
+    )
+    return [
+        RevenueRow(category_id, name or f"#{category_id}", int(orders), int(units), money(revenue))
+        for category_id, name, orders, units, revenue in db.session.execute(query)
+    ]
+
+
+@click.group("rollups")
+def rollups_cli() -> None:
+    """Сводные таблицы продаж для админки."""
+
+
+@rollups_cli.command("refresh")
+@with_appcontext
+def refresh_command() -> None:
+    """Учитывает новые заказы (запускать по расписанию, например раз в минуту)."""
+    total = 0
+    while True:
+        processed = refresh()
+        db.session.commit()
+        total += processed
+        if not processed:
+            break
+    click.echo(f"Учтено заказов: {total}")
+
+
+@rollups_cli.command("rebuild")
+@with_appcontext
+def rebuild_command() -> None:
+    """Полностью пересчитывает сводные таблицы."""
+    total = rebuild()
+    db.session.commit()
+    click.echo(f"Пересчитано заказов: {total}")
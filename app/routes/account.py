@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from flask import Blueprint, abort, current_app, flash, jsonify, redirect, render_template, request, url_for
+
+from ..identity import Identity, current_identity
+from ..metrics import query_budget
+from ..pagination import Page
+from ..projections import OrderLine, OrderSummary, order_history, order_lines
+
+bp = Blueprint("account", __name__)
+
+
+def _orders_page(user: Identity) -> tuple[Page[OrderSummary], dict[int, list[OrderLine]]]:
+    # Курсор (created_at, id): страница оптовика с тысячами заказов стоит столько же, сколько первая.
+    cursor = (request.args.get("after") or "").strip() or None
+    page = order_history(user.id, cursor, current_app.config["ORDERS_PER_PAGE"])
+    return page, order_lines([order.id for order in page.items])
+
+
+@bp.get("/orders")
+@query_budget(3)
+def orders():
+    user = current_identity()
+    if user is None:
+        flash("Войдите, чтобы увидеть свои заказы.", "warning")
+        return redirect(url_for("auth.login"))
+
+    page, lines = _orders_page(user)
+    return render_template(
+        "account/orders.html",
+        orders=page.items,
+        lines=lines,
+        next_cursor=page.next_cursor,
+        is_first_page=not request.args.get("after"),
+    )
+
+
+@bp.get("/orders.json")
+@query_budget(3)
+def orders_json():
+    user = current_identity()
+    if user is None:
+        abort(401)
+
+    page, lines = _orders_page(user)
+    return jsonify(
+        {
+            "orders": [
+                {
+                    "id": order.id,
+                    "status": order.status,
+                    "total_amount": str(order.total_amount),
+                    "items_count": order.items_count,
+                    "created_at": order.created_at.isoformat(),
+                    "items": [
+                        {
+                            "product_id": line.product_id,
+                            "name": line.product_name,
+                            "qty": line.qty,
+                            "unit_price": str(line.unit_price),
+                        }
+                        for line in lines[order.id]
+                    ],
+                }
+                for order in page.items
+            ],
+            "next_cursor": page.next_cursor,
+        }
+    )
@@ -1,29 +1,42 @@
 from __future__ import annotations
 
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 
-from flask import Blueprint, abort, flash, redirect, render_template, request, session, url_for
-
+from flask import (
+    Blueprint,
+    Response,
+    abort,
+    current_app,
+    flash,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    stream_with_context,
+    url_for,
+)
+
+from .. import catalog_io, facets, replica, rollups
+from ..cache import catalog_cache
+from ..engine import statement_timeout
 from ..extensions import db
+from ..identity import current_identity
+from ..metrics import query_budget
 from ..models import Category, Product
+from ..projections import card_query, to_card
+from ..utils import slugify
 
 bp = Blueprint("admin", __name__)
 
 
 def _require_admin() -> None:
-    if not session.get("is_admin"):
+    # Права берутся из снимка пользователя, а не из cookie: отзыв доходит за секунды.
+    user = current_identity()
+    if user is None or not user.is_admin:
         abort(403)
 
 
-def _slugify(value: str) -> str:
-    value = (value or "").strip().lower()
-    allowed = "abcdefghijklmnopqrstuvwxyz0123456789-"
-    value = value.replace("_", "-").replace(" ", "-")
-    value = "".join(ch for ch in value if ch in allowed)
-    value = "-".join([part for part in value.split("-") if part])
-    return value or "item"
-
-
 @bp.get("/")
 def admin_root():
     _require_admin()
@@ -31,12 +44,14 @@ def admin_root():
 
 
 @bp.route("/products", methods=["GET", "POST"])
+# Список — 3 запроса; добавление товара с пересчётом фасета категории и версии кэша — 8.
+@query_budget(8)
 def products():
     _require_admin()
 
     if request.method == "POST":
         name = (request.form.get("name") or "").strip()
-        slug = _slugify(request.form.get("slug") or name)
+        slug = slugify(request.form.get("slug") or name)
         description = (request.form.get("description") or "").strip()
 
         price_raw = (request.form.get("price") or "0").strip().replace(",", ".")
@@ -78,13 +93,15 @@ def products():
             is_active=True,
         )
         db.session.add(product_obj)
+        facets.apply_changes(added=[(category.id, price)])
+        catalog_cache.invalidate()
         db.session.commit()
 
         flash("Товар добавлен.", "success")
         return redirect(url_for("admin.products"))
 
     categories = Category.query.order_by(Category.name.asc()).all()
-    products_list = Product.query.order_by(Product.created_at.desc()).all()
+    products_list = [to_card(row) for row in card_query().order_by(Product.created_at.desc())]
     return render_template("admin/products.html", products=products_list, categories=categories)
 
 
@@ -94,6 +111,12 @@ def product_toggle(product_id: int):
 
     product_obj = Product.query.get_or_404(product_id)
     product_obj.is_active = not bool(product_obj.is_active)
+    change = [(product_obj.category_id, product_obj.price)]
+    if product_obj.is_active:
+        facets.apply_changes(added=change)
+    else:
+        facets.apply_changes(removed=change)
+    catalog_cache.invalidate()
     db.session.commit()
 
     flash("Статус товара изменён.", "info")
@@ -105,8 +128,105 @@ def product_delete(product_id: int):
     _require_admin()
 
     product_obj = Product.query.get_or_404(product_id)
+    removed = [(product_obj.category_id, product_obj.price)] if product_obj.is_active else []
     db.session.delete(product_obj)
+    facets.apply_changes(removed=removed)
+    catalog_cache.invalidate()
     db.session.commit()
 
     flash("Товар удалён.", "info")
     return redirect(url_for("admin.products"))
+
+
+@bp.route("/products/import", methods=["GET", "POST"])
+@statement_timeout(60_000)
+def products_import():
+    _require_admin()
+
+    report = None
+    if request.method == "POST":
+        upload = request.files.get("file")
+        if upload is None or not upload.filename:
+            flash("Выберите файл для загрузки.", "danger")
+            return redirect(url_for("admin.products_import"))
+
+        fmt = "jsonl" if upload.filename.lower().endswith((".jsonl", ".json")) else "csv"
+        try:
+            report = catalog_io.import_products(upload.stream, fmt)
+        except catalog_io.ImportFormatError as exc:
+            flash(str(exc), "danger")
+            return redirect(url_for("admin.products_import"))
+
+        flash(
+            f"Импорт завершён: добавлено {report.created}, обновлено {report.updated}, пропущено {report.skipped}.",
+            "success" if not report.skipped else "warning",
+        )
+
+    return render_template("admin/import.html", report=report, fields=catalog_io.FIELDS)
+
+
+@bp.get("/products/export.<fmt>")
+@statement_timeout(0)
+def products_export(fmt: str):
+    _require_admin()
+    if fmt not in catalog_io.FORMATS:
+        abort(404)
+
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return Response(
+        stream_with_context(catalog_io.export_products(fmt)),
+        mimetype=f"{mimetype}; charset=utf-8",
+        headers={"Content-Disposition": f"attachment; filename=products.{fmt}"},
+    )
+
+
+def _parse_date(value: str | None, default: date) -> date:
+    try:
+        return date.fromisoformat((value or "").strip())
+    except ValueError:
+        return default
+
+
+@bp.get("/orders")
+@statement_timeout(30_000)
+@query_budget(12)
+def orders():
+    _require_admin()
+
+    today = datetime.utcnow().date()
+    end = _parse_date(request.args.get("end"), today)
+    start = _parse_date(request.args.get("start"), end - timedelta(days=29))
+    if start > end:
+        start, end = end, start
+
+    # Страница читает только сводные таблицы; новые заказы добираются порцией.
+    if current_app.config["ROLLUP_REFRESH_ON_READ"] and rollups.refresh():
+        db.session.commit()
+
+    by_day = rollups.sales_by_day(start, end)
+    by_status = rollups.sales_by_status(start, end)
+    totals = {
+        "orders": sum(row.orders for row in by_day),
+        "units": sum(row.units for row in by_day),
+        "revenue": sum((row.revenue for row in by_day), Decimal("0.00")),
+    }
+
+    return render_template(
+        "admin/orders.html",
+        start=start,
+        end=end,
+        totals=totals,
+        by_day=by_day,
+        by_status=by_status,
+        top_products=rollups.top_products(start, end),
+        by_category=rollups.sales_by_category(start, end),
+    )
+
+
+@bp.get("/cache")
+def cache_stats():
+    _require_admin()
+    stats = catalog_cache.stats()
+    if current_app.config["DATABASE_REPLICA_URL"]:
+        stats["replica"] = replica.stats()
+    return jsonify(stats)
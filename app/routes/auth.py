@@ -2,17 +2,34 @@ from __future__ import annotations
 
 from flask import Blueprint, flash, redirect, render_template, request, session, url_for
 
+from .. import identity
+from ..carts import cart_store
 from ..extensions import db
+from ..identity import Identity, current_identity
 from ..models import User
+from ..passwords import LEGACY_GUEST_PASSWORD, HashingBusy, password_hasher
 
 bp = Blueprint("auth", __name__)
 
 
-def get_current_user() -> User | None:
-    user_id = session.get("user_id")
-    if not user_id:
-        return None
-    return User.query.get(int(user_id))
+def get_current_user() -> Identity | None:
+    return current_identity()
+
+
+def _login(user: User) -> None:
+    identity.login(user)
+    # Анонимная корзина сливается с корзиной аккаунта (например, собранной на другом устройстве).
+    cart_id = cart_store().merge(session.get("cart_id"), user.id)
+    db.session.commit()
+    if cart_id is None:
+        session.pop("cart_id", None)
+    else:
+        session["cart_id"] = cart_id
+
+
+def _busy(template: str):
+    flash("Сервер перегружен, попробуйте ещё раз через несколько секунд.", "warning")
+    return render_template(template), 503
 
 
 @bp.route("/register", methods=["GET", "POST"])
@@ -33,19 +50,26 @@ def register():
         flash("Пароли не совпадают.", "danger")
         return render_template("auth/register.html")
 
+    if password == LEGACY_GUEST_PASSWORD:
+        flash("Этот пароль использовать нельзя.", "danger")
+        return render_template("auth/register.html")
+
     exists = User.query.filter_by(email=email).first()
     if exists is not None:
         flash("Пользователь с таким email уже существует.", "warning")
         return render_template("auth/register.html")
 
-    user = User(email=email, full_name=full_name or None, is_admin=False)
-    user.set_password(password)
+    try:
+        password_hash = password_hasher.hash(password)
+    except HashingBusy:
+        return _busy("auth/register.html")
+
+    user = User(email=email, full_name=full_name or None, is_admin=False, password_hash=password_hash)
 
     db.session.add(user)
     db.session.commit()
 
-    session["user_id"] = user.id
-    session["is_admin"] = bool(user.is_admin)
+    _login(user)
 
     flash("Регистрация выполнена.", "success")
     return redirect(url_for("main.index"))
@@ -63,13 +87,26 @@ def login():
         flash("Введите email и пароль.", "danger")
         return render_template("auth/login.html")
 
+    if password == LEGACY_GUEST_PASSWORD:
+        # Гостевые аккаунты со старым общим паролем; хеши стирает flask users clear-guest-passwords.
+        flash("Неверный email или пароль.", "danger")
+        return render_template("auth/login.html")
+
     user = User.query.filter_by(email=email).first()
-    if user is None or not user.check_password(password):
+    try:
+        valid = user is not None and password_hasher.verify(user.password_hash, password)
+        if valid and password_hasher.needs_rehash(user.password_hash):
+            # Параметры хеширования поменялись — пересчитываем, пока известен пароль.
+            user.password_hash = password_hasher.hash(password)
+            db.session.commit()
+    except HashingBusy:
+        return _busy("auth/login.html")
+
+    if not valid:
         flash("Неверный email или пароль.", "danger")
         return render_template("auth/login.html")
 
-    session["user_id"] = user.id
-    session["is_admin"] = bool(user.is_admin)
+    _login(user)
 
     flash("Вход выполнен.", "success")
     return redirect(url_for("main.index"))
@@ -77,8 +114,7 @@ def login():
 
 @bp.post("/logout")
 def logout():
-    session.pop("user_id", None)
-    session.pop("is_admin", None)
+    identity.logout()
 
     flash("Вы вышли из системы.", "info")
     return redirect(url_for("main.index"))
@@ -1,8 +1,11 @@
 from flask import Blueprint, render_template
 
+from ..metrics import query_budget
+
 bp = Blueprint("main", __name__)
 
 
 @bp.get("/")
+@query_budget(2)
 def index():
     return render_template("index.html")
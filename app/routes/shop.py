@@ -1,22 +1,63 @@
 from __future__ import annotations
 
+import uuid
 from decimal import Decimal
 from typing import Any
 
-from flask import Blueprint, flash, redirect, render_template, request, session, url_for
-
+from flask import (
+    Blueprint,
+    abort,
+    current_app,
+    flash,
+    make_response,
+    redirect,
+    render_template,
+    request,
+    session,
+    url_for,
+)
+from sqlalchemy import insert, select
+
+from .. import facets, inventory, metrics, outbox
+from ..cache import catalog_cache
+from ..carts import cart_store, new_cart_id
 from ..extensions import db
+from ..http_cache import not_modified, page_validators, set_cache_headers
+from ..metrics import query_budget
 from ..models import Category, Order, OrderItem, Product, User
+from ..pagination import Page, keyset_page
+from ..projections import ProductCard, card_query, cart_products, product_detail, to_card
+from ..search import MODE_FULLTEXT, MODE_FUZZY, apply_search, supports_fuzzy
 
 bp = Blueprint("shop", __name__)
 
 
-def _get_cart() -> dict[str, int]:
-    cart = session.get("cart")
-    if not isinstance(cart, dict):
-        cart = {}
-        session["cart"] = cart
-    return cart
+def _cart_id(create: bool = False) -> str | None:
+    cart_id = session.get("cart_id")
+    if not isinstance(cart_id, str):
+        cart_id = None
+    user_id = session.get("user_id")
+    if cart_id is None and user_id is not None:
+        # Второе устройство или потерянная cookie: у пользователя одна корзина на все устройства.
+        cart_id = cart_store().cart_for_user(user_id)
+    # Корзина из cookie (до перехода на серверное хранение) переносится в хранилище один раз.
+    legacy = session.pop("cart", None)
+    if isinstance(legacy, dict) and legacy:
+        cart_id = cart_id or new_cart_id()
+        for pid, qty in legacy.items():
+            cart_store().add(cart_id, int(pid), int(qty), user_id=user_id)
+        db.session.commit()
+        create = True
+    if cart_id is None and create:
+        cart_id = new_cart_id()
+    if cart_id is not None and session.get("cart_id") != cart_id:
+        session["cart_id"] = cart_id
+    return cart_id
+
+
+def _get_cart() -> dict[int, int]:
+    cart_id = _cart_id()
+    return cart_store().items(cart_id) if cart_id else {}
 
 
 def _cart_items() -> list[dict[str, Any]]:
@@ -24,13 +65,10 @@ def _cart_items() -> list[dict[str, Any]]:
     if not cart:
         return []
 
-    product_ids = [int(pid) for pid in cart.keys()]
-    products = Product.query.filter(Product.id.in_(product_ids), Product.is_active.is_(True)).all()
-    products_by_id = {p.id: p for p in products}
+    products_by_id = cart_products(list(cart))
 
     items: list[dict[str, Any]] = []
-    for pid_str, qty in cart.items():
-        pid = int(pid_str)
+    for pid, qty in cart.items():
         product = products_by_id.get(pid)
         if product is None:
             continue
@@ -59,40 +97,106 @@ def catalog_root():
     return redirect(url_for("shop.catalog"))
 
 
-@bp.get("/catalog")
-def catalog():
-    q = (request.args.get("q") or "").strip()
-    category_slug = (request.args.get("category") or "").strip()
+def _search_page(query, q: str, match: str, cursor: str | None, per_page: int) -> Page[ProductCard]:
+    query, rank = apply_search(query, q, match)
+    rank = rank.label("rank")
+    page = keyset_page(
+        query.add_columns(rank),
+        columns=(rank, Product.id),
+        key=lambda row: (row.rank, row.id),
+        cursor=cursor,
+        per_page=per_page,
+    )
+    return Page(items=[to_card(row) for row in page.items], next_cursor=page.next_cursor)
 
-    categories = Category.query.order_by(Category.name.asc()).all()
 
-    query = Product.query.filter(Product.is_active.is_(True))
-    if q:
-        query = query.filter(Product.name.ilike(f"%{q}%"))
+def _load_catalog_page(
+    q: str, category_slug: str, match: str, cursor: str | None, per_page: int
+) -> tuple[Page[ProductCard], str]:
+    # Только колонки карточки; категория — тем же JOIN'ом, что и фильтр.
+    query = card_query().filter(Product.is_active.is_(True))
     if category_slug:
-        query = query.join(Category).filter(Category.slug == category_slug)
+        query = query.filter(Category.slug == category_slug)
+
+    if not q:
+        page = keyset_page(
+            query,
+            columns=(Product.created_at, Product.id),
+            key=lambda row: (row.created_at, row.id),
+            cursor=cursor,
+            per_page=per_page,
+        )
+        return Page(items=[to_card(row) for row in page.items], next_cursor=page.next_cursor), match
 
-    products = query.order_by(Product.created_at.desc()).all()
+    page = _search_page(query, q, match, cursor, per_page)
+    if not page.items and cursor is None and match == MODE_FULLTEXT and supports_fuzzy():
+        # Ничего не нашлось — пробуем найти похожие названия (опечатки).
+        match = MODE_FUZZY
+        page = _search_page(query, q, match, cursor, per_page)
+    return page, match
 
-    return render_template(
-        "catalog.html",
-        products=products,
-        categories=categories,
-        q=q,
-        category_slug=category_slug,
+
+@bp.get("/catalog")
+@query_budget(6)
+def catalog():
+    q = (request.args.get("q") or "").strip()
+    category_slug = (request.args.get("category") or "").strip()
+    cursor = (request.args.get("after") or "").strip() or None
+    match = MODE_FUZZY if request.args.get("match") == MODE_FUZZY else MODE_FULLTEXT
+    per_page = current_app.config["ITEMS_PER_PAGE"]
+
+    categories = catalog_cache.get_or_load(("facets",), facets.category_facets)
+    page, match = catalog_cache.get_or_load(
+        ("catalog", q, category_slug, match, cursor, per_page),
+        lambda: _load_catalog_page(q, category_slug, match, cursor, per_page),
+    )
+    if q:
+        # Счётчики по найденному, а не по всему каталогу.
+        base = categories
+        categories = catalog_cache.get_or_load(("facets", q, match), lambda: facets.search_facets(q, match, base))
+
+    counts = [(c.id, c.product_count, c.min_price, c.max_price) for c in categories]
+    validators = page_validators(page.items, categories, page.next_cursor, match, counts)
+    cached = not_modified(validators)
+    if cached is not None:
+        return cached
+
+    response = make_response(
+        render_template(
+            "catalog.html",
+            products=page.items,
+            next_cursor=page.next_cursor,
+            is_first_page=cursor is None,
+            fuzzy=bool(q) and match == MODE_FUZZY,
+            categories=categories,
+            q=q,
+            category_slug=category_slug,
+        )
     )
+    return set_cache_headers(response, validators)
 
 
 @bp.get("/product/<slug>")
+@query_budget(3)
 def product(slug: str):
-    product_obj = Product.query.filter_by(slug=slug, is_active=True).first_or_404()
-    return render_template("product.html", product=product_obj)
+    product_obj = catalog_cache.get_or_load(("product", slug), lambda: product_detail(slug))
+    if product_obj is None:
+        abort(404)
+
+    validators = page_validators([product_obj], (), product_obj.category_name, product_obj.category_slug, dated=True)
+    cached = not_modified(validators)
+    if cached is not None:
+        return cached
+
+    response = make_response(render_template("product.html", product=product_obj))
+    return set_cache_headers(response, validators)
 
 
 @bp.post("/cart/add/<int:product_id>")
+@query_budget(5)
 def cart_add(product_id: int):
-    product_obj = Product.query.filter_by(id=product_id, is_active=True).first()
-    if product_obj is None:
+    exists = db.session.scalar(select(Product.id).where(Product.id == product_id, Product.is_active.is_(True)))
+    if exists is None:
         flash("Товар не найден.", "danger")
         return redirect(url_for("shop.catalog"))
 
@@ -102,10 +206,8 @@ def cart_add(product_id: int):
     except ValueError:
         qty = 1
 
-    cart = _get_cart()
-    key = str(product_id)
-    cart[key] = int(cart.get(key, 0)) + qty
-    session["cart"] = cart
+    cart_store().add(_cart_id(create=True), product_id, qty, user_id=session.get("user_id"))
+    db.session.commit()
 
     flash("Товар добавлен в корзину.", "success")
     return redirect(url_for("shop.cart_view"))
@@ -113,45 +215,69 @@ def cart_add(product_id: int):
 
 @bp.post("/cart/remove/<int:product_id>")
 def cart_remove(product_id: int):
-    cart = _get_cart()
-    key = str(product_id)
-    if key in cart:
-        cart.pop(key)
-        session["cart"] = cart
+    cart_id = _cart_id()
+    if cart_id and cart_store().remove(cart_id, product_id):
+        db.session.commit()
         flash("Товар удалён из корзины.", "info")
     return redirect(url_for("shop.cart_view"))
 
 
 @bp.post("/cart/clear")
 def cart_clear():
-    session["cart"] = {}
+    cart_id = _cart_id()
+    if cart_id:
+        cart_store().clear(cart_id)
+    hold_id = session.pop("hold_id", None)
+    if hold_id:
+        inventory.release(hold_id)
+    db.session.commit()
     flash("Корзина очищена.", "info")
     return redirect(url_for("shop.cart_view"))
 
 
 @bp.get("/cart")
+@query_budget(4)
 def cart_view():
     items = _cart_items()
     total = _cart_total(items)
+    if items:
+        metrics.observe("cart_size_items", sum(int(item["qty"]) for item in items))
     return render_template("cart.html", items=items, total=total)
 
 
 def _get_or_create_user(email: str, full_name: str | None) -> User:
+    # Без commit: пользователь сохраняется в одной транзакции с заказом.
     user = User.query.filter_by(email=email).first()
     if user is not None:
         if full_name and not user.full_name:
             user.full_name = full_name
-            db.session.commit()
         return user
 
+    # Гостевой аккаунт без пароля: дорогое хеширование не нужно на пути оформления.
     user = User(email=email, full_name=full_name, is_admin=False)
-    user.set_password("temporary-password")
     db.session.add(user)
-    db.session.commit()
     return user
 
 
+def _hold_id() -> str:
+    hold_id = session.get("hold_id")
+    if not isinstance(hold_id, str):
+        hold_id = session["hold_id"] = uuid.uuid4().hex
+    return hold_id
+
+
+def _cart_quantities(items: list[dict[str, Any]]) -> dict[int, int]:
+    return {item["product"].id: int(item["qty"]) for item in items}
+
+
+def _flash_insufficient(items: list[dict[str, Any]], exc: inventory.InsufficientStock) -> None:
+    names = {item["product"].id: item["product"].name for item in items}
+    db.session.rollback()
+    flash(f"Недостаточно товара «{names.get(exc.product_id, exc.product_id)}» на складе.", "danger")
+
+
 @bp.route("/checkout", methods=["GET", "POST"])
+@query_budget(20)
 def checkout():
     items = _cart_items()
     if not items:
@@ -159,8 +285,16 @@ def checkout():
         return redirect(url_for("shop.catalog"))
 
     if request.method == "GET":
-        total = _cart_total(items)
-        return render_template("checkout.html", items=items, total=total)
+        # Товары держатся за покупателем, пока он заполняет форму.
+        try:
+            inventory.reserve(_cart_quantities(items), holder=_hold_id())
+        except inventory.InsufficientStock as exc:
+            _flash_insufficient(items, exc)
+            return redirect(url_for("shop.cart_view"))
+        # Рендер до commit(): после него товары корзины истекают, и шаблон догружал бы их по одному.
+        page = render_template("checkout.html", items=items, total=_cart_total(items))
+        db.session.commit()
+        return page
 
     customer_name = (request.form.get("customer_name") or "").strip()
     customer_phone = (request.form.get("customer_phone") or "").strip()
@@ -172,34 +306,48 @@ def checkout():
         total = _cart_total(items)
         return render_template("checkout.html", items=items, total=total)
 
-    user = _get_or_create_user(customer_email, customer_name)
+    # Всё ниже — одна транзакция: пользователь, списание остатков, заказ и его
+    # позиции. Цены взяты из того же запроса, которым _cart_items() прочитал корзину.
+    try:
+        inventory.sell(_cart_quantities(items), holder=session.get("hold_id"))
+    except inventory.InsufficientStock as exc:
+        _flash_insufficient(items, exc)
+        return redirect(url_for("shop.cart_view"))
 
     order = Order(
-        user_id=user.id,
+        user=_get_or_create_user(customer_email, customer_name),
         status="new",
         customer_name=customer_name,
         customer_phone=customer_phone,
         customer_email=customer_email,
         delivery_address=delivery_address or None,
+        total_amount=_cart_total(items),
+        items_count=sum(int(item["qty"]) for item in items),
     )
     db.session.add(order)
     db.session.flush()
 
-    for item in items:
-        product_obj: Product = item["product"]
-        qty: int = int(item["qty"])
-        unit_price = Decimal(product_obj.price)
-
-        order_item = OrderItem(
-            order_id=order.id,
-            product_id=product_obj.id,
-            qty=qty,
-            unit_price=unit_price,
-        )
-        db.session.add(order_item)
+    # Все позиции одним INSERT (executemany / multi-row VALUES).
+    db.session.execute(
+        insert(OrderItem),
+        [
+            {
+                "order_id": order.id,
+                "product_id": item["product"].id,
+                "qty": int(item["qty"]),
+                "unit_price": item["unit_price"],
+            }
+            for item in items
+        ],
+    )
+
+    # Всё, что делается после заказа, — в фоне (flask outbox work), но в этой же транзакции.
+    outbox.enqueue("order_placed", {"order_id": order.id}, delay=current_app.config["ROLLUP_SETTLE_SECONDS"])
 
+    cart_store().clear(_cart_id())
     db.session.commit()
-    session["cart"] = {}
+    session.pop("hold_id", None)
+    metrics.observe("checkout_lines", len(items))
 
     flash(f"Заказ №{order.id} оформлен.", "success")
     return redirect(url_for("main.index"))
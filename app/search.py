@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import re
+from typing import Any
+
+from flask import current_app
+from sqlalchemy import Numeric, case, cast, false, func, literal_column, or_
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from .extensions import db
+from .models import Product
+
+MODE_FULLTEXT = "fts"
+MODE_FUZZY = "fuzzy"
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Знаков релевантности в ключе страницы поиска.
+RANK_DIGITS = 6
+
+# Колонка поддерживается триггером из миграции 0003 и в модели не описана,
+# чтобы db.create_all() на SQLite продолжал работать.
+_search_vector = literal_column("products.search_vector", type_=TSVECTOR)
+
+
+def _stable_rank(rank: Any) -> Any:
+    """Релевантность для ключа страницы: numeric с фиксированным числом знаков.
+
+    ts_rank_cd и similarity возвращают real; после JSON-курсора такое число
+    не равно исходному, и строки с близкой релевантностью пропадали или
+    повторялись на соседних страницах. Округлённое numeric-значение одинаково
+    в SELECT и в сравнении (rank, id) < (:rank, :id).
+    """
+    return func.round(cast(rank, Numeric), RANK_DIGITS)
+
+
+def _is_postgres() -> bool:
+    return db.engine.dialect.name == "postgresql"
+
+
+def _prefix_tsquery(q: str) -> str | None:
+    words = _WORD_RE.findall(q.lower())
+    if not words:
+        return None
+    return " & ".join(f"{word}:*" for word in words)
+
+
+def apply_search(query, q: str, mode: str = MODE_FULLTEXT) -> tuple[Any, Any]:
+    """Фильтрует запрос товаров по строке поиска.
+
+    Возвращает отфильтрованный запрос и выражение релевантности (чем больше,
+    тем выше товар в выдаче). На PostgreSQL используется GIN-индекс по
+    tsvector, а в режиме MODE_FUZZY — триграммный индекс по названию.
+    """
+    if not _is_postgres():
+        return _apply_like_search(query, q)
+
+    if mode == MODE_FUZZY:
+        rank = _stable_rank(func.similarity(Product.name, q))
+        return query.filter(Product.name.op("%")(q)), rank
+
+    ts_config = current_app.config["SEARCH_TS_CONFIG"]
+    terms = _prefix_tsquery(q)
+    if terms is None:
+        return query.filter(false()), literal_column("0")
+
+    tsquery = func.to_tsquery(ts_config, terms)
+    rank = _stable_rank(func.ts_rank_cd(_search_vector, tsquery))
+    return query.filter(_search_vector.op("@@")(tsquery)), rank
+
+
+def _like_pattern(q: str) -> str:
+    # «%» и «_» в запросе — обычные символы, а не шаблоны LIKE.
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _apply_like_search(query, q: str) -> tuple[Any, Any]:
+    pattern = _like_pattern(q)
+    name_match = Product.name.ilike(pattern, escape="\\")
+    rank = case((name_match, 2), else_=1)
+    return query.filter(or_(name_match, Product.description.ilike(pattern, escape="\\"))), rank
+
+
+def supports_fuzzy() -> bool:
+    return _is_postgres()
@@ -1,10 +1,23 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import itertools
+import math
+import random
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
 from decimal import Decimal
+from typing import Any, Iterable, Iterator
 
+from sqlalchemy import func, select, text
 from werkzeug.security import generate_password_hash
 
-from app import create_app
+from app import create_app, facets
 from app.extensions import db
-from app.models import Category, Product, User
+from app.models import Category, Order, OrderItem, Product, User
 
 
 def get_or_create_category(name: str, slug: str) -> Category:
@@ -76,123 +89,473 @@ def get_or_create_product(
     return product
 
 
-def seed() -> None:
-    app = create_app()
-    with app.app_context():
-        admin_email = "admin@footballshop.local"
-        admin_password = "admin12345"
-        get_or_create_admin(admin_email, admin_password, full_name="Администратор магазина")
-
-        kits = get_or_create_category("Футбольная форма", "kits")
-        balls = get_or_create_category("Мячи", "balls")
-        boots = get_or_create_category("Бутсы", "boots")
-        accessories = get_or_create_category("Аксессуары", "accessories")
-        fan = get_or_create_category("Атрибутика болельщика", "fan")
-        goalkeepers = get_or_create_category("Вратарская экипировка", "goalkeepers")
-
-        get_or_create_product(
-            category=kits,
-            name="Домашняя форма «Сборная 2026»",
-            slug="home-kit-2026",
-            description="Комплект формы (футболка+шорты). Дышащая ткань, комфортная посадка, подходит для тренировок и игр.",
-            price=Decimal("4990.00"),
-            stock_qty=25,
-        )
-        get_or_create_product(
-            category=kits,
-            name="Гостевая форма «Classic Away»",
-            slug="away-kit-classic",
-            description="Лёгкая гостевая форма в классическом стиле. Быстро сохнет, не сковывает движения.",
-            price=Decimal("4590.00"),
-            stock_qty=18,
-        )
-        get_or_create_product(
-            category=balls,
-            name="Мяч матчевый «Pro Match» (размер 5)",
-            slug="ball-pro-match-5",
-            description="Матчевый мяч размера 5. Стабильная траектория, износостойкое покрытие, подходит для натурального и искусственного газона.",
-            price=Decimal("3290.00"),
-            stock_qty=40,
-        )
-        get_or_create_product(
-            category=balls,
-            name="Мяч тренировочный «Training Plus» (размер 5)",
-            slug="ball-training-plus-5",
-            description="Тренировочный мяч размера 5 для ежедневных занятий. Хороший контроль и мягкий отскок.",
-            price=Decimal("2190.00"),
-            stock_qty=55,
-        )
-        get_or_create_product(
-            category=boots,
-            name="Бутсы «Speed FG»",
-            slug="boots-speed-fg",
-            description="Бутсы для твёрдого грунта (FG). Лёгкий верх, отличное сцепление, контроль мяча на скорости.",
-            price=Decimal("6990.00"),
-            stock_qty=12,
-        )
-        get_or_create_product(
-            category=boots,
-            name="Бутсы «Control AG»",
-            slug="boots-control-ag",
-            description="Бутсы для искусственных полей (AG). Усиленная подошва, точный контроль, комфорт при длительной игре.",
-            price=Decimal("7490.00"),
-            stock_qty=10,
-        )
-        get_or_create_product(
-            category=goalkeepers,
-            name="Перчатки вратарские «Grip Pro»",
-            slug="gk-gloves-grip-pro",
-            description="Вратарские перчатки с усиленной ладонью. Надёжный хват и амортизация, удобная фиксация запястья.",
-            price=Decimal("2890.00"),
-            stock_qty=30,
-        )
-        get_or_create_product(
-            category=goalkeepers,
-            name="Шорты вратарские с защитой",
-            slug="gk-shorts-protect",
-            description="Шорты с мягкими вставками для защиты бёдер. Подходят для тренировок и матчей.",
-            price=Decimal("1990.00"),
-            stock_qty=22,
-        )
-        get_or_create_product(
-            category=accessories,
-            name="Набор манишек (5 шт.)",
-            slug="training-bibs-5",
-            description="Комплект манишек для тренировок (5 штук). Лёгкие, заметные, удобные для командных занятий.",
-            price=Decimal("1490.00"),
-            stock_qty=35,
-        )
-        get_or_create_product(
-            category=accessories,
-            name="Щитки «Shield Lite»",
-            slug="shin-guards-shield-lite",
-            description="Лёгкие щитки для защиты голени. Анатомическая форма и комфортная фиксация.",
-            price=Decimal("1290.00"),
-            stock_qty=45,
-        )
-        get_or_create_product(
-            category=fan,
-            name="Шарф болельщика «Football Shop»",
-            slug="fan-scarf-football-shop",
-            description="Тёплый шарф болельщика с фирменным стилем магазина. Отлично подходит для стадиона и повседневной носки.",
-            price=Decimal("990.00"),
-            stock_qty=60,
-        )
-        get_or_create_product(
-            category=fan,
-            name="Кепка болельщика «Supporter Cap»",
-            slug="fan-cap-supporter",
-            description="Кепка болельщика с вышитым логотипом. Регулируемый ремешок, универсальный размер.",
-            price=Decimal("1190.00"),
-            stock_qty=50,
+def seed_demo() -> None:
+    """Демо-каталог: админ, шесть категорий и дюжина товаров. Запуск повторяемый."""
+    admin_email = "admin@footballshop.local"
+    admin_password = "admin12345"
+    get_or_create_admin(admin_email, admin_password, full_name="Администратор магазина")
+
+    kits = get_or_create_category("Футбольная форма", "kits")
+    balls = get_or_create_category("Мячи", "balls")
+    boots = get_or_create_category("Бутсы", "boots")
+    accessories = get_or_create_category("Аксессуары", "accessories")
+    fan = get_or_create_category("Атрибутика болельщика", "fan")
+    goalkeepers = get_or_create_category("Вратарская экипировка", "goalkeepers")
+
+    get_or_create_product(
+        category=kits,
+        name="Домашняя форма «Сборная 2026»",
+        slug="home-kit-2026",
+        description="Комплект формы (футболка+шорты). Дышащая ткань, комфортная посадка, подходит для тренировок и игр.",
+        price=Decimal("4990.00"),
+        stock_qty=25,
+    )
+    get_or_create_product(
+        category=kits,
+        name="Гостевая форма «Classic Away»",
+        slug="away-kit-classic",
+        description="Лёгкая гостевая форма в классическом стиле. Быстро сохнет, не сковывает движения.",
+        price=Decimal("4590.00"),
+        stock_qty=18,
+    )
+    get_or_create_product(
+        category=balls,
+        name="Мяч матчевый «Pro Match» (размер 5)",
+        slug="ball-pro-match-5",
+        description="Матчевый мяч размера 5. Стабильная траектория, износостойкое покрытие, подходит для натурального и искусственного газона.",
+        price=Decimal("3290.00"),
+        stock_qty=40,
+    )
+    get_or_create_product(
+        category=balls,
+        name="Мяч тренировочный «Training Plus» (размер 5)",
+        slug="ball-training-plus-5",
+        description="Тренировочный мяч размера 5 для ежедневных занятий. Хороший контроль и мягкий отскок.",
+        price=Decimal("2190.00"),
+        stock_qty=55,
+    )
+    get_or_create_product(
+        category=boots,
+        name="Бутсы «Speed FG»",
+        slug="boots-speed-fg",
+        description="Бутсы для твёрдого грунта (FG). Лёгкий верх, отличное сцепление, контроль мяча на скорости.",
+        price=Decimal("6990.00"),
+        stock_qty=12,
+    )
+    get_or_create_product(
+        category=boots,
+        name="Бутсы «Control AG»",
+        slug="boots-control-ag",
+        description="Бутсы для искусственных полей (AG). Усиленная подошва, точный контроль, комфорт при длительной игре.",
+        price=Decimal("7490.00"),
+        stock_qty=10,
+    )
+    get_or_create_product(
+        category=goalkeepers,
+        name="Перчатки вратарские «Grip Pro»",
+        slug="gk-gloves-grip-pro",
+        description="Вратарские перчатки с усиленной ладонью. Надёжный хват и амортизация, удобная фиксация запястья.",
+        price=Decimal("2890.00"),
+        stock_qty=30,
+    )
+    get_or_create_product(
+        category=goalkeepers,
+        name="Шорты вратарские с защитой",
+        slug="gk-shorts-protect",
+        description="Шорты с мягкими вставками для защиты бёдер. Подходят для тренировок и матчей.",
+        price=Decimal("1990.00"),
+        stock_qty=22,
+    )
+    get_or_create_product(
+        category=accessories,
+        name="Набор манишек (5 шт.)",
+        slug="training-bibs-5",
+        description="Комплект манишек для тренировок (5 штук). Лёгкие, заметные, удобные для командных занятий.",
+        price=Decimal("1490.00"),
+        stock_qty=35,
+    )
+    get_or_create_product(
+        category=accessories,
+        name="Щитки «Shield Lite»",
+        slug="shin-guards-shield-lite",
+        description="Лёгкие щитки для защиты голени. Анатомическая форма и комфортная фиксация.",
+        price=Decimal("1290.00"),
+        stock_qty=45,
+    )
+    get_or_create_product(
+        category=fan,
+        name="Шарф болельщика «Football Shop»",
+        slug="fan-scarf-football-shop",
+        description="Тёплый шарф болельщика с фирменным стилем магазина. Отлично подходит для стадиона и повседневной носки.",
+        price=Decimal("990.00"),
+        stock_qty=60,
+    )
+    get_or_create_product(
+        category=fan,
+        name="Кепка болельщика «Supporter Cap»",
+        slug="fan-cap-supporter",
+        description="Кепка болельщика с вышитым логотипом. Регулируемый ремешок, универсальный размер.",
+        price=Decimal("1190.00"),
+        stock_qty=50,
+    )
+
+    facets.rebuild()
+    db.session.commit()
+
+    print("✅ Seed выполнен успешно.")
+    print("👤 Админ:", admin_email)
+    print("🔑 Пароль:", admin_password)
+
+
+
+# --- Генератор нагрузочных данных -------------------------------------------
+#
+# Объёмы уровня продакшена (1M товаров, 100k покупателей, миллионы заказов)
+# грузятся не через ORM, а пачками: COPY ... FROM STDIN на PostgreSQL и
+# executemany на SQLite. Идентификаторы назначаются заранее, поэтому позиции
+# заказов ссылаются на заказы без обратного чтения из базы. Одинаковые
+# --seed и --end-date на пустой базе дают одинаковые данные.
+
+
+@dataclass(frozen=True)
+class CategoryProfile:
+    slug: str
+    share: float  # доля товаров категории в каталоге
+    median_price: int  # медианная цена, ₽
+    nouns: tuple[str, ...]
+
+
+CATEGORY_PROFILES = (
+    CategoryProfile("kits", 0.22, 4500, ("Футболка", "Форма", "Шорты", "Гетры", "Костюм")),
+    CategoryProfile("balls", 0.12, 2400, ("Мяч", "Мяч матчевый", "Мяч тренировочный", "Мяч футзальный")),
+    CategoryProfile("boots", 0.20, 6900, ("Бутсы", "Сороконожки", "Футзалки", "Бутсы детские")),
+    CategoryProfile("accessories", 0.24, 1200, ("Щитки", "Манишка", "Сумка", "Бутылка", "Насос")),
+    CategoryProfile("fan", 0.14, 990, ("Шарф", "Кепка", "Флаг", "Кружка", "Брелок")),
+    CategoryProfile("goalkeepers", 0.08, 2900, ("Перчатки", "Шорты вратарские", "Свитер вратарский")),
+)
+ADJECTIVES = ("Pro", "Classic", "Speed", "Control", "Elite", "Club", "Junior", "Street", "Match", "Training")
+FIRST_NAMES = ("Иван", "Анна", "Пётр", "Мария", "Алексей", "Ольга", "Дмитрий", "Елена", "Сергей", "Наталья")
+LAST_NAMES = ("Иванов", "Смирнов", "Кузнецов", "Попов", "Соколов", "Лебедев", "Козлов", "Новиков", "Морозов")
+CITIES = ("Москва", "Санкт-Петербург", "Казань", "Екатеринбург", "Новосибирск", "Самара", "Краснодар")
+ORDER_STATUSES = (("new", 0.08), ("paid", 0.12), ("shipped", 0.10), ("delivered", 0.62), ("cancelled", 0.08))
+LINE_QTY = ((1, 0.80), (2, 0.14), (3, 0.04), (5, 0.02))
+
+PRODUCT_COLUMNS = (
+    "id", "name", "slug", "description", "price", "stock_qty", "stock_shards",
+    "is_active", "category_id", "created_at", "updated_at",
+)
+USER_COLUMNS = ("id", "email", "password_hash", "full_name", "is_admin", "auth_version", "created_at")
+ORDER_COLUMNS = (
+    "id", "status", "user_id", "customer_name", "customer_phone", "customer_email",
+    "delivery_address", "total_amount", "items_count", "created_at", "updated_at",
+)
+ORDER_ITEM_COLUMNS = ("order_id", "product_id", "qty", "unit_price", "created_at")
+
+
+def _ts(value: datetime) -> str:
+    return value.isoformat(sep=" ")
+
+
+def _money(cents: int) -> str:
+    return f"{cents // 100}.{cents % 100:02d}"
+
+
+class BulkWriter:
+    """Пишет строки таблицы пачками: COPY на PostgreSQL, executemany на SQLite."""
+
+    def __init__(
+        self, table: str, columns: Iterable[str], batch_size: int, parent: "BulkWriter | None" = None
+    ) -> None:
+        self.table = table
+        # Таблица, на которую ссылаются строки этой: её накопленные строки пишутся раньше.
+        self.parent = parent
+        self.columns = tuple(columns)
+        self.batch_size = batch_size
+        self.rows: list[tuple[Any, ...]] = []
+        self.written = 0
+        self.postgres = db.engine.dialect.name == "postgresql"
+
+    def add(self, row: tuple[Any, ...]) -> None:
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.rows:
+            return
+        if self.parent is not None:
+            self.parent.flush()
+        connection = db.session.connection()
+        columns = ", ".join(self.columns)
+        if self.postgres:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(self.rows)
+            buffer.seek(0)
+            with connection.connection.driver_connection.cursor() as cursor:
+                cursor.copy_expert(f"COPY {self.table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+        else:
+            placeholders = ", ".join("?" for _ in self.columns)
+            connection.exec_driver_sql(f"INSERT INTO {self.table} ({columns}) VALUES ({placeholders})", self.rows)
+        self.written += len(self.rows)
+        self.rows = []
+
+    def __enter__(self) -> "BulkWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.flush()
+            db.session.commit()
+
+
+def _next_id(model) -> int:
+    return (db.session.scalar(select(func.max(model.id))) or 0) + 1
+
+
+def _zipf_cum_weights(n: int, s: float, rng: random.Random) -> list[float]:
+    # Популярность по закону Ципфа, но ранги перемешаны: хиты не сгрудятся в начале id.
+    ranks = list(range(1, n + 1))
+    rng.shuffle(ranks)
+    return list(itertools.accumulate(1.0 / rank**s for rank in ranks))
+
+
+def _pick(rng: random.Random, table: tuple[tuple[Any, float], ...]) -> Any:
+    value = rng.random()
+    for item, share in table:
+        value -= share
+        if value < 0:
+            return item
+    return table[-1][0]
+
+
+def _ensure_categories() -> dict[str, int]:
+    names = {
+        "kits": "Футбольная форма",
+        "balls": "Мячи",
+        "boots": "Бутсы",
+        "accessories": "Аксессуары",
+        "fan": "Атрибутика болельщика",
+        "goalkeepers": "Вратарская экипировка",
+    }
+    categories = {slug: get_or_create_category(name, slug).id for slug, name in names.items()}
+    db.session.commit()
+    return categories
+
+
+def _generate_products(count: int, rng: random.Random, until: datetime, days: int, batch_size: int) -> int:
+    categories = _ensure_categories()
+    first_id = _next_id(Product)
+    profiles = list(CATEGORY_PROFILES)
+    shares = list(itertools.accumulate(profile.share for profile in profiles))
+    span = days * 86400
+
+    with BulkWriter("products", PRODUCT_COLUMNS, batch_size) as writer:
+        for product_id in range(first_id, first_id + count):
+            profile = rng.choices(profiles, cum_weights=shares)[0]
+            noun = rng.choice(profile.nouns)
+            name = f"{noun} «{rng.choice(ADJECTIVES)} {rng.randint(1, 99)}»"
+            # Цены логнормальные вокруг медианы категории и оканчиваются на «9.90».
+            rubles = max(100, round(profile.median_price * math.exp(rng.gauss(0, 0.45)), -1))
+            created_at = until - timedelta(seconds=rng.random() * span)
+            writer.add(
+                (
+                    product_id,
+                    name,
+                    f"{profile.slug}-{product_id}",
+                    f"{noun} для футбола, серия {rng.choice(ADJECTIVES)}." if rng.random() < 0.7 else None,
+                    _money(int(rubles) * 100 - 10),
+                    0 if rng.random() < 0.05 else int(rng.expovariate(1 / 40)),
+                    0,
+                    1 if rng.random() < 0.95 else 0,
+                    categories[profile.slug],
+                    _ts(created_at),
+                    _ts(created_at),
+                )
+            )
+    return writer.written
+
+
+def _generate_users(count: int, rng: random.Random, until: datetime, days: int, batch_size: int) -> int:
+    first_id = _next_id(User)
+    # Хешировать пароль на каждого пользователя — часы CPU; у всех один и тот же пароль «password».
+    password_hash = generate_password_hash("password")
+    span = days * 86400
+
+    with BulkWriter("users", USER_COLUMNS, batch_size) as writer:
+        for user_id in range(first_id, first_id + count):
+            registered = rng.random() < 0.7
+            writer.add(
+                (
+                    user_id,
+                    f"user{user_id}@load.test",
+                    password_hash if registered else None,
+                    f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    0,
+                    0,
+                    _ts(until - timedelta(seconds=rng.random() * span)),
+                )
+            )
+    return writer.written
+
+
+def _load_products() -> tuple[list[int], list[int]]:
+    ids: list[int] = []
+    cents: list[int] = []
+    query = select(Product.id, Product.price).where(Product.is_active.is_(True)).order_by(Product.id)
+    for product_id, price in db.session.execute(query.execution_options(yield_per=10_000)):
+        ids.append(product_id)
+        cents.append(int(Decimal(price) * 100))
+    return ids, cents
+
+
+def _order_times(count: int, rng: random.Random, until: datetime, days: int) -> Iterator[datetime]:
+    # Заказы идут по возрастанию времени (как и id в продакшене), с неравномерными интервалами.
+    start = until - timedelta(days=days)
+    step = days * 86400 / max(count, 1)
+    for index in range(count):
+        yield start + timedelta(seconds=(index + rng.random()) * step)
+
+
+def _generate_orders(count: int, rng: random.Random, until: datetime, days: int, batch_size: int) -> tuple[int, int]:
+    product_ids, product_cents = _load_products()
+    user_ids = list(db.session.scalars(select(User.id).where(User.is_admin.is_(False))))
+    if not product_ids or not user_ids:
+        raise SystemExit("Для заказов нужны активные товары и покупатели: добавьте --products и --users.")
+
+    popularity = _zipf_cum_weights(len(product_ids), 1.07, rng)
+    indexes = range(len(product_ids))
+    first_id = _next_id(Order)
+
+    # Позиции ссылаются на заказы: writer позиций сначала сбрасывает заказы, а
+    # закрывается первым (внутренний with), так что в базу они попадают после них.
+    with BulkWriter("orders", ORDER_COLUMNS, batch_size) as orders, BulkWriter(
+        "order_items", ORDER_ITEM_COLUMNS, batch_size, parent=orders
+    ) as items:
+        for order_id, created_at in zip(itertools.count(first_id), _order_times(count, rng, until, days)):
+            created = _ts(created_at)
+            # Число позиций — геометрическое распределение со средним около 2.5.
+            lines = min(1 + int(rng.expovariate(1 / 2.0)), 30)
+            total = units = 0
+            order_lines = []
+            for index in dict.fromkeys(rng.choices(indexes, cum_weights=popularity, k=lines)):
+                qty = _pick(rng, LINE_QTY)
+                order_lines.append((order_id, product_ids[index], qty, _money(product_cents[index]), created))
+                total += qty * product_cents[index]
+                units += qty
+            user_id = rng.choice(user_ids)
+            orders.add(
+                (
+                    order_id,
+                    _pick(rng, ORDER_STATUSES),
+                    user_id,
+                    f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    f"+79{rng.randrange(10**9):09d}",
+                    f"user{user_id}@load.test",
+                    f"{rng.choice(CITIES)}, ул. Спортивная, {rng.randint(1, 200)}",
+                    _money(total),
+                    units,
+                    created,
+                    created,
+                )
+            )
+            # Заказ добавлен раньше своих позиций: сброс позиций по порогу захватит и его.
+            for line in order_lines:
+                items.add(line)
+    return orders.written, items.written
+
+
+def _finish_postgres(tables: Iterable[str]) -> None:
+    # COPY с явными id не двигает последовательности, а планировщику нужна свежая статистика.
+    for table in tables:
+        db.session.execute(
+            text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))")
         )
+    db.session.commit()
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.exec_driver_sql("SET statement_timeout = 0")
+        for table in tables:
+            connection.exec_driver_sql(f"ANALYZE {table}")
+
+
+def generate(
+    *,
+    products: int = 0,
+    users: int = 0,
+    orders: int = 0,
+    seed: int = 1,
+    end_date: date | None = None,
+    days: int = 365,
+    batch_size: int = 50_000,
+) -> dict[str, int]:
+    """Добавляет в базу синтетические товары, покупателей и заказы.
+
+    Каждая таблица получает свой генератор случайных чисел от общего seed, поэтому
+    изменение числа заказов не меняет сгенерированный каталог.
+    """
+    until = datetime.combine(end_date or date.today(), datetime.min.time())
+    stats: dict[str, int] = {}
+    if db.engine.dialect.name == "postgresql":
+        # DB_STATEMENT_TIMEOUT_MS рассчитан на веб-запросы; процесс генератора короткоживущий.
+        db.session.execute(text("SET statement_timeout = 0"))
+
+    def stage(name: str, fn, *args) -> None:
+        began = time.perf_counter()
+        result = fn(*args, random.Random(f"{seed}:{name}"), until, days, batch_size)
+        elapsed = time.perf_counter() - began
+        counts = result if isinstance(result, tuple) else (result,)
+        for label, value in zip(name.split("+"), counts):
+            stats[label] = value
+            print(f"{label:>12}: {value:>10} строк за {elapsed:7.1f} с ({value / max(elapsed, 1e-9):,.0f}/с)")
 
+    if products:
+        stage("products", _generate_products, products)
+        facets.rebuild()
         db.session.commit()
+    if users:
+        stage("users", _generate_users, users)
+    if orders:
+        stage("orders+order_items", _generate_orders, orders)
 
-        print("✅ Seed выполнен успешно.")
-        print("👤 Админ:", admin_email)
-        print("🔑 Пароль:", admin_password)
+    if db.engine.dialect.name == "postgresql":
+        _finish_postgres(["products", "users", "orders", "order_items"])
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Демо-данные магазина и генератор нагрузочных данных.",
+        epilog="Пример: python -m app.seed --products 1000000 --users 100000 --orders 4000000 --seed 42",
+    )
+    parser.add_argument("--products", type=int, default=0, help="сколько товаров сгенерировать")
+    parser.add_argument("--users", type=int, default=0, help="сколько покупателей сгенерировать")
+    parser.add_argument("--orders", type=int, default=0, help="сколько заказов (в среднем 2.5 позиции) сгенерировать")
+    parser.add_argument("--seed", type=int, default=1, help="зерно генератора случайных чисел")
+    parser.add_argument("--end-date", type=date.fromisoformat, default=None, help="дата последнего заказа, YYYY-MM-DD")
+    parser.add_argument("--days", type=int, default=365, help="за сколько дней распределить заказы")
+    parser.add_argument("--batch-size", type=int, default=50_000, help="строк в одной пачке COPY/INSERT")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        seed_demo()
+        if args.products or args.users or args.orders:
+            generate(
+                products=args.products,
+                users=args.users,
+                orders=args.orders,
+                seed=args.seed,
+                end_date=args.end_date,
+                days=args.days,
+                batch_size=args.batch_size,
+            )
+            print("Сводные таблицы продаж пересчитываются командой: flask rollups rebuild")
+
+
+def seed() -> None:
+    app = create_app()
+    with app.app_context():
+        seed_demo()
 
 
 if __name__ == "__main__":
-    seed()
+    main()
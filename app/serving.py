@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import os
+import resource
+import sys
+
+from flask import Flask
+
+from .extensions import db
+
+
+def worker_count(cpus: int, threads: int) -> int:
+    """Число воркеров gunicorn по числу CPU.
+
+    Синхронный воркер простаивает, пока ждёт базу, поэтому их берут с запасом
+    (2 × CPU + 1). Потоковому воркеру запас дают потоки, и лишние процессы
+    только занимают память: хватает CPU + 1.
+    """
+    cpus = max(1, cpus)
+    return cpus + 1 if threads > 1 else 2 * cpus + 1
+
+
+def after_fork(app: Flask) -> None:
+    """Сбрасывает пулы соединений, унаследованные воркером от мастера (preload_app).
+
+    Сокеты делить между процессами нельзя. close=False оставляет их закрытие
+    мастеру, а воркер открывает свои соединения при первом запросе.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    replica = app.extensions.get("replica_engine")
+    if replica is not None:
+        replica.dispose(close=False)
+
+
+def memory_usage() -> dict[str, int]:
+    """Память текущего процесса в КБ: rss, а на Linux ещё pss и private (своя, не общая с мастером)."""
+    usage = {"rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+    if sys.platform == "darwin":
+        usage["rss"] //= 1024
+    try:
+        with open(f"/proc/{os.getpid()}/smaps_rollup") as fh:
+            lines = [line.split() for line in fh]
+    except OSError:
+        return usage
+    kb = {parts[0].rstrip(":"): int(parts[1]) for parts in lines if len(parts) == 3 and parts[2] == "kB"}
+    usage["rss"] = kb.get("Rss", usage["rss"])
+    if "Pss" in kb:
+        usage["pss"] = kb["Pss"]
+    usage["private"] = kb.get("Private_Clean", 0) + kb.get("Private_Dirty", 0)
+    return usage
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from .extensions import db
+
+
+# Транслитерация кириллицы для slug: названия товаров в магазине в основном русские.
+TRANSLIT = str.maketrans(
+    {
+        "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e", "ж": "zh", "з": "z",
+        "и": "i", "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r",
+        "с": "s", "т": "t", "у": "u", "ф": "f", "х": "h", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "sch",
+        "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+    }
+)
+SLUG_FALLBACK = "item"
+
+
+def slugify(value: str) -> str:
+    value = (value or "").strip().lower().translate(TRANSLIT)
+    allowed = "abcdefghijklmnopqrstuvwxyz0123456789-"
+    value = value.replace("_", "-").replace(" ", "-")
+    value = "".join(ch for ch in value if ch in allowed)
+    value = "-".join([part for part in value.split("-") if part])
+    return value or SLUG_FALLBACK
+
+
+def dialect_insert(table):
+    """INSERT с поддержкой ON CONFLICT для текущей СУБД (PostgreSQL или SQLite)."""
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:  # pragma: no cover
+        raise RuntimeError(f"UPSERT для {dialect} не поддерживается")
+    return insert(table)
@@ -0,0 +1,102 @@
+"""Задержка оформления заказа (p50/p99) для корзин из 1, 10 и 100 позиций.
+
+    python benchmarks/checkout_latency.py --database-url postgresql+psycopg2://... --runs 200
+
+По умолчанию используется SQLite в памяти. Скрипт создаёт таблицы через
+db.create_all(), поэтому используйте отдельную пустую базу.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import percentile  # noqa: E402
+
+
+def prepare(app, lines: int) -> list[int]:
+    from app.extensions import db
+    from app.models import Category, Product
+
+    with app.app_context():
+        category = Category.query.filter_by(slug="bench").first()
+        if category is None:
+            category = Category(name="Bench", slug="bench")
+            db.session.add(category)
+            db.session.flush()
+        existing = Product.query.filter(Product.slug.like("bench-%")).count()
+        for i in range(existing, lines):
+            db.session.add(
+                Product(
+                    name=f"Bench product {i}",
+                    slug=f"bench-{i}",
+                    price=Decimal("99.90"),
+                    stock_qty=10_000_000,
+                    category_id=category.id,
+                )
+            )
+        db.session.commit()
+        return [p.id for p in Product.query.filter(Product.slug.like("bench-%")).order_by(Product.id).limit(lines)]
+
+
+def measure(app, product_ids: list[int], runs: int) -> list[float]:
+    client = app.test_client()
+    form = {
+        "customer_name": "Bench",
+        "customer_phone": "+70000000000",
+        "customer_email": "bench@example.com",
+    }
+    from app.carts import cart_store, new_cart_id
+    from app.extensions import db
+
+    timings = []
+    for _ in range(runs):
+        cart_id = new_cart_id()
+        with app.app_context():
+            for pid in product_ids:
+                cart_store().add(cart_id, pid, 1)
+            db.session.commit()
+        with client.session_transaction() as sess:
+            sess["cart_id"] = cart_id
+        began = time.perf_counter()
+        response = client.post("/shop/checkout", data=form)
+        timings.append((time.perf_counter() - began) * 1000)
+        if response.status_code != 302:
+            raise RuntimeError(f"checkout failed with {response.status_code}")
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", "sqlite:///:memory:"))
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--lines", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+
+    # Прогрев: первый заказ создаёт покупателя и компилирует запросы.
+    measure(app, prepare(app, 1), 3)
+
+    print(f"{'lines':>5} {'runs':>5} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+    for lines in args.lines:
+        timings = measure(app, prepare(app, lines), args.runs)
+        print(
+            f"{lines:>5} {args.runs:>5} {percentile(timings, 50):>8.2f} "
+            f"{percentile(timings, 99):>8.2f} {statistics.mean(timings):>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""Общие функции для скриптов из benchmarks/."""
+from __future__ import annotations
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
@@ -0,0 +1,151 @@
+"""Пропускная способность бронирования одного «горячего» товара.
+
+N параллельных покупателей одновременно оформляют по одной единице одного
+SKU тем же путём, что и /shop/checkout: бронь при открытии формы
+(inventory.reserve, отдельная транзакция), затем продажа при отправке
+(inventory.sell: бронь возвращается, остаток списывается в транзакции
+заказа). Сравниваются обычный счётчик в products.stock_qty (все покупатели
+ждут блокировку одной строки) и шардированные счётчики.
+
+Конфликты блокировок и сериализации повторяются (не больше MAX_RETRIES
+подряд), любая другая ошибка останавливает прогон.
+
+    python benchmarks/inventory_checkout.py --database-url postgresql+psycopg2://... \\
+        --buyers 32 --stock 5000 --shards 0 16
+
+Скрипт создаёт таблицы через db.create_all(), поэтому используйте
+отдельную пустую базу.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MAX_RETRIES = 50
+
+
+def run(app, buyers: int, stock: int, shards: int) -> dict[str, float]:
+    from sqlalchemy.exc import OperationalError
+
+    from app import inventory
+    from app.extensions import db
+    from app.models import Category, Product, StockHold, StockShard
+
+    with app.app_context():
+        StockHold.query.delete()
+        StockShard.query.delete()
+        Product.query.filter_by(slug="bench-hot-sku").delete()
+        category = Category.query.filter_by(slug="bench").first()
+        if category is None:
+            category = Category(name="Bench", slug="bench")
+            db.session.add(category)
+            db.session.flush()
+        product = Product(
+            name="Hot SKU",
+            slug="bench-hot-sku",
+            price=Decimal("1.00"),
+            stock_qty=stock,
+            category_id=category.id,
+        )
+        db.session.add(product)
+        db.session.flush()
+        if shards:
+            inventory.set_sharding(product.id, shards)
+        db.session.commit()
+        product_id = product.id
+
+    sold = [0] * buyers
+    rejected = [0] * buyers
+    errors = [0] * buyers
+    failures: list[BaseException] = []
+    start = threading.Barrier(buyers + 1)
+
+    def buyer(index: int) -> None:
+        with app.app_context():
+            start.wait()
+            retries = 0
+            while True:
+                holder = uuid.uuid4().hex
+                try:
+                    inventory.reserve({product_id: 1}, holder=holder)
+                    db.session.commit()
+                    inventory.sell({product_id: 1}, holder=holder)
+                    db.session.commit()
+                    sold[index] += 1
+                    retries = 0
+                except inventory.InsufficientStock:
+                    db.session.rollback()
+                    rejected[index] += 1
+                    return
+                except OperationalError as exc:
+                    # Взаимоблокировка, ошибка сериализации, «database is locked» в SQLite.
+                    db.session.rollback()
+                    errors[index] += 1
+                    retries += 1
+                    if retries > MAX_RETRIES:
+                        failures.append(exc)
+                        return
+                except Exception as exc:
+                    db.session.rollback()
+                    failures.append(exc)
+                    return
+
+    threads = [threading.Thread(target=buyer, args=(i,)) for i in range(buyers)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+    if failures:
+        raise failures[0]
+
+    with app.app_context():
+        left = inventory.stock_levels([product_id])[product_id]
+
+    return {
+        "sold": sum(sold),
+        "errors": sum(errors),
+        "left": left,
+        "seconds": elapsed,
+        "checkouts_per_sec": sum(sold) / elapsed if elapsed else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", "sqlite:///bench_inventory.db"))
+    parser.add_argument("--buyers", type=int, default=16)
+    parser.add_argument("--stock", type=int, default=2000)
+    parser.add_argument("--shards", type=int, nargs="+", default=[0, 16])
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+
+    print(f"{'shards':>6} {'sold':>7} {'left':>6} {'errors':>6} {'seconds':>8} {'checkout/s':>11}")
+    for shards in args.shards:
+        result = run(app, args.buyers, args.stock, shards)
+        oversold = result["sold"] + result["left"] != args.stock
+        print(
+            f"{shards:>6} {result['sold']:>7} {result['left']:>6} {result['errors']:>6} "
+            f"{result['seconds']:>8.2f} {result['checkouts_per_sec']:>11.1f}"
+            + ("  OVERSOLD!" if oversold else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Страница каталога: ORM-объекты Product против строк app.projections.
+
+    python benchmarks/projections.py --products 5000 --page-sizes 24 200 1000
+    python benchmarks/projections.py --database-url postgresql+psycopg2://... --runs 50
+
+Для каждого размера страницы замеряются (медиана по --runs прогонам):
+загрузка из базы, рендер карточек и пик памяти Python при загрузке (tracemalloc).
+По умолчанию используется SQLite-файл; скрипт создаёт таблицы через
+db.create_all(), поэтому используйте отдельную пустую базу.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Одинаковая разметка для обоих вариантов: имя, категория, цена и начало описания.
+ORM_TEMPLATE = """{% for p in products %}<div>{{ p.name }} {{ p.category.name }} {{ "%.2f"|format(p.price) }}
+{{ (p.description or "")[:160] }} {{ url_for('shop.product', slug=p.slug) }}</div>{% endfor %}"""
+CARD_TEMPLATE = """{% for p in products %}<div>{{ p.name }} {{ p.category_name }} {{ "%.2f"|format(p.price) }}
+{{ p.summary or "" }} {{ url_for('shop.product', slug=p.slug) }}</div>{% endfor %}"""
+
+
+def prepare(app, products: int) -> None:
+    from app.extensions import db
+    from app.models import Category, Product
+
+    with app.app_context():
+        db.create_all()
+        existing = Product.query.filter(Product.slug.like("proj-%")).count()
+        if existing >= products:
+            return
+        categories = Category.query.filter(Category.slug.like("proj-%")).all()
+        if not categories:
+            categories = [Category(name=f"Категория {i}", slug=f"proj-{i}") for i in range(12)]
+            db.session.add_all(categories)
+            db.session.flush()
+        description = "Подробное описание товара для карточки и страницы. " * 20
+        for i in range(existing, products):
+            db.session.add(
+                Product(
+                    name=f"Товар {i}",
+                    slug=f"proj-{i}",
+                    description=description,
+                    price=Decimal("1999.90"),
+                    stock_qty=100,
+                    category_id=categories[i % len(categories)].id,
+                )
+            )
+        db.session.commit()
+
+
+def load_orm(per_page: int):
+    from sqlalchemy.orm import contains_eager
+
+    from app.models import Product
+
+    return (
+        Product.query.join(Product.category)
+        .options(contains_eager(Product.category))
+        .filter(Product.slug.like("proj-%"))
+        .order_by(Product.created_at.desc(), Product.id.desc())
+        .limit(per_page)
+        .all()
+    )
+
+
+def load_cards(per_page: int):
+    from app.models import Product
+    from app.projections import card_query, to_card
+
+    rows = (
+        card_query()
+        .filter(Product.slug.like("proj-%"))
+        .order_by(Product.created_at.desc(), Product.id.desc())
+        .limit(per_page)
+    )
+    return [to_card(row) for row in rows]
+
+
+def measure(app, loader, template: str, per_page: int, runs: int) -> dict[str, float]:
+    from flask import render_template_string
+
+    from app.extensions import db
+
+    load, render, peak = [], [], []
+    for _ in range(runs):
+        with app.test_request_context():
+            tracemalloc.start()
+            started = time.perf_counter()
+            products = loader(per_page)
+            load.append(time.perf_counter() - started)
+            peak.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+            started = time.perf_counter()
+            render_template_string(template, products=products)
+            render.append(time.perf_counter() - started)
+            # Как в конце запроса: следующий прогон начинает с пустой identity map.
+            db.session.remove()
+    return {
+        "load_ms": statistics.median(load) * 1000,
+        "render_ms": statistics.median(render) * 1000,
+        "peak_kb": statistics.median(peak) / 1024,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", "sqlite:///bench_projections.db"))
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[24, 200, 1000])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+    from app import create_app
+
+    app = create_app({"METRICS_ENABLED": False})
+    prepare(app, args.products)
+
+    print(f"{'строк':>6} {'вариант':<8} {'загрузка, мс':>13} {'рендер, мс':>11} {'пик памяти, КБ':>15}")
+    for per_page in args.page_sizes:
+        for name, loader, template in (("orm", load_orm, ORM_TEMPLATE), ("cards", load_cards, CARD_TEMPLATE)):
+            result = measure(app, loader, template, per_page, args.runs)
+            print(
+                f"{per_page:>6} {name:<8} {result['load_ms']:>13.2f} {result['render_ms']:>11.2f}"
+                f" {result['peak_kb']:>15.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
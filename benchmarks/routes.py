@@ -0,0 +1,401 @@
+"""Нагрузочный прогон маршрутов магазина с воспроизведением трафика.
+
+Трафик описывается в JSONL: одна строка — один сценарий (или один записанный запрос).
+
+    {"name": "catalog", "weight": 40, "steps": [{"method": "GET", "path": "/shop/catalog"}]}
+    {"method": "GET", "path": "/shop/product/home-kit-2026"}
+
+Сценарий выполняется одним «покупателем» по шагам с общими cookies; веса задают
+долю сценария в смеси. В path и data допускаются подстановки {product},
+{product_id}, {category}, {q} и {email} — их значения берутся из базы, поэтому
+одна смесь подходит и для демо-данных, и для данных из `python -m app.seed`.
+
+В процессе (через WSGI, с подсчётом SQL-запросов на запрос):
+
+    python benchmarks/routes.py --database-url sqlite:///bench_routes.db --requests 2000
+
+По HTTP против gunicorn (уже запущенного или поднятого скриптом):
+
+    python benchmarks/routes.py --url http://127.0.0.1:8000 --concurrency 16 --duration 30
+    python benchmarks/routes.py --spawn-gunicorn 4 --concurrency 16 --duration 30
+
+Сравнение с базовой линией: --save-baseline пишет результаты в JSON, --baseline
+сравнивает с ними и завершает скрипт с кодом 1, если какой-то маршрут стал
+медленнее (p95, req/s) больше чем на --tolerance или делает больше SQL-запросов
+в худшем случае.
+"""
+from __future__ import annotations
+
+import argparse
+import http.cookiejar
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from common import percentile  # noqa: E402
+
+SEARCH_WORDS = ("мяч", "форма", "бутсы", "шарф", "перчатки", "pro", "classic")
+
+
+@dataclass
+class Scenario:
+    name: str
+    weight: float
+    steps: list[dict[str, Any]]
+
+
+@dataclass
+class RouteStats:
+    timings: list[float] = field(default_factory=list)
+    queries: list[int] = field(default_factory=list)
+    errors: int = 0
+
+
+def load_traffic(path: str) -> list[Scenario]:
+    scenarios = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            steps = entry.get("steps") or [entry]
+            name = entry.get("name") or f"{steps[0].get('method', 'GET')} {steps[0]['path']}"
+            scenarios.append(Scenario(name, float(entry.get("weight", 1)), steps))
+    if not scenarios:
+        raise SystemExit(f"{path}: нет ни одного сценария")
+    return scenarios
+
+
+def load_fixtures(app) -> dict[str, list[Any]]:
+    from sqlalchemy import select
+
+    from app.extensions import db
+    from app.models import Category, Product
+
+    with app.app_context():
+        # Для подстановок хватит выборки: весь каталог в память не нужен.
+        products = db.session.execute(
+            select(Product.id, Product.slug).where(Product.is_active.is_(True), Product.stock_qty > 0).limit(5000)
+        ).all()
+        categories = list(db.session.scalars(select(Category.slug)))
+    if not products:
+        raise SystemExit("В базе нет товаров в наличии: заполните её через python -m app.seed")
+    return {"products": products, "categories": categories}
+
+
+def render(value: Any, rng: random.Random, fixtures: dict[str, list[Any]]) -> Any:
+    if isinstance(value, dict):
+        return {key: render(item, rng, fixtures) for key, item in value.items()}
+    if not isinstance(value, str) or "{" not in value:
+        return value
+    product_id, slug = rng.choice(fixtures["products"])
+    return value.format(
+        product=slug,
+        product_id=product_id,
+        category=rng.choice(fixtures["categories"]),
+        q=urllib.parse.quote(rng.choice(SEARCH_WORDS)),
+        email=f"bench-{uuid.uuid4().hex[:12]}@load.test",
+    )
+
+
+class QueryCounter:
+    """Считает SQL-запросы текущего потока (только в режиме in-process)."""
+
+    def __init__(self, engine) -> None:
+        from sqlalchemy import event
+
+        self._local = threading.local()
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args: Any) -> None:
+        self._local.count = getattr(self._local, "count", 0) + 1
+
+    def reset(self) -> None:
+        self._local.count = 0
+
+    @property
+    def count(self) -> int:
+        return getattr(self._local, "count", 0)
+
+
+def wsgi_client(app) -> Callable[[], Callable[[str, str, dict | None], int]]:
+    def make():
+        client = app.test_client()
+
+        def send(method: str, path: str, data: dict | None) -> int:
+            return client.open(path, method=method, data=data).status_code
+
+        return send
+
+    return make
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args: Any) -> None:
+        return None
+
+
+def http_client(base_url: str) -> Callable[[], Callable[[str, str, dict | None], int]]:
+    def make():
+        opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect()
+        )
+
+        def send(method: str, path: str, data: dict | None) -> int:
+            body = urllib.parse.urlencode(data).encode() if data is not None else None
+            req = urllib.request.Request(base_url.rstrip("/") + path, data=body, method=method)
+            try:
+                with opener.open(req, timeout=30) as response:
+                    response.read()
+                    return response.status
+            except urllib.error.HTTPError as exc:
+                exc.read()
+                return exc.code
+
+        return send
+
+    return make
+
+
+def run(
+    app,
+    make_client: Callable[[], Callable[[str, str, dict | None], int]],
+    scenarios: list[Scenario],
+    fixtures: dict[str, list[Any]],
+    *,
+    concurrency: int,
+    requests: int | None,
+    duration: float | None,
+    seed: int,
+    counter: QueryCounter | None,
+) -> tuple[dict[str, RouteStats], float]:
+    adapter = app.url_map.bind("localhost")
+    stats: dict[str, RouteStats] = defaultdict(RouteStats)
+    lock = threading.Lock()
+    issued = itertools.count()
+    weights = [scenario.weight for scenario in scenarios]
+    start = threading.Barrier(concurrency + 1)
+    deadline: list[float] = [0.0]
+
+    def route_of(method: str, path: str) -> str:
+        try:
+            endpoint, _ = adapter.match(urllib.parse.urlsplit(path).path, method=method)
+        except Exception:
+            return f"{method} {path}"
+        return f"{method} {endpoint}"
+
+    def worker(index: int) -> None:
+        rng = random.Random(f"{seed}:{index}")
+        send = make_client()
+        start.wait()
+        while True:
+            if duration is not None and time.perf_counter() >= deadline[0]:
+                return
+            scenario = rng.choices(scenarios, weights=weights)[0]
+            for step in scenario.steps:
+                if requests is not None and next(issued) >= requests:
+                    return
+                method = step.get("method", "GET").upper()
+                path = render(step["path"], rng, fixtures)
+                data = render(step.get("data"), rng, fixtures)
+                if counter is not None:
+                    counter.reset()
+                began = time.perf_counter()
+                try:
+                    status = send(method, path, data)
+                except Exception:
+                    status = 599
+                elapsed = (time.perf_counter() - began) * 1000
+                ok = status in step.get("expect", ()) or status < 400
+                with lock:
+                    route = stats[route_of(method, path)]
+                    route.timings.append(elapsed)
+                    if counter is not None:
+                        route.queries.append(counter.count)
+                    if not ok:
+                        route.errors += 1
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    began = time.perf_counter()
+    deadline[0] = began + (duration or 0)
+    start.wait()
+    for thread in threads:
+        thread.join()
+    return stats, time.perf_counter() - began
+
+
+def summarize(stats: dict[str, RouteStats], elapsed: float) -> dict[str, dict[str, float | None]]:
+    summary = {}
+    for route, data in sorted(stats.items()):
+        summary[route] = {
+            "requests": len(data.timings),
+            "errors": data.errors,
+            "rps": len(data.timings) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(data.timings, 50),
+            "p95_ms": percentile(data.timings, 95),
+            "p99_ms": percentile(data.timings, 99),
+            "queries": sum(data.queries) / len(data.queries) if data.queries else None,
+            "queries_max": max(data.queries) if data.queries else None,
+        }
+    return summary
+
+
+def compare(summary: dict[str, dict], baseline: dict[str, dict], tolerance: float) -> list[str]:
+    problems = []
+    for route, base in baseline.items():
+        current = summary.get(route)
+        if current is None:
+            # Маршрут пропал из прогона (сменился трафик, маршрут падает до
+            # учёта) — без сравнения регрессию на нём не заметить.
+            problems.append(f"{route}: нет в текущем прогоне")
+            continue
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            problems.append(f"{route}: p95 {base['p95_ms']:.2f} → {current['p95_ms']:.2f} ms")
+        if current["rps"] < base["rps"] * (1 - tolerance):
+            problems.append(f"{route}: req/s {base['rps']:.1f} → {current['rps']:.1f}")
+        # Среднее зависит от попаданий в кеш, а максимум (запрос мимо кеша) детерминирован.
+        if base.get("queries_max") is not None and current["queries_max"] is not None:
+            if current["queries_max"] > base["queries_max"]:
+                problems.append(f"{route}: SQL-запросов {base['queries_max']} → {current['queries_max']}")
+        if current["errors"] > base.get("errors", 0):
+            problems.append(f"{route}: ошибок {base.get('errors', 0)} → {current['errors']}")
+    return problems
+
+
+def print_table(summary: dict[str, dict], baseline: dict[str, dict]) -> None:
+    print(f"{'route':<28} {'reqs':>6} {'err':>4} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'sql/req':>8}")
+    for route, row in summary.items():
+        queries = f"{row['queries']:.1f}" if row["queries"] is not None else "-"
+        line = (
+            f"{route:<28} {row['requests']:>6} {row['errors']:>4} {row['rps']:>8.1f} "
+            f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {queries:>8}"
+        )
+        base = baseline.get(route)
+        if base:
+            line += f"   p95 {(row['p95_ms'] / base['p95_ms'] - 1) * 100:+.0f}%" if base["p95_ms"] else ""
+        print(line)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def spawn_gunicorn(workers: int, database_url: str) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+            "-w", str(workers), "-b", f"127.0.0.1:{port}", "wsgi:app",
+        ],
+        cwd=ROOT,
+        env={**os.environ, "DATABASE_URL": database_url},
+    )
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise SystemExit("gunicorn не запустился")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", "sqlite:///bench_routes.db"))
+    parser.add_argument("--traffic", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "traffic.jsonl"))
+    parser.add_argument("--url", help="адрес запущенного приложения; без него запросы идут в процессе")
+    parser.add_argument("--spawn-gunicorn", type=int, metavar="WORKERS", help="поднять gunicorn на свободном порту")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=None, help="сколько запросов выполнить (по умолчанию 1000)")
+    parser.add_argument("--duration", type=float, default=None, help="сколько секунд гонять нагрузку")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=50, help="запросов на прогрев, в статистику не входят")
+    parser.add_argument("--baseline", help="JSON с базовой линией для сравнения")
+    parser.add_argument("--save-baseline", help="записать результаты как базовую линию")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="допустимое ухудшение p95 и req/s")
+    args = parser.parse_args()
+    if args.requests is None and args.duration is None:
+        args.requests = 1000
+
+    os.environ["DATABASE_URL"] = args.database_url
+    from app import create_app
+    from app.extensions import db
+    from app.seed import seed_demo
+
+    app = create_app()
+    in_process = not args.url and not args.spawn_gunicorn
+    with app.app_context():
+        if in_process:
+            db.create_all()
+            seed_demo()
+    fixtures = load_fixtures(app)
+    scenarios = load_traffic(args.traffic)
+
+    gunicorn = None
+    if in_process:
+        make_client = wsgi_client(app)
+        with app.app_context():
+            counter = QueryCounter(db.engine)
+    else:
+        counter = None
+        url = args.url
+        if args.spawn_gunicorn:
+            gunicorn, url = spawn_gunicorn(args.spawn_gunicorn, args.database_url)
+        make_client = http_client(url)
+
+    options = dict(concurrency=args.concurrency, seed=args.seed, counter=counter)
+    try:
+        run(app, make_client, scenarios, fixtures, requests=args.warmup, duration=None, **options)
+        stats, elapsed = run(
+            app, make_client, scenarios, fixtures, requests=args.requests, duration=args.duration, **options
+        )
+    finally:
+        if gunicorn is not None:
+            gunicorn.terminate()
+            gunicorn.wait()
+
+    summary = summarize(stats, elapsed)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+    total = sum(row["requests"] for row in summary.values())
+    print(f"{total} запросов за {elapsed:.1f} с ({total / elapsed:.1f} req/s), потоков: {args.concurrency}")
+    print_table(summary, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as fh:
+            json.dump(summary, fh, ensure_ascii=False, indent=2)
+        print(f"Базовая линия записана в {args.save_baseline}")
+
+    problems = compare(summary, baseline, args.tolerance)
+    if problems:
+        print("\nРЕГРЕССИЯ относительно базовой линии:")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
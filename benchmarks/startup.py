@@ -0,0 +1,82 @@
+"""Холодный старт приложения и память процесса.
+
+    python benchmarks/startup.py --runs 5
+    python benchmarks/startup.py --database-url postgresql+psycopg2://... --json
+
+Каждый прогон — новый процесс Python: импорт пакета app, create_app() и первый
+запрос к главной странице. Это та работа, которую без preload_app повторяет
+каждый воркер gunicorn. Память — после первого запроса (см. app.serving.memory_usage).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+with application.app_context():
+    from app.extensions import db
+    db.create_all()
+application.test_client().get("/")
+served = time.perf_counter()
+from app.serving import memory_usage
+print(json.dumps({
+    "import": imported - started,
+    "create_app": created - imported,
+    "first_request": served - created,
+    "memory": memory_usage(),
+}))
+"""
+
+
+def probe(database_url: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=ROOT,
+        env={**os.environ, "DATABASE_URL": database_url},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", "sqlite:///:memory:"))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="вывести медианы одной строкой JSON")
+    args = parser.parse_args()
+
+    runs = [probe(args.database_url) for _ in range(args.runs)]
+    summary = {
+        stage: statistics.median(run[stage] for run in runs) for stage in ("import", "create_app", "first_request")
+    }
+    summary["memory_kb"] = {
+        name: int(statistics.median(run["memory"][name] for run in runs)) for name in runs[0]["memory"]
+    }
+
+    if args.json:
+        print(json.dumps(summary))
+        return
+    print(f"Прогонов: {args.runs} (медианы)")
+    for stage in ("import", "create_app", "first_request"):
+        print(f"  {stage:<14} {summary[stage] * 1000:8.1f} мс")
+    print(f"  {'итого':<14} {sum(summary[s] for s in ('import', 'create_app', 'first_request')) * 1000:8.1f} мс")
+    for name, value in summary["memory_kb"].items():
+        print(f"  {name:<14} {value / 1024:8.1f} МБ")
+
+
+if __name__ == "__main__":
+    main()
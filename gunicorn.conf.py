@@ -0,0 +1,83 @@
+"""Настройки gunicorn для продакшена: gunicorn -c gunicorn.conf.py wsgi:app
+
+Приложение загружается один раз в мастере (preload_app) и достаётся воркерам
+через fork с общими страницами памяти. Пулы соединений, созданные в мастере,
+сбрасываются в каждом воркере (post_fork), так что соединения с базой у
+каждого процесса свои.
+
+Переменные окружения:
+    GUNICORN_BIND      адрес (по умолчанию 0.0.0.0:8000)
+    GUNICORN_THREADS   потоков на воркер; больше 1 — воркер gthread (по умолчанию 4)
+    WEB_CONCURRENCY    число воркеров (по умолчанию по числу CPU, см. app.serving.worker_count)
+    GUNICORN_TIMEOUT   таймаут запроса в секундах (по умолчанию 30)
+    GUNICORN_PRELOAD   0 — загружать приложение в каждом воркере отдельно
+    METRICS_DIR        снимки метрик воркеров для /metrics (по умолчанию во временном каталоге)
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+# Отсчёт холодного старта: дальше импортируются Flask, SQLAlchemy и модели приложения.
+_started = time.monotonic()
+
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+# Каждому потоку нужно своё соединение; задаётся до импорта app, пока конфиг не прочитан.
+os.environ.setdefault("DB_POOL_SIZE", str(threads))
+if not os.getenv("METRICS_DIR"):
+    os.environ["METRICS_DIR"] = os.path.join(tempfile.gettempdir(), "football-shop-metrics")
+
+from app import metrics  # noqa: E402
+from app.serving import after_fork, memory_usage, worker_count  # noqa: E402
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+worker_class = "gthread" if threads > 1 else "sync"
+workers = int(os.getenv("WEB_CONCURRENCY") or worker_count(multiprocessing.cpu_count(), threads))
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = timeout
+# Соединения держит nginx, поэтому keep-alive между ним и gunicorn короткий.
+keepalive = 5
+
+
+def _format_memory(usage):
+    return ", ".join(f"{name}={value // 1024} МБ" for name, value in usage.items())
+
+
+def on_starting(server):
+    # Снимки прошлого запуска: их pid могли достаться новым воркерам.
+    shutil.rmtree(os.environ["METRICS_DIR"], ignore_errors=True)
+
+
+def when_ready(server):
+    # С preload_app сюда входят импорт и create_app(): это холодный старт мастера.
+    server.log.info(
+        "Готов за %.2f с (%s, воркеров: %d, потоков: %d); мастер: %s",
+        time.monotonic() - _started,
+        "preload" if server.cfg.preload_app else "без preload",
+        server.cfg.workers,
+        server.cfg.threads,
+        _format_memory(memory_usage()),
+    )
+
+
+def post_fork(server, worker):
+    worker.forked_at = time.monotonic()
+    if server.cfg.preload_app:
+        after_fork(server.app.wsgi())
+
+
+def post_worker_init(worker):
+    # private — память, которую воркер уже не делит с мастером.
+    worker.log.info(
+        "Воркер %s готов за %.3f с после fork; %s",
+        worker.pid,
+        time.monotonic() - worker.forked_at,
+        _format_memory(memory_usage()),
+    )
+
+
+def worker_exit(server, worker):
+    # Счётчики завершившегося воркера остаются в /metrics.
+    metrics.flush(worker.wsgi)
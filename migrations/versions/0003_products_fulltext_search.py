@@ -0,0 +1,58 @@
+"""products full-text search
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 01:07:03.540917
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# Должно совпадать с SEARCH_TS_CONFIG приложения.
+TS_CONFIG = 'russian'
+
+
+def upgrade():
+    # На SQLite поиск идёт через LIKE, индексы и триггеры нужны только PostgreSQL.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute('ALTER TABLE products ADD COLUMN search_vector tsvector')
+    op.execute(f"""
+        CREATE FUNCTION products_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector :=
+                setweight(to_tsvector('{TS_CONFIG}', coalesce(NEW.name, '')), 'A') ||
+                setweight(to_tsvector('{TS_CONFIG}', coalesce(NEW.description, '')), 'B');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER products_search_vector_trg
+        BEFORE INSERT OR UPDATE OF name, description ON products
+        FOR EACH ROW EXECUTE FUNCTION products_search_vector_update()
+    """)
+    # Заполняем существующие строки: триггер срабатывает на UPDATE OF name.
+    op.execute('UPDATE products SET name = name')
+
+    op.execute('CREATE INDEX ix_products_search_vector ON products USING gin (search_vector)')
+    op.execute('CREATE INDEX ix_products_name_trgm ON products USING gin (name gin_trgm_ops)')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('DROP INDEX IF EXISTS ix_products_name_trgm')
+    op.execute('DROP INDEX IF EXISTS ix_products_search_vector')
+    op.execute('DROP TRIGGER IF EXISTS products_search_vector_trg ON products')
+    op.execute('DROP FUNCTION IF EXISTS products_search_vector_update()')
+    op.execute('ALTER TABLE products DROP COLUMN IF EXISTS search_vector')
@@ -0,0 +1,40 @@
+"""query shape indexes
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18 01:46:34.128518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+
+# Условие частичных индексов — в том виде, в каком его пишет Product.is_active.is_(True).
+ACTIVE = {'postgresql_where': sa.text('is_active IS true'), 'sqlite_where': sa.text('is_active IS 1')}
+
+
+def upgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.create_index('ix_orders_created_at', ['created_at'], unique=False)
+        batch_op.create_index('ix_orders_user_created_at_id', ['user_id', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index('ix_products_active_category_created_at_id', ['category_id', 'created_at', 'id'], unique=False, **ACTIVE)
+        batch_op.create_index('ix_products_active_created_at_id', ['created_at', 'id'], unique=False, **ACTIVE)
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index('ix_products_active_created_at_id')
+        batch_op.drop_index('ix_products_active_category_created_at_id')
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index('ix_orders_user_created_at_id')
+        batch_op.drop_index('ix_orders_created_at')
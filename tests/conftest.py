@@ -1,8 +1,99 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+
 import pytest
+from flask import request, request_started, request_tearing_down
+from sqlalchemy import event
 
 from app import create_app
 from app.extensions import db
 
+# Один и тот же SELECT с разными параметрами столько раз за запрос — это N+1.
+# Записи по строке (списание остатков по товарам) ограничивает бюджет маршрута.
+N_PLUS_ONE_THRESHOLD = 3
+
+
+@dataclass
+class RequestQueries:
+    method: str
+    path: str
+    endpoint: str | None
+    statements: list[tuple[str, object]] = field(default_factory=list)
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> dict[str, int]:
+        # N+1 — один и тот же SELECT с разными параметрами (по строке на объект);
+        # одинаковые повторы — это другая проблема, и бюджет их всё равно ловит.
+        params: dict[str, set[str]] = defaultdict(set)
+        for sql, parameters in self.statements:
+            if sql.lstrip().upper().startswith("SELECT"):
+                params[sql].add(repr(parameters))
+        return {sql: len(seen) for sql, seen in params.items() if len(seen) >= threshold}
+
+
+class QueryLog:
+    """SQL каждого запроса к приложению.
+
+    После запроса проверяет бюджет маршрута (@query_budget) и повторяющиеся
+    запросы (N+1); нарушение роняет тест со списком запросов.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+        self.requests: list[RequestQueries] = []
+        self.check_n_plus_one = True
+        self._current: RequestQueries | None = None
+        self._engines = list(db.engines.values())
+        for engine in self._engines:
+            event.listen(engine, "before_cursor_execute", self._record)
+        request_started.connect(self._start, app)
+        request_tearing_down.connect(self._finish, app)
+
+    def close(self) -> None:
+        for engine in self._engines:
+            event.remove(engine, "before_cursor_execute", self._record)
+        request_started.disconnect(self._start, self.app)
+        request_tearing_down.disconnect(self._finish, self.app)
+
+    @property
+    def last(self) -> RequestQueries:
+        return self.requests[-1]
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if self._current is not None:
+            self._current.statements.append((statement, parameters))
+
+    def _start(self, sender, **extra) -> None:
+        # В тестах контекст приложения (и сессия) переживает запрос; без очистки
+        # ленивые загрузки попадали бы в identity map и не доходили до базы.
+        db.session.expunge_all()
+        self._current = RequestQueries(request.method, request.full_path.rstrip("?"), request.endpoint)
+        self.requests.append(self._current)
+
+    def _finish(self, sender, **extra) -> None:
+        current, self._current = self._current, None
+        if current is None:
+            return
+        problems = []
+        view = self.app.view_functions.get(current.endpoint or "")
+        budget = getattr(view, "query_budget", None)
+        if budget is not None and len(current.statements) > budget:
+            problems.append(f"{len(current.statements)} SQL-запросов при бюджете {budget}")
+        if self.check_n_plus_one:
+            for sql, count in current.repeated().items():
+                problems.append(f"N+1: {count} раз с разными параметрами: {' '.join(sql.split())}")
+        if problems:
+            listing = "\n".join(
+                f"  {i}. {' '.join(sql.split())}  {params!r}" for i, (sql, params) in enumerate(current.statements, 1)
+            )
+            pytest.fail(
+                f"{current.method} {current.path} ({current.endpoint}):\n"
+                + "\n".join(f"- {problem}" for problem in problems)
+                + f"\nЗапросы:\n{listing}",
+                pytrace=False,
+            )
+
 
 @pytest.fixture
 def app():
@@ -21,5 +112,24 @@ def app():
 
 
 @pytest.fixture
-def client(app):
+def query_log(app):
+    log = QueryLog(app)
+    yield log
+    log.close()
+
+
+@pytest.fixture
+def client(app, query_log):
     return app.test_client()
+
+
+@pytest.fixture
+def admin_client(client):
+    from app.models import User
+
+    admin = User(email="admin@example.com", is_admin=True)
+    db.session.add(admin)
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess["user_id"] = admin.id
+    return client
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from app.extensions import db
+from app.models import Category, Order, OrderItem, Product, User
+
+
+def _orders(user, count, slug="balls", base=datetime(2026, 1, 1)):
+    category = Category(name=slug, slug=slug)
+    products = [Product(name=f"Мяч {i}", slug=f"{slug}-{i}", price=Decimal("100.00"), category=category) for i in range(3)]
+    db.session.add_all(products)
+    for i in range(count):
+        order = Order(
+            user=user,
+            customer_name="Иван",
+            customer_phone="+7000",
+            total_amount=Decimal("300.00"),
+            items_count=3,
+            # У двух заказов одинаковое время: порядок между ними задаёт id.
+            created_at=base + timedelta(days=i // 2 * 2),
+        )
+        order.items = [OrderItem(product=product, qty=1, unit_price=Decimal("100.00")) for product in products]
+        db.session.add(order)
+    db.session.commit()
+
+
+def _login(client, email="buyer@example.com"):
+    user = User(email=email)
+    db.session.add(user)
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess["user_id"] = user.id
+    return user
+
+
+def test_json_history_pages_by_created_at_and_id(app, client):
+    app.config["ORDERS_PER_PAGE"] = 2
+    user = _login(client)
+    _orders(user, 5)
+    _orders(User(email="other@example.com"), 2, slug="boots")
+    expected = [o.id for o in Order.query.filter_by(user_id=user.id).order_by(Order.created_at.desc(), Order.id.desc())]
+
+    seen, cursor = [], None
+    while True:
+        data = client.get("/account/orders.json", query_string={"after": cursor} if cursor else {}).get_json()
+        seen.extend(order["id"] for order in data["orders"])
+        assert all(len(order["items"]) == 3 for order in data["orders"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == expected
+    assert data["orders"][-1]["total_amount"] == "300.00"
+
+
+def test_history_page_renders_lines_without_lazy_loads(client, query_log):
+    user = _login(client)
+    _orders(user, 3)
+
+    body = client.get("/account/orders").get_data(as_text=True)
+
+    assert body.count("Заказ №") == 3
+    assert "Мяч 2" in body
+    assert len(query_log.last.statements) <= 3
+
+
+def test_history_requires_login(client):
+    assert client.get("/account/orders.json").status_code == 401
+    response = client.get("/account/orders")
+    assert response.status_code == 302
+    assert "/auth/login" in response.headers["Location"]
@@ -0,0 +1,45 @@
+import gzip
+import shutil
+from pathlib import Path
+
+from flask import url_for
+
+from app import assets, create_app
+
+STATIC = Path(assets.__file__).parent / "static"
+
+
+def test_build_writes_hashed_and_compressed_copies(tmp_path):
+    shutil.copytree(STATIC, tmp_path / "static", ignore=shutil.ignore_patterns(assets.DIST_DIR))
+    css = (tmp_path / "static" / "css" / "styles.css").read_bytes()
+
+    manifest = assets.build(tmp_path / "static")
+
+    hashed = tmp_path / "static" / manifest["css/styles.css"]
+    assert manifest["css/styles.css"].startswith("dist/css/styles.")
+    assert hashed.read_bytes() == css
+    assert gzip.decompress(hashed.with_name(hashed.name + ".gz").read_bytes()) == css
+    assert assets.load_manifest(tmp_path / "static") == manifest
+    # Тот же вход — те же имена.
+    assert assets.build(tmp_path / "static") == manifest
+
+
+def test_static_urls_use_manifest(tmp_path):
+    shutil.copytree(STATIC, tmp_path / "static", ignore=shutil.ignore_patterns(assets.DIST_DIR))
+    manifest = assets.build(tmp_path / "static")
+    app = create_app()
+    app.static_folder = str(tmp_path / "static")
+    assets.init_app(app)
+
+    with app.test_request_context():
+        assert url_for("static", filename="css/styles.css") == "/static/" + manifest["css/styles.css"]
+        assert url_for("static", filename="img/missing.png") == "/static/img/missing.png"
+
+
+def test_static_urls_unchanged_without_build(client, app):
+    app.static_folder = "/nonexistent"
+    assets.init_app(app)
+
+    with app.test_request_context():
+        assert url_for("static", filename="css/styles.css") == "/static/css/styles.css"
+    assert "/static/" in client.get("/").get_data(as_text=True)
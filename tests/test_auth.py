@@ -0,0 +1,73 @@
+from werkzeug.security import generate_password_hash
+
+from app.extensions import db
+from app.models import User
+from app.passwords import LEGACY_GUEST_PASSWORD, HashingBusy, password_hasher
+
+
+def test_register_then_login(client):
+    form = {"email": "Fan@Example.com", "full_name": "Fan", "password": "secret", "password2": "secret"}
+    assert client.post("/auth/register", data=form).status_code == 302
+    client.post("/auth/logout")
+
+    response = client.post("/auth/login", data={"email": "fan@example.com", "password": "secret"})
+    assert response.status_code == 302
+
+
+def test_guest_account_has_no_password_and_cannot_log_in(client):
+    db.session.add(User(email="guest@example.com", is_admin=False))
+    db.session.commit()
+
+    response = client.post("/auth/login", data={"email": "guest@example.com", "password": ""})
+    assert response.status_code == 200
+    response = client.post("/auth/login", data={"email": "guest@example.com", "password": "anything"})
+    assert response.status_code == 200
+
+
+def test_legacy_guest_password_is_rejected(client):
+    # Гость, созданный до миграции 0006, пока clear-guest-passwords не стёрла его хеш.
+    db.session.add(User(email="old-guest@example.com", password_hash=generate_password_hash(LEGACY_GUEST_PASSWORD)))
+    db.session.commit()
+
+    response = client.post("/auth/login", data={"email": "old-guest@example.com", "password": LEGACY_GUEST_PASSWORD})
+    assert response.status_code == 200
+
+    form = {"email": "new@example.com", "full_name": "New", "password": LEGACY_GUEST_PASSWORD, "password2": LEGACY_GUEST_PASSWORD}
+    assert client.post("/auth/register", data=form).status_code == 200
+    assert User.query.filter_by(email="new@example.com").count() == 0
+
+
+def test_login_rehashes_outdated_hash(app, client):
+    app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+    db.session.add(User(email="old@example.com", password_hash=generate_password_hash("secret", "pbkdf2:sha256:500")))
+    db.session.commit()
+
+    response = client.post("/auth/login", data={"email": "old@example.com", "password": "secret"})
+    assert response.status_code == 302
+    assert User.query.filter_by(email="old@example.com").one().password_hash.startswith("pbkdf2:sha256:1000$")
+
+
+def test_login_returns_503_when_hashing_pool_is_saturated(client, monkeypatch):
+    def busy(*args, **kwargs):
+        raise HashingBusy()
+
+    monkeypatch.setattr(password_hasher, "_run", busy)
+    db.session.add(User(email="fan@example.com", password_hash=generate_password_hash("secret")))
+    db.session.commit()
+
+    response = client.post("/auth/login", data={"email": "fan@example.com", "password": "secret"})
+    assert response.status_code == 503
+
+
+def test_clear_guest_passwords_command(app):
+    guest = User(email="old-guest@example.com", password_hash=generate_password_hash(LEGACY_GUEST_PASSWORD))
+    member = User(email="member@example.com", password_hash=generate_password_hash("secret"))
+    db.session.add_all([guest, member])
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["users", "clear-guest-passwords", "--batch-size", "1"])
+
+    assert "Проверено хешей: 2, стёрто: 1" in result.output
+    db.session.expire_all()
+    assert guest.password_hash is None
+    assert member.password_hash is not None
@@ -0,0 +1,54 @@
+from decimal import Decimal
+
+from sqlalchemy import update
+
+from app.cache import LRUCache, catalog_cache
+from app.extensions import db
+from app.models import CacheVersion, Category, Product
+
+
+def _make_product():
+    category = Category(name="Мячи", slug="balls")
+    db.session.add(category)
+    db.session.flush()
+    product = Product(name="Ball", slug="ball", price=Decimal("10.00"), stock_qty=1, category_id=category.id)
+    db.session.add(product)
+    db.session.commit()
+    return product.id
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_product_page_is_served_from_cache_until_admin_toggle(app, admin_client):
+    product_id = _make_product()
+
+    assert admin_client.get("/shop/product/ball").status_code == 200
+    assert admin_client.get("/shop/product/ball").status_code == 200
+    assert catalog_cache.stats()["hits"] >= 1
+
+    admin_client.post(f"/admin/products/{product_id}/toggle")
+    assert admin_client.get("/shop/product/ball").status_code == 404
+
+
+def test_version_bump_from_another_worker_clears_cache(app, client):
+    app.config["CATALOG_CACHE_VERSION_CHECK"] = 0
+    product_id = _make_product()
+    assert client.get("/shop/product/ball").status_code == 200
+
+    # Другой воркер деактивировал товар и увеличил версию в общей таблице.
+    db.session.execute(update(Product).where(Product.id == product_id).values(is_active=False))
+    db.session.add(CacheVersion(name="catalog", version=5))
+    db.session.commit()
+
+    assert client.get("/shop/product/ball").status_code == 404
+    assert catalog_cache.stats()["invalidations"] == 1
@@ -0,0 +1,93 @@
+from decimal import Decimal
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app.carts import BACKENDS
+from app.extensions import db
+from app.models import CartItem, Category, Product, User
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def store(app, request):
+    app.extensions["cart_store"] = BACKENDS[request.param]()
+    return app.extensions["cart_store"]
+
+
+def _make_products(count):
+    category = Category(name="Мячи", slug="balls")
+    db.session.add(category)
+    db.session.flush()
+    products = [
+        Product(name=f"P{i}", slug=f"p{i}", price=Decimal("10.00"), stock_qty=5, category_id=category.id)
+        for i in range(count)
+    ]
+    db.session.add_all(products)
+    db.session.commit()
+    return [p.id for p in products]
+
+
+def test_cookie_keeps_only_cart_id(client, store):
+    first, second = _make_products(2)
+    client.post(f"/shop/cart/add/{first}", data={"qty": "2"})
+    client.post(f"/shop/cart/add/{first}")
+    client.post(f"/shop/cart/add/{second}")
+    client.post(f"/shop/cart/remove/{second}")
+
+    with client.session_transaction() as sess:
+        assert "cart" not in sess
+        cart_id = sess["cart_id"]
+    assert store.items(cart_id) == {first: 3}
+
+
+def test_login_merges_anonymous_cart_into_account_cart(app, store):
+    first, second = _make_products(2)
+    db.session.add(User(email="fan@example.com", password_hash=generate_password_hash("secret", "pbkdf2:sha256:1000")))
+    db.session.commit()
+    login = {"email": "fan@example.com", "password": "secret"}
+
+    laptop = app.test_client()
+    laptop.post("/auth/login", data=login)
+    laptop.post(f"/shop/cart/add/{first}")
+    laptop.post("/auth/logout")
+
+    phone = app.test_client()
+    phone.post(f"/shop/cart/add/{first}")
+    phone.post(f"/shop/cart/add/{second}")
+    phone.post("/auth/login", data=login)
+
+    with phone.session_transaction() as sess:
+        cart_id = sess["cart_id"]
+    assert store.items(cart_id) == {first: 2, second: 1}
+    if isinstance(store, BACKENDS["database"]):
+        assert {item.cart_id for item in CartItem.query} == {cart_id}
+
+
+def test_logged_in_devices_share_account_cart(app, store):
+    first, second = _make_products(2)
+    db.session.add(User(email="fan@example.com", password_hash=generate_password_hash("secret", "pbkdf2:sha256:1000")))
+    db.session.commit()
+    login = {"email": "fan@example.com", "password": "secret"}
+
+    laptop, phone = app.test_client(), app.test_client()
+    laptop.post("/auth/login", data=login)
+    phone.post("/auth/login", data=login)
+    assert laptop.post(f"/shop/cart/add/{first}").status_code == 302
+    assert phone.post(f"/shop/cart/add/{second}").status_code == 302
+
+    with laptop.session_transaction() as sess:
+        laptop_cart = sess["cart_id"]
+    with phone.session_transaction() as sess:
+        assert sess["cart_id"] == laptop_cart
+    assert store.items(laptop_cart) == {first: 1, second: 1}
+
+
+def test_cookie_cart_is_moved_to_store(client, store):
+    [product_id] = _make_products(1)
+    with client.session_transaction() as sess:
+        sess["cart"] = {str(product_id): 4}
+
+    assert client.get("/shop/cart").status_code == 200
+    with client.session_transaction() as sess:
+        assert "cart" not in sess
+        assert store.items(sess["cart_id"]) == {product_id: 4}
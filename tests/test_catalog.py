@@ -0,0 +1,110 @@
+import re
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from app.extensions import db
+from app.models import Category, Product
+from app.pagination import decode_cursor, encode_cursor
+
+
+def _make_products(count, category_slug="balls"):
+    category = Category(name=category_slug.title(), slug=category_slug)
+    db.session.add(category)
+    db.session.flush()
+
+    base = datetime(2026, 1, 1)
+    for i in range(count):
+        db.session.add(
+            Product(
+                name=f"Product {i}",
+                slug=f"{category_slug}-product-{i}",
+                price=Decimal("100.00"),
+                stock_qty=10,
+                category_id=category.id,
+                # одинаковое время у пар товаров проверяет разрыв ничьих по id
+                created_at=base + timedelta(minutes=i // 2),
+            )
+        )
+    db.session.commit()
+
+
+def _page_slugs(html):
+    return re.findall(r"/shop/product/([\w-]+)", html)
+
+
+def test_catalog_keyset_pagination_walks_all_products(app, client):
+    app.config["ITEMS_PER_PAGE"] = 2
+    _make_products(5)
+
+    seen = []
+    url = "/shop/catalog"
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        html = response.get_data(as_text=True)
+        seen.extend(_page_slugs(html))
+        match = re.search(r'href="(/shop/catalog\?[^"]*after=[^"]+)"', html)
+        url = match.group(1).replace("&amp;", "&") if match else None
+
+    assert seen == [f"balls-product-{i}" for i in range(4, -1, -1)]
+
+
+def test_catalog_pagination_keeps_category_filter(app, client):
+    app.config["ITEMS_PER_PAGE"] = 1
+    _make_products(2, "balls")
+    _make_products(2, "boots")
+
+    response = client.get("/shop/catalog?category=boots")
+    html = response.get_data(as_text=True)
+    assert _page_slugs(html) == ["boots-product-1"]
+    assert "category=boots" in re.search(r'href="([^"]*after=[^"]+)"', html).group(1)
+
+
+def test_catalog_ignores_broken_cursor(client):
+    response = client.get("/shop/catalog?after=not-a-cursor")
+    assert response.status_code == 200
+
+
+def test_crafted_cursor_values_fall_back_to_first_page(client):
+    _make_products(3)
+    first_page = _page_slugs(client.get("/shop/catalog").get_data(as_text=True))
+
+    for values in (["yesterday", 1], [{"dt": "01.01.2026"}, 1], [{"dt": "2026-01-01T00:00:00"}, "1"], [None, 2**70]):
+        response = client.get("/shop/catalog", query_string={"after": encode_cursor(values)})
+        assert _page_slugs(response.get_data(as_text=True)) == first_page
+    found = _page_slugs(client.get("/shop/catalog?q=product").get_data(as_text=True))
+    crafted = client.get("/shop/catalog", query_string={"q": "product", "after": encode_cursor(["high", 1])})
+    assert _page_slugs(crafted.get_data(as_text=True)) == found
+
+    types = [Decimal, int]
+    assert decode_cursor(encode_cursor([Decimal("0.5"), 7]), 2, types) == [Decimal("0.5"), 7]
+    assert decode_cursor(encode_cursor([{"dec": "NaN"}, 7]), 2, types) is None
+    assert decode_cursor(encode_cursor([Decimal("0.5"), True]), 2, types) is None
+
+
+def test_catalog_search_matches_description_and_ranks_name_first(client):
+    _make_products(3)
+    first = Product.query.filter_by(slug="balls-product-0").one()
+    first.name = "Match ball"
+    second = Product.query.filter_by(slug="balls-product-2").one()
+    second.description = "Official match ball"
+    db.session.commit()
+
+    html = client.get("/shop/catalog?q=match").get_data(as_text=True)
+    assert _page_slugs(html) == ["balls-product-0", "balls-product-2"]
+
+
+def test_catalog_search_treats_like_wildcards_literally(client):
+    _make_products(3)
+    product = Product.query.filter_by(slug="balls-product-1").one()
+    product.name = "Мяч 100% кожа"
+    db.session.commit()
+
+    assert _page_slugs(client.get("/shop/catalog?q=_").get_data(as_text=True)) == []
+    assert _page_slugs(client.get("/shop/catalog?q=100%25").get_data(as_text=True)) == ["balls-product-1"]
+
+
+def test_cursor_roundtrips_decimal_rank_exactly():
+    rank = Decimal("0.066667")
+    assert decode_cursor(encode_cursor([rank, 7]), 2) == [rank, 7]
+    assert decode_cursor(encode_cursor([{"dec": "x"}]), 1) is None
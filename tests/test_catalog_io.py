@@ -0,0 +1,129 @@
+import io
+import json
+from decimal import Decimal
+
+import pytest
+
+from app import catalog_io
+from app.extensions import db
+from app.models import CacheVersion, Category, Product
+
+
+def _csv(text: str) -> io.BytesIO:
+    return io.BytesIO(text.encode("utf-8"))
+
+
+def test_import_upserts_in_chunks_and_reports_errors(app):
+    category = Category(name="Мячи", slug="balls")
+    db.session.add(category)
+    db.session.flush()
+    db.session.add(Product(name="Old ball", slug="ball", price=Decimal("5.00"), category_id=category.id))
+    db.session.commit()
+
+    report = catalog_io.import_products(
+        _csv(
+            "name,slug,price,stock_qty,category,is_active\n"
+            "Ball,ball,10.50,3,balls,1\n"
+            "Boots,,20,1,balls,yes\n"
+            "Scarf,scarf,7,1,scarves,1\n"
+            ",empty,1,1,balls,1\n"
+            "Cap,cap,abc,1,balls,1\n"
+            "Boots v2,boots,25,2,balls,0\n"
+        ),
+        "csv",
+        chunk_size=2,
+    )
+
+    assert (report.created, report.updated, report.skipped) == (1, 2, 3)
+    assert sorted(line for line, _ in report.errors) == [4, 5, 6]
+    assert Product.query.filter_by(slug="ball").one().price == Decimal("10.50")
+    boots = Product.query.filter_by(slug="boots").one()
+    assert (boots.name, boots.is_active) == ("Boots v2", False)
+
+
+def test_export_roundtrips_through_import(app, admin_client):
+    category = Category(name="Мячи", slug="balls")
+    db.session.add(category)
+    db.session.flush()
+    db.session.add(Product(name="Мяч", slug="ball", price=Decimal("9.90"), stock_qty=4, category_id=category.id))
+    db.session.commit()
+
+    response = admin_client.get("/admin/products/export.jsonl")
+    assert response.status_code == 200
+    [row] = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert row == {
+        "name": "Мяч",
+        "slug": "ball",
+        "description": "",
+        "price": "9.90",
+        "stock_qty": 4,
+        "category": "balls",
+        "is_active": True,
+    }
+
+    exported = admin_client.get("/admin/products/export.csv").get_data()
+    response = admin_client.post(
+        "/admin/products/import",
+        data={"file": (io.BytesIO(exported), "products.csv")},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 200
+    assert "обновлено 1" in response.get_data(as_text=True)
+
+
+def test_import_reports_out_of_range_values_per_row(app):
+    db.session.add(Category(name="Мячи", slug="balls"))
+    db.session.commit()
+
+    report = catalog_io.import_products(
+        _csv(
+            "name,slug,price,stock_qty,category\n"
+            "Ball,ball,10,1,balls\n"
+            "NaN ball,nan,NaN,1,balls\n"
+            "Inf ball,inf,Infinity,1,balls\n"
+            "Huge ball,huge,100000000,1,balls\n"
+            "Many balls,many,1,99999999999,balls\n"
+            "Cap,cap,5,1,balls\n"
+        ),
+        "csv",
+        chunk_size=2,
+    )
+
+    assert (report.created, report.skipped) == (2, 4)
+    assert sorted(line for line, _ in report.errors) == [3, 4, 5, 6]
+    assert {p.slug for p in Product.query} == {"ball", "cap"}
+
+
+def test_failed_import_still_invalidates_committed_chunks(app):
+    db.session.add(Category(name="Мячи", slug="balls"))
+    db.session.commit()
+    # Файл декодируется буферами по несколько КБ: битые байты — после первых порций.
+    rows = "".join(f"Ball {i},ball-{i},10,1,balls\n" for i in range(500))
+    stream = io.BytesIO(f"name,slug,price,stock_qty,category\n{rows}".encode() + b"\xff\xfe,x,1,1,balls\n")
+
+    with pytest.raises(catalog_io.ImportFormatError):
+        catalog_io.import_products(stream, "csv", chunk_size=100)
+
+    assert Product.query.count() > 0
+    assert CacheVersion.query.one().version == 1
+
+
+def test_import_derives_cyrillic_slugs_and_rejects_duplicates(app):
+    db.session.add(Category(name="Мячи", slug="balls"))
+    db.session.commit()
+
+    report = catalog_io.import_products(
+        _csv(
+            "name,price,stock_qty,category\n"
+            "Мяч Адидас,10,1,balls\n"
+            "Бутсы Найк,20,1,balls\n"
+            "Мяч адидас,30,1,balls\n"
+            "???,40,1,balls\n"
+        ),
+        "csv",
+    )
+
+    assert (report.created, report.skipped) == (2, 2)
+    assert sorted(line for line, _ in report.errors) == [4, 5]
+    prices = {p.slug: p.price for p in Product.query}
+    assert prices == {"myach-adidas": Decimal("10.00"), "butsy-nayk": Decimal("20.00")}
@@ -0,0 +1,47 @@
+from decimal import Decimal
+
+from app.extensions import db
+from app.models import Category, Order, OrderItem, Product, User
+
+FORM = {"customer_name": "Иван", "customer_phone": "+7000", "customer_email": "Ivan@Example.com"}
+
+
+def _make_products(count):
+    category = Category(name="Мячи", slug="balls")
+    db.session.add(category)
+    db.session.flush()
+    products = [
+        Product(name=f"P{i}", slug=f"p{i}", price=Decimal("10.50"), stock_qty=5, category_id=category.id)
+        for i in range(count)
+    ]
+    db.session.add_all(products)
+    db.session.commit()
+    return [p.id for p in products]
+
+
+def test_checkout_creates_user_order_and_items_together(client):
+    product_ids = _make_products(3)
+    with client.session_transaction() as sess:
+        sess["cart"] = {str(pid): 2 for pid in product_ids}
+
+    response = client.post("/shop/checkout", data=FORM)
+    assert response.status_code == 302
+
+    order = Order.query.one()
+    assert order.user.email == "ivan@example.com"
+    assert order.user.password_hash is None
+    assert sorted(item.product_id for item in order.items) == sorted(product_ids)
+    assert order.total_amount == Decimal("63.00")
+
+
+def test_failed_checkout_leaves_no_partial_rows(client):
+    product_ids = _make_products(2)
+    with client.session_transaction() as sess:
+        sess["cart"] = {str(product_ids[0]): 1, str(product_ids[1]): 99}
+
+    client.post("/shop/checkout", data=FORM)
+
+    assert User.query.count() == 0
+    assert Order.query.count() == 0
+    assert OrderItem.query.count() == 0
+    assert db.session.get(Product, product_ids[0]).stock_qty == 5
@@ -0,0 +1,52 @@
+from sqlalchemy.pool import NullPool
+
+from app.engine import engine_options, statement_timeout
+from app.routes.admin import products_export
+
+
+def _config(**overrides):
+    config = {
+        "SQLALCHEMY_DATABASE_URI": "postgresql+psycopg2://shop@db/shop",
+        "APP_NAME": "Football Shop",
+        "DB_POOL_SIZE": 5,
+        "DB_MAX_OVERFLOW": 5,
+        "DB_POOL_TIMEOUT": 10,
+        "DB_POOL_RECYCLE": 1800,
+        "DB_POOL_PRE_PING": True,
+        "DB_CONNECT_TIMEOUT": 5,
+        "DB_STATEMENT_TIMEOUT_MS": 5000,
+        "DB_PGBOUNCER": False,
+    }
+    config.update(overrides)
+    return config
+
+
+def test_postgres_pool_with_default_statement_timeout():
+    options = engine_options(_config())
+
+    assert (options["pool_size"], options["max_overflow"], options["pool_pre_ping"]) == (5, 5, True)
+    assert options["connect_args"]["options"] == "-c statement_timeout=5000"
+
+
+def test_pgbouncer_mode_keeps_no_session_state():
+    options = engine_options(
+        _config(DB_PGBOUNCER=True, SQLALCHEMY_DATABASE_URI="postgresql+psycopg://shop@pgbouncer/shop")
+    )
+
+    assert options["poolclass"] is NullPool
+    # Параметры запуска сессии PgBouncer не пропускает, таймаут ставится через SET LOCAL.
+    assert "options" not in options["connect_args"]
+    assert options["connect_args"]["prepare_threshold"] is None
+
+
+def test_sqlite_uses_library_defaults():
+    assert engine_options(_config(SQLALCHEMY_DATABASE_URI="sqlite:///:memory:")) == {}
+
+
+def test_statement_timeout_marks_view():
+    @statement_timeout(1500)
+    def view():
+        pass
+
+    assert view.statement_timeout_ms == 1500
+    assert products_export.statement_timeout_ms == 0
@@ -0,0 +1,103 @@
+import io
+from decimal import Decimal
+
+from app import catalog_io, facets
+from app.extensions import db
+from app.models import Category, CategoryFacet, Product
+
+
+def _categories():
+    balls = Category(name="Мячи", slug="balls")
+    boots = Category(name="Бутсы", slug="boots")
+    db.session.add_all([balls, boots])
+    db.session.commit()
+    return balls.id, boots.id
+
+
+def _facet(category_id):
+    db.session.expire_all()
+    facet = db.session.get(CategoryFacet, category_id)
+    return (facet.product_count, facet.min_price, facet.max_price)
+
+
+def test_admin_changes_keep_facets_current(admin_client):
+    balls_id, _ = _categories()
+    for name, price in (("Ball", "1500"), ("Ball Pro", "4500")):
+        admin_client.post(
+            "/admin/products", data={"name": name, "price": price, "stock_qty": "5", "category_id": str(balls_id)}
+        )
+    assert _facet(balls_id) == (2, Decimal("1500.00"), Decimal("4500.00"))
+
+    pro = Product.query.filter_by(slug="ball-pro").one()
+    admin_client.post(f"/admin/products/{pro.id}/toggle")
+    assert _facet(balls_id) == (1, Decimal("1500.00"), Decimal("1500.00"))
+
+    ball = Product.query.filter_by(slug="ball").one()
+    admin_client.post(f"/admin/products/{ball.id}/delete")
+    assert _facet(balls_id) == (0, None, None)
+
+
+def test_toggle_inside_price_range_skips_recount(admin_client, query_log):
+    balls_id, _ = _categories()
+    for name, price in (("Ball", "1500"), ("Ball Pro", "3000"), ("Ball Max", "4500")):
+        admin_client.post(
+            "/admin/products", data={"name": name, "price": price, "stock_qty": "5", "category_id": str(balls_id)}
+        )
+
+    pro = Product.query.filter_by(slug="ball-pro").one()
+    admin_client.post(f"/admin/products/{pro.id}/toggle")
+    assert not any("GROUP BY" in sql for sql, _ in query_log.last.statements)
+    assert _facet(balls_id) == (2, Decimal("1500.00"), Decimal("4500.00"))
+
+    admin_client.post(f"/admin/products/{pro.id}/toggle")
+    assert _facet(balls_id) == (3, Decimal("1500.00"), Decimal("4500.00"))
+
+
+def test_import_refreshes_old_and_new_category(app):
+    balls_id, boots_id = _categories()
+    db.session.add(Product(name="Мяч", slug="ball", price=Decimal("10.00"), category_id=balls_id))
+    db.session.commit()
+    facets.rebuild()
+    db.session.commit()
+
+    catalog_io.import_products(
+        io.BytesIO("name,slug,price,stock_qty,category,is_active\nМяч,ball,12,1,boots,1\n".encode()), "csv"
+    )
+
+    assert _facet(balls_id) == (0, None, None)
+    assert _facet(boots_id) == (1, Decimal("12.00"), Decimal("12.00"))
+
+
+def test_import_refreshes_facets_once(app, monkeypatch):
+    balls_id, _ = _categories()
+    calls = []
+    refresh = facets.refresh
+    monkeypatch.setattr(facets, "refresh", lambda ids: calls.append(set(ids)) or refresh(ids))
+    lines = "".join(f"Мяч {i},ball-{i},{10 + i},1,balls,1\n" for i in range(5))
+
+    stream = io.BytesIO(f"name,slug,price,stock_qty,category,is_active\n{lines}".encode())
+    catalog_io.import_products(stream, "csv", chunk_size=2)
+
+    assert calls == [{balls_id}]
+    assert _facet(balls_id) == (5, Decimal("10.00"), Decimal("14.00"))
+
+
+def test_catalog_shows_facets_and_search_counts(client):
+    balls_id, boots_id = _categories()
+    db.session.add_all(
+        [
+            Product(name="Мяч", slug="ball", price=Decimal("1500.00"), category_id=balls_id),
+            Product(name="Мяч Pro", slug="ball-pro", price=Decimal("4500.00"), category_id=balls_id),
+            Product(name="Бутсы", slug="boots", price=Decimal("7000.00"), category_id=boots_id),
+        ]
+    )
+    facets.rebuild()
+    db.session.commit()
+
+    body = client.get("/shop/catalog").get_data(as_text=True)
+    assert "1500–4500 ₽" in body
+    assert [f.product_count for f in facets.category_facets()] == [1, 2]
+
+    body = client.get("/shop/catalog?q=Pro").get_data(as_text=True)
+    assert "4500.00 ₽" in body
+    assert "?category=boots" not in body
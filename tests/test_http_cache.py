@@ -0,0 +1,57 @@
+from decimal import Decimal
+
+from app.extensions import db
+from app.models import Category, Product
+
+
+def _make_product():
+    category = Category(name="Мячи", slug="balls")
+    db.session.add(category)
+    db.session.flush()
+    db.session.add(Product(name="Ball", slug="ball", price=Decimal("10.00"), stock_qty=1, category_id=category.id))
+    db.session.commit()
+
+
+def test_catalog_answers_304_for_matching_etag(client):
+    _make_product()
+    first = client.get("/shop/catalog")
+    assert first.status_code == 200
+    assert first.headers["ETag"]
+    assert "public" in first.headers["Cache-Control"]
+
+    second = client.get("/shop/catalog", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 304
+    assert second.get_data() == b""
+
+
+def test_product_answers_304_for_if_modified_since(client):
+    _make_product()
+    first = client.get("/shop/product/ball")
+    second = client.get("/shop/product/ball", headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert second.status_code == 304
+
+
+def test_catalog_ignores_if_modified_since_after_product_is_hidden(client):
+    _make_product()
+    category = Category.query.one()
+    db.session.add(Product(name="Boot", slug="boot", price=Decimal("20.00"), stock_qty=1, category_id=category.id))
+    db.session.commit()
+    first = client.get("/shop/catalog")
+    assert "Last-Modified" not in first.headers
+
+    Product.query.filter_by(slug="ball").update({"is_active": False})
+    db.session.commit()
+    second = client.get("/shop/catalog", headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+    assert second.status_code == 200
+    assert "Boot" in second.get_data(as_text=True)
+
+
+def test_pending_flash_disables_shared_caching(client):
+    _make_product()
+    etag = client.get("/shop/catalog").headers["ETag"]
+    with client.session_transaction() as sess:
+        sess["_flashes"] = [("info", "hello")]
+
+    response = client.get("/shop/catalog", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "no-store" in response.headers["Cache-Control"]
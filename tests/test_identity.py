@@ -0,0 +1,46 @@
+from sqlalchemy import event, update
+
+from app import identity
+from app.extensions import db
+from app.models import User
+
+
+def _count_user_queries():
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        if "FROM users" in statement:
+            statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", listener)
+    return statements
+
+
+def test_user_is_loaded_once_and_then_served_from_snapshot(admin_client):
+    queries = _count_user_queries()
+
+    assert admin_client.get("/admin/cache").status_code == 200
+    assert admin_client.get("/admin/cache").status_code == 200
+    assert len(queries) == 1
+
+
+def test_admin_revocation_applies_without_new_login(app, admin_client):
+    assert admin_client.get("/admin/cache").status_code == 200
+
+    # Права сняты в другом воркере: здесь они действуют, пока не истечёт снимок.
+    db.session.execute(update(User).values(is_admin=False))
+    db.session.commit()
+    assert admin_client.get("/admin/cache").status_code == 200
+
+    app.extensions["identity_cache"].clear()
+    assert admin_client.get("/admin/cache").status_code == 403
+
+
+def test_revoked_sessions_are_logged_out(admin_client):
+    user = User.query.filter_by(email="admin@example.com").one()
+    identity.revoke_sessions(user.id)
+    db.session.commit()
+
+    assert admin_client.get("/admin/cache").status_code == 403
+    with admin_client.session_transaction() as sess:
+        assert "user_id" not in sess
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app import inventory
+from app.extensions import db
+from app.models import Category, Order, Product, StockHold
+
+
+def _make_product(stock_qty, slug="ball"):
+    category = Category.query.filter_by(slug="balls").first()
+    if category is None:
+        category = Category(name="Мячи", slug="balls")
+        db.session.add(category)
+        db.session.flush()
+    product = Product(name=slug, slug=slug, price=Decimal("10.00"), stock_qty=stock_qty, category_id=category.id)
+    db.session.add(product)
+    db.session.commit()
+    return product.id
+
+
+def _stock(product_id):
+    return inventory.stock_levels([product_id])[product_id]
+
+
+def test_reserve_and_release_round_trip(app):
+    product_id = _make_product(5)
+
+    inventory.reserve({product_id: 3}, holder="cart-1")
+    db.session.commit()
+    assert _stock(product_id) == 2
+
+    # Повторная бронь того же держателя заменяет прежнюю, а не добавляется к ней.
+    inventory.reserve({product_id: 4}, holder="cart-1")
+    db.session.commit()
+    assert _stock(product_id) == 1
+
+    assert inventory.release("cart-1") == 1
+    db.session.commit()
+    assert _stock(product_id) == 5
+
+
+def test_reserve_is_all_or_nothing(app):
+    plenty = _make_product(10, "plenty")
+    scarce = _make_product(1, "scarce")
+
+    with pytest.raises(inventory.InsufficientStock) as exc:
+        inventory.reserve({plenty: 2, scarce: 2}, holder="cart-1")
+    db.session.rollback()
+
+    assert exc.value.product_id == scarce
+    assert _stock(plenty) == 10
+    assert StockHold.query.count() == 0
+
+
+def test_sharded_reserve_collects_across_shards(app):
+    product_id = _make_product(10)
+    inventory.set_sharding(product_id, 4)
+    db.session.commit()
+    assert _stock(product_id) == 10
+
+    inventory.reserve({product_id: 7}, holder="cart-1")
+    db.session.commit()
+    assert _stock(product_id) == 3
+
+    with pytest.raises(inventory.InsufficientStock):
+        inventory.reserve({product_id: 4}, holder="cart-2")
+    db.session.rollback()
+
+    inventory.set_sharding(product_id, 0)
+    db.session.commit()
+    assert db.session.get(Product, product_id).stock_qty == 3
+
+
+def test_expired_holds_are_returned_on_demand(app):
+    product_id = _make_product(2)
+    inventory.reserve({product_id: 2}, holder="abandoned", ttl=60)
+    StockHold.query.update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    db.session.commit()
+
+    inventory.reserve({product_id: 1}, holder="cart-2")
+    db.session.commit()
+    assert _stock(product_id) == 1
+    assert StockHold.query.filter_by(holder="abandoned").count() == 0
+
+
+def test_checkout_does_not_oversell(app, client):
+    product_id = _make_product(1)
+    form = {"customer_name": "Иван", "customer_phone": "+7000", "customer_email": "ivan@example.com"}
+
+    client.post(f"/shop/cart/add/{product_id}", data={"qty": "2"})
+    response = client.post("/shop/checkout", data=form)
+    assert response.status_code == 302
+    assert Order.query.count() == 0
+
+    client.post("/shop/cart/clear")
+    client.post(f"/shop/cart/add/{product_id}", data={"qty": "1"})
+    client.post("/shop/checkout", data=form)
+    assert Order.query.count() == 1
+    assert _stock(product_id) == 0
+    assert StockHold.query.count() == 0
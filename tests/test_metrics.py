@@ -0,0 +1,78 @@
+import json
+import logging
+import os
+
+from sqlalchemy import create_engine, text
+
+from app import metrics
+from app.seed import seed_demo
+
+
+def _sample(body: str, line_start: str) -> float:
+    for line in body.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"нет строки {line_start}")
+
+
+def test_metrics_count_requests_and_queries(client):
+    seed_demo()
+    client.get("/shop/catalog")
+    client.get("/shop/catalog")
+
+    body = client.get("/metrics").get_data(as_text=True)
+
+    assert _sample(body, 'http_requests_total{endpoint="shop.catalog",method="GET",status="200"}') == 2
+    assert _sample(body, 'http_request_duration_seconds_count{endpoint="shop.catalog",method="GET"}') == 2
+    assert _sample(body, 'http_request_db_queries_sum{endpoint="shop.catalog",method="GET"}') > 0
+    assert _sample(body, 'http_requests_in_flight{endpoint="shop.catalog"}') == 0
+
+
+def test_registry_merges_worker_snapshots(tmp_path):
+    worker = metrics.Registry()
+    worker.inc("http_requests_total", (("endpoint", "main.index"), ("method", "GET"), ("status", "200")), 3)
+    worker.inc("http_requests_in_flight", (("endpoint", "main.index"),))
+    worker.observe("checkout_lines", 4)
+    # Живой воркер — родительский процесс pytest.
+    (tmp_path / "alive.json").write_text(json.dumps({"pid": os.getppid(), "series": worker.snapshot()}))
+    # Снимок завершившегося воркера: счётчики учитываются, gauge — нет.
+    dead = {
+        "pid": 2**22 + 1,
+        "series": [
+            ["http_requests_total", [["endpoint", "main.index"], ["method", "GET"], ["status", "200"]], 2],
+            ["http_requests_in_flight", [["endpoint", "main.index"]], 5],
+        ],
+    }
+    (tmp_path / "dead.json").write_text(json.dumps(dead))
+
+    body = metrics.Registry(str(tmp_path)).render()
+
+    assert _sample(body, 'http_requests_total{endpoint="main.index",method="GET",status="200"}') == 5
+    assert _sample(body, 'checkout_lines_bucket{le="3"}') == 0
+    assert _sample(body, 'checkout_lines_bucket{le="5"}') == 1
+    assert _sample(body, 'http_requests_in_flight{endpoint="main.index"}') == 1
+
+
+def test_slow_request_log_includes_sql(app, client, caplog):
+    seed_demo()
+    app.config["SLOW_REQUEST_MS"] = 1
+    with caplog.at_level(logging.WARNING, logger=app.logger.name):
+        client.get("/shop/catalog?page=1&sort=price_asc")
+
+    message = next(record.getMessage() for record in caplog.records if "Медленный запрос" in record.getMessage())
+    assert "/shop/catalog" in message
+    assert "SELECT" in message
+
+
+def test_timed_pool_observes_checkout_wait(app, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=metrics.TimedQueuePool)
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+    assert _sample(metrics.registry().render(), "db_pool_checkout_seconds_count") == 1
+
+
+def test_metrics_only_for_allowed_networks(app, client):
+    app.config["METRICS_ALLOWED_IPS"] = ["10.0.0.0/8"]
+    assert client.get("/metrics").status_code == 403
+    assert client.get("/metrics", environ_base={"REMOTE_ADDR": "10.1.2.3"}).status_code == 200
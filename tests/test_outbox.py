@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from app import outbox
+from app.extensions import db
+from app.models import Category, OutboxJob, Product
+
+FORM = {"customer_name": "Иван", "customer_phone": "+7000", "customer_email": "ivan@example.com"}
+
+
+def _job(kind="test.echo", **values):
+    job = OutboxJob(kind=kind, payload={"n": 1}, **values)
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+
+def _reload(job_id):
+    db.session.expire_all()
+    return db.session.get(OutboxJob, job_id)
+
+
+def test_checkout_enqueues_job_in_order_transaction(client):
+    category = Category(name="Мячи", slug="balls")
+    product = Product(name="Мяч", slug="ball", price=Decimal("10.00"), stock_qty=1, category=category)
+    db.session.add(product)
+    db.session.commit()
+
+    with client.session_transaction() as sess:
+        sess["cart"] = {str(product.id): 5}
+    client.post("/shop/checkout", data=FORM)
+    assert OutboxJob.query.count() == 0
+
+    with client.session_transaction() as sess:
+        sess.pop("cart_id", None)
+        sess["cart"] = {str(product.id): 1}
+    client.post("/shop/checkout", data=FORM)
+    job = OutboxJob.query.one()
+    assert (job.kind, job.status) == ("order_placed", outbox.PENDING)
+    assert job.run_after > datetime.utcnow()
+
+
+def test_batch_retries_with_backoff_then_fails(app, monkeypatch):
+    calls = []
+
+    def flaky(payload):
+        calls.append(payload)
+        db.session.add(Category(name="Побочный эффект", slug="side-effect"))
+        raise RuntimeError("сервис недоступен")
+
+    monkeypatch.setitem(outbox.HANDLERS, "test.echo", flaky)
+    app.config.update(OUTBOX_MAX_ATTEMPTS=2, OUTBOX_BACKOFF_SECONDS=10)
+    job_id = _job()
+
+    assert outbox.run_batch() == {outbox.DONE: 0, outbox.PENDING: 1, outbox.FAILED: 0}
+    job = _reload(job_id)
+    assert job.attempts == 1
+    assert "сервис недоступен" in job.last_error
+    assert job.run_after > datetime.utcnow() + timedelta(seconds=5)
+    # Изменения упавшего обработчика откатываются.
+    assert Category.query.count() == 0
+    # До конца паузы задачу никто не берёт.
+    assert outbox.run_batch() == {outbox.DONE: 0, outbox.PENDING: 0, outbox.FAILED: 0}
+
+    job.run_after = datetime.utcnow()
+    db.session.commit()
+    assert outbox.run_batch()[outbox.FAILED] == 1
+    assert _reload(job_id).status == outbox.FAILED
+    assert len(calls) == 2
+
+
+def test_claim_leases_jobs_until_they_expire(app, monkeypatch):
+    monkeypatch.setitem(outbox.HANDLERS, "test.echo", lambda payload: None)
+    first, second = _job(), _job()
+    later = _job(run_after=datetime.utcnow() + timedelta(hours=1))
+
+    claimed = outbox.claim(10)
+    db.session.commit()
+
+    assert [job.id for job in claimed] == [first, second]
+    # Воркер упал, не отметив задачи: до конца аренды их не видно, потом — снова видно.
+    assert outbox.claim(10) == []
+    OutboxJob.query.filter(OutboxJob.id != later).update({"run_after": datetime.utcnow()})
+    db.session.commit()
+    assert [job.attempts for job in outbox.claim(10)] == [2, 2]
+
+
+def test_worker_command_processes_in_batches(app, monkeypatch):
+    seen = []
+    monkeypatch.setitem(outbox.HANDLERS, "test.echo", lambda payload: seen.append(payload["n"]))
+    ids = [_job() for _ in range(5)]
+
+    result = app.test_cli_runner().invoke(args=["outbox", "work", "--once", "--batch-size", "2"])
+
+    assert "Выполнено: 5" in result.output
+    assert len(seen) == 5
+    assert {_reload(job_id).status for job_id in ids} == {outbox.DONE}
@@ -0,0 +1,44 @@
+from decimal import Decimal
+
+from app.extensions import db
+from app.models import Category, Product
+from app.projections import SUMMARY_LENGTH, ProductCard, card_query, cart_products, product_detail, to_card
+
+
+def _product(description):
+    category = Category(name="Мячи", slug="balls")
+    product = Product(name="Мяч", slug="ball", price=Decimal("1500.00"), description=description, category=category)
+    db.session.add(product)
+    db.session.commit()
+    return product.id
+
+
+def test_cards_carry_category_and_trimmed_summary(app):
+    _product("слово " * 100)
+
+    card = to_card(card_query().one())
+
+    assert isinstance(card, ProductCard)
+    assert card.category_name == "Мячи"
+    assert card.summary.endswith("…")
+    assert len(card.summary) <= SUMMARY_LENGTH + 1
+
+
+def test_detail_and_cart_rows_skip_orm_entities(app):
+    product_id = _product("Коротко")
+    db.session.expunge_all()
+
+    detail = product_detail("ball")
+    lines = cart_products([product_id])
+
+    assert (detail.description, detail.category_slug) == ("Коротко", "balls")
+    assert lines[product_id].category_name == "Мячи"
+    assert not any(isinstance(obj, Product) for obj in db.session.identity_map.values())
+
+
+def test_catalog_and_cart_pages_render_projections(client):
+    product_id = _product("Официальный мяч турнира")
+
+    assert "Официальный мяч турнира" in client.get("/shop/catalog").get_data(as_text=True)
+    client.post(f"/shop/cart/add/{product_id}")
+    assert "Мячи" in client.get("/shop/cart").get_data(as_text=True)
@@ -0,0 +1,60 @@
+import pytest
+
+from app.extensions import db
+from app.metrics import query_budget
+from app.models import Category, Product
+from app.seed import seed_demo
+
+
+def test_routes_stay_within_budgets(admin_client, query_log):
+    seed_demo()
+    product = Product.query.first()
+    # Корзина из товаров разных категорий: карточки не должны догружать категорию по одной.
+    for category in Category.query.limit(3):
+        other = Product.query.filter_by(category_id=category.id).first()
+        admin_client.post(f"/shop/cart/add/{other.id}")
+
+    admin_client.get("/")
+    admin_client.get("/shop/catalog")
+    admin_client.get("/shop/catalog?q=мяч")
+    admin_client.get(f"/shop/product/{product.slug}")
+    admin_client.post(f"/shop/cart/add/{product.id}", data={"qty": "2"})
+    admin_client.get("/shop/cart")
+    admin_client.get("/shop/checkout")
+    admin_client.post(
+        "/shop/checkout", data={"customer_name": "Иван", "customer_phone": "+7000", "customer_email": "i@example.com"}
+    )
+    admin_client.get("/account/orders")
+    admin_client.get("/admin/products")
+    admin_client.get("/admin/orders")
+
+    # Бюджеты и N+1 проверяет query_log после каждого запроса; здесь — что он их видел.
+    assert all(entry.statements for entry in query_log.requests if entry.endpoint != "main.index")
+
+
+def test_lazy_loading_per_row_is_reported(app, client):
+    @app.get("/_test/lazy")
+    def lazy():
+        return ",".join(product.category.name for product in Product.query.order_by(Product.id))
+
+    for i in range(3):
+        category = Category(name=f"C{i}", slug=f"c{i}")
+        db.session.add(Product(name=f"P{i}", slug=f"p{i}", price=1, category=category))
+    db.session.commit()
+
+    with pytest.raises(pytest.fail.Exception, match="N\\+1: 3 раз"):
+        client.get("/_test/lazy")
+
+
+def test_budget_overrun_lists_statements(app, client):
+    @app.get("/_test/greedy")
+    @query_budget(1)
+    def greedy():
+        return str(Product.query.count() + Category.query.count())
+
+    with pytest.raises(pytest.fail.Exception) as exc:
+        client.get("/_test/greedy")
+
+    message = str(exc.value)
+    assert "2 SQL-запросов при бюджете 1" in message
+    assert "FROM products" in message and "FROM categories" in message
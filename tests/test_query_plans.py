@@ -0,0 +1,139 @@
+"""Планы горячих запросов: ни один не должен читать большую таблицу целиком.
+
+Запросы берутся у самого приложения (каталог, фасеты, корзина, товар, сводки
+админки, история заказов): каждый сценарий выполняется, его SQL
+перехватывается и прогоняется через EXPLAIN.
+
+По умолчанию проверка идёт на пустой SQLite-схеме из моделей. На
+PostgreSQL с данными продакшен-объёма:
+
+    python -m app.seed --products 1000000 --users 100000 --orders 4000000
+    EXPLAIN_DATABASE_URL=postgresql+psycopg2://... python -m pytest tests/test_query_plans.py
+
+В этом режиме база не создаётся и не очищается, а всё, что сценарии
+успели записать, откатывается.
+"""
+from __future__ import annotations
+
+import os
+import re
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app, facets, outbox, rollups
+from app.extensions import db
+from app.models import Category, Product
+from app.pagination import encode_cursor
+from app.projections import cart_products, order_history, order_lines, product_detail
+from app.routes.shop import _load_catalog_page
+from app.search import MODE_FULLTEXT
+
+EXPLAIN_DATABASE_URL = os.getenv("EXPLAIN_DATABASE_URL", "")
+# Справочники на десятки строк планировщик законно читает целиком.
+SMALL_TABLES = {"categories", "category_facets", "cache_versions", "rollup_state"}
+PER_PAGE = 24
+
+
+def _order_history():
+    page = order_history(1, encode_cursor([datetime.utcnow(), 10**9]), PER_PAGE)
+    order_lines([order.id for order in page.items] or [1])
+
+
+def _admin_orders():
+    today = date.today()
+    rollups.refresh()
+    for report in (rollups.sales_by_day, rollups.sales_by_status, rollups.top_products, rollups.sales_by_category):
+        report(today - timedelta(days=29), today)
+
+
+SCENARIOS = {
+    "catalog": lambda: _load_catalog_page("", "", MODE_FULLTEXT, None, PER_PAGE),
+    "catalog_next_page": lambda: _load_catalog_page(
+        "", "", MODE_FULLTEXT, encode_cursor([datetime.utcnow(), 10**9]), PER_PAGE
+    ),
+    "catalog_category": lambda: _load_catalog_page("", "balls", MODE_FULLTEXT, None, PER_PAGE),
+    "facets": facets.category_facets,
+    "facets_refresh": lambda: facets.refresh([1]),
+    "product": lambda: product_detail("ball"),
+    "cart": lambda: cart_products([1, 2, 3]),
+    "order_history": _order_history,
+    "admin_orders": _admin_orders,
+    "outbox_claim": lambda: outbox.claim(50),
+}
+
+
+@pytest.fixture
+def plan_app(request):
+    if not EXPLAIN_DATABASE_URL:
+        app = request.getfixturevalue("app")
+        category = Category(name="Мячи", slug="balls")
+        db.session.add(Product(name="Мяч", slug="ball", price=Decimal("1500.00"), category=category))
+        db.session.commit()
+        yield app
+        return
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": EXPLAIN_DATABASE_URL, "METRICS_ENABLED": False})
+    with app.app_context():
+        yield app
+        db.session.rollback()
+        db.session.remove()
+
+
+def _capture(scenario) -> list[tuple[str, object]]:
+    statements: list[tuple[str, object]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        # INSERT ... VALUES таблицы не читает.
+        if not statement.lstrip().upper().startswith("INSERT") or "SELECT" in statement.upper():
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        scenario()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    return statements
+
+
+def _sqlite_full_scans(connection, statement: str, parameters) -> list[str]:
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    scans = []
+    for row in rows:
+        detail = row[-1]
+        # «SCAN t» — полный проход; «SCAN t USING INDEX» и «SEARCH t ...» — по индексу.
+        # Проход по подзапросу (anon_1) — это уже отобранные строки, а не таблица.
+        match = re.match(r"SCAN (\w+)(?: AS \w+)?$", detail)
+        if match and match.group(1) in db.metadata.tables and match.group(1) not in SMALL_TABLES:
+            scans.append(detail)
+    return scans
+
+
+def _postgres_full_scans(connection, statement: str, parameters) -> list[str]:
+    plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+    scans = []
+
+    def walk(node):
+        if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") not in SMALL_TABLES:
+            scans.append(f"Seq Scan on {node['Relation Name']} (rows={node.get('Plan Rows')})")
+        for child in node.get("Plans", ()):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return scans
+
+
+@pytest.mark.parametrize("name", list(SCENARIOS))
+def test_hot_queries_use_indexes(plan_app, name):
+    statements = _capture(SCENARIOS[name])
+    assert statements, f"{name}: сценарий не выполнил ни одного запроса"
+
+    connection = db.session.connection()
+    full_scans = _postgres_full_scans if connection.dialect.name == "postgresql" else _sqlite_full_scans
+    problems = []
+    for statement, parameters in statements:
+        for scan in full_scans(connection, statement, parameters):
+            problems.append(f"{scan}\n    {' '.join(statement.split())}")
+    assert not problems, f"{name}: полное чтение таблицы\n" + "\n".join(problems)
@@ -0,0 +1,80 @@
+from decimal import Decimal
+
+import pytest
+
+from app import create_app, replica
+from app.cache import catalog_cache
+from app.extensions import db
+from app.models import CacheVersion, Category, Product
+
+
+@pytest.fixture
+def replicated(tmp_path):
+    app = create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'primary.db'}",
+            "DATABASE_REPLICA_URL": f"sqlite:///{tmp_path / 'replica.db'}",
+            "CATALOG_CACHE_ENABLED": False,
+            "REPLICA_LAG_CHECK_SECONDS": 0,
+        }
+    )
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(replica.replica_engine())
+        yield app
+        db.session.remove()
+
+
+def _add_product(engine, slug):
+    # Реплика здесь — отдельная база, поэтому видно, откуда пришли данные.
+    with engine.begin() as connection:
+        connection.execute(Category.__table__.insert().values(id=1, name="Мячи", slug="balls"))
+        connection.execute(
+            Product.__table__.insert().values(
+                name=slug, slug=slug, price=Decimal("10.00"), stock_qty=5, category_id=1, stock_shards=0
+            )
+        )
+
+
+def test_catalog_reads_go_to_replica_until_customer_writes(replicated):
+    _add_product(replica.replica_engine(), "from-replica")
+    _add_product(db.engine, "from-primary")
+    client = replicated.test_client()
+
+    assert "from-replica" in client.get("/shop/catalog").get_data(as_text=True)
+
+    client.post("/shop/cart/add/1")
+    # Сразу после записи покупатель читает с основной базы.
+    assert "from-primary" in client.get("/shop/catalog").get_data(as_text=True)
+    assert "from-replica" in replicated.test_client().get("/shop/catalog").get_data(as_text=True)
+
+
+def test_lagging_replica_falls_back_to_primary(replicated, monkeypatch):
+    _add_product(replica.replica_engine(), "from-replica")
+    _add_product(db.engine, "from-primary")
+    monkeypatch.setattr(replica, "_measure_lag", lambda: 60.0)
+
+    page = replicated.test_client().get("/shop/catalog").get_data(as_text=True)
+    assert "from-primary" in page
+    assert replica.stats() == {"lag": 60.0, "usable": False}
+
+
+def test_catalog_cache_skips_loads_from_lagging_replica(replicated):
+    replicated.config.update(CATALOG_CACHE_ENABLED=True, CATALOG_CACHE_VERSION_CHECK=0)
+    _add_product(replica.replica_engine(), "from-replica")
+    _add_product(db.engine, "from-primary")
+    # Основная база уже получила новую версию каталога, реплика — ещё нет.
+    catalog_cache.invalidate()
+    catalog_cache.invalidate()
+    db.session.commit()
+    assert CacheVersion.query.one().version == 2
+    client = replicated.test_client()
+
+    assert "from-replica" in client.get("/shop/catalog").get_data(as_text=True)
+    assert catalog_cache.stats()["size"] == 0
+
+    with replica.replica_engine().begin() as connection:
+        connection.execute(CacheVersion.__table__.insert().values(name="catalog", version=2))
+    client.get("/shop/catalog")
+    assert catalog_cache.stats()["size"] > 0
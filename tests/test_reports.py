@@ -0,0 +1,50 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from app import reports
+from app.extensions import db
+from app.models import Category, Order, OrderItem, Product, User
+
+
+def _order(user, product, *, day, qty, status="new"):
+    order = Order(
+        user_id=user.id,
+        status=status,
+        customer_name="Fan",
+        customer_phone="+7000",
+        total_amount=product.price * qty,
+        items_count=qty,
+        created_at=day,
+    )
+    order.items.append(OrderItem(product_id=product.id, qty=qty, unit_price=product.price))
+    db.session.add(order)
+
+
+def test_revenue_is_aggregated_in_sql(app):
+    user = User(email="fan@example.com")
+    balls = Category(name="Мячи", slug="balls")
+    boots = Category(name="Бутсы", slug="boots")
+    db.session.add_all([user, balls, boots])
+    db.session.flush()
+    ball = Product(name="Ball", slug="ball", price=Decimal("10.00"), category_id=balls.id)
+    boot = Product(name="Boot", slug="boot", price=Decimal("50.00"), category_id=boots.id)
+    db.session.add_all([ball, boot])
+    db.session.flush()
+
+    _order(user, ball, day=datetime(2026, 3, 1, 10), qty=2)
+    _order(user, boot, day=datetime(2026, 3, 1, 23), qty=1, status="done")
+    _order(user, ball, day=datetime(2026, 3, 2, 9), qty=1)
+    _order(user, boot, day=datetime(2026, 3, 5, 9), qty=1)
+    db.session.commit()
+
+    by_day = reports.revenue_by_day(date(2026, 3, 1), date(2026, 3, 2))
+    assert [(r.key, r.orders, r.revenue) for r in by_day] == [
+        (date(2026, 3, 1), 2, Decimal("70.00")),
+        (date(2026, 3, 2), 1, Decimal("10.00")),
+    ]
+
+    by_status = reports.revenue_by_status(date(2026, 3, 1), date(2026, 3, 2))
+    assert [(r.key, r.orders, r.revenue) for r in by_status] == [("done", 1, Decimal("50.00")), ("new", 2, Decimal("30.00"))]
+
+    by_category = reports.revenue_by_category(date(2026, 3, 1), date(2026, 3, 5))
+    assert [(r.label, r.units, r.revenue) for r in by_category] == [("Бутсы", 2, Decimal("100.00")), ("Мячи", 3, Decimal("30.00"))]
@@ -0,0 +1,91 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from app import reports, rollups
+from app.extensions import db
+from app.models import Category, DailyOrderStats, Order, OrderItem, Product, User
+
+
+def _seed_orders():
+    user = User(email="fan@example.com")
+    category = Category(name="Мячи", slug="balls")
+    db.session.add_all([user, category])
+    db.session.flush()
+    ball = Product(name="Ball", slug="ball", price=Decimal("10.00"), category_id=category.id)
+    db.session.add(ball)
+    db.session.flush()
+
+    for day, qty in [(datetime(2026, 3, 1, 10), 2), (datetime(2026, 3, 1, 12), 1), (datetime(2026, 3, 2, 9), 3)]:
+        order = Order(
+            user_id=user.id,
+            customer_name="Fan",
+            customer_phone="+7000",
+            total_amount=Decimal("10.00") * qty,
+            items_count=qty,
+            created_at=day,
+        )
+        order.items.append(OrderItem(product_id=ball.id, qty=qty, unit_price=Decimal("10.00")))
+        db.session.add(order)
+    db.session.commit()
+
+
+def test_refresh_is_incremental(app):
+    app.config.update(ROLLUP_SETTLE_SECONDS=0, ROLLUP_BATCH_ORDERS=2)
+    _seed_orders()
+
+    assert rollups.refresh() == 2
+    assert rollups.refresh() == 1
+    assert rollups.refresh() == 0
+    db.session.commit()
+
+    by_day = rollups.sales_by_day(date(2026, 3, 1), date(2026, 3, 2))
+    assert [(row.key, row.orders, row.revenue) for row in by_day] == [
+        (date(2026, 3, 1), 2, Decimal("30.00")),
+        (date(2026, 3, 2), 1, Decimal("30.00")),
+    ]
+    [top] = rollups.top_products(date(2026, 3, 1), date(2026, 3, 2))
+    assert (top.label, top.orders, top.units, top.revenue) == ("Ball", 3, 6, Decimal("60.00"))
+
+    assert rollups.rebuild() == 3
+    assert DailyOrderStats.query.count() == 2
+
+
+def test_orders_dashboard_reads_rollups(app, admin_client):
+    app.config["ROLLUP_SETTLE_SECONDS"] = 0
+    _seed_orders()
+
+    response = admin_client.get("/admin/orders?start=2026-03-01&end=2026-03-31")
+    assert response.status_code == 200
+    assert "60.00" in response.get_data(as_text=True)
+
+
+def test_category_counts_order_once_for_several_lines(app):
+    app.config["ROLLUP_SETTLE_SECONDS"] = 0
+    _seed_orders()
+    ball = Product.query.one()
+    boot = Product(name="Boot", slug="boot", price=Decimal("5.00"), category_id=ball.category_id)
+    db.session.add(boot)
+    db.session.flush()
+    order = Order(
+        user_id=User.query.one().id,
+        customer_name="Fan",
+        customer_phone="+7000",
+        total_amount=Decimal("15.00"),
+        items_count=2,
+        created_at=datetime(2026, 3, 2, 10),
+    )
+    order.items = [
+        OrderItem(product_id=ball.id, qty=1, unit_price=Decimal("10.00")),
+        OrderItem(product_id=boot.id, qty=1, unit_price=Decimal("5.00")),
+    ]
+    db.session.add(order)
+    db.session.commit()
+
+    rollups.refresh()
+    db.session.commit()
+
+    start, end = date(2026, 3, 1), date(2026, 3, 2)
+    [row] = rollups.sales_by_category(start, end)
+    [expected] = reports.revenue_by_category(start, end)
+    assert (row.orders, row.units, row.revenue) == (4, 8, Decimal("75.00"))
+    assert (row.orders, row.units, row.revenue) == (expected.orders, expected.units, expected.revenue)
@@ -0,0 +1,47 @@
+from datetime import date
+
+from sqlalchemy import func, select, text
+
+from app.extensions import db
+from app.models import Order, OrderItem, Product, User
+from app.seed import generate
+
+
+def _snapshot():
+    return (
+        db.session.execute(select(Product.slug, Product.price, Product.category_id).order_by(Product.id)).all(),
+        db.session.execute(select(Order.user_id, Order.total_amount, Order.created_at).order_by(Order.id)).all(),
+    )
+
+
+def test_generate_is_reproducible_and_consistent(app):
+    options = dict(products=200, users=20, orders=100, seed=42, end_date=date(2026, 1, 1), batch_size=64)
+
+    stats = generate(**options)
+    assert (stats["products"], stats["users"], stats["orders"]) == (200, 20, 100)
+    assert stats["order_items"] == OrderItem.query.count()
+
+    # Суммы заказов сходятся с позициями, как при обычном оформлении.
+    assert db.session.scalar(select(func.sum(Order.items_count))) == db.session.scalar(select(func.sum(OrderItem.qty)))
+    assert db.session.scalar(select(func.sum(Order.total_amount))) == db.session.scalar(
+        select(func.sum(OrderItem.qty * OrderItem.unit_price))
+    )
+    first = _snapshot()
+
+    db.drop_all()
+    db.create_all()
+    generate(**options)
+    assert _snapshot() == first
+    assert User.query.filter(User.password_hash.is_(None)).count() > 0
+
+
+def test_generate_respects_foreign_keys(app):
+    # Позиции не должны попадать в базу раньше заказов, на которые ссылаются.
+    db.session.commit()
+    db.session.execute(text("PRAGMA foreign_keys=ON"))
+    assert db.session.execute(text("PRAGMA foreign_keys")).scalar() == 1
+
+    stats = generate(products=50, users=5, orders=40, seed=7, batch_size=8)
+
+    assert stats["orders"] == 40
+    assert db.session.execute(text("PRAGMA foreign_key_check")).all() == []
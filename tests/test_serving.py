@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from app import create_app
+from app.extensions import db
+from app.seed import seed_demo
+from app.serving import after_fork, memory_usage, worker_count
+
+
+def test_worker_count_depends_on_worker_type():
+    assert worker_count(4, threads=1) == 9
+    assert worker_count(4, threads=4) == 5
+    assert worker_count(0, threads=1) == 3
+
+
+def test_after_fork_replaces_inherited_pools(tmp_path):
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'primary.db'}",
+            "DATABASE_REPLICA_URL": f"sqlite:///{tmp_path / 'replica.db'}",
+        }
+    )
+    with app.app_context():
+        pool = db.engine.pool
+    replica_pool = app.extensions["replica_engine"].pool
+
+    after_fork(app)
+
+    with app.app_context():
+        assert db.engine.pool is not pool
+    assert app.extensions["replica_engine"].pool is not replica_pool
+
+
+def test_concurrent_requests_in_threads(tmp_path):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'shop.db'}", "TESTING": True})
+    with app.app_context():
+        db.create_all()
+        seed_demo()
+
+    def browse(_):
+        client = app.test_client()
+        return [client.get(path).status_code for path in ("/", "/shop/catalog", "/shop/catalog?q=мяч", "/shop/cart")]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(browse, range(32)))
+
+    assert all(code == 200 for codes in results for code in codes)
+
+
+def test_memory_usage_reports_rss():
+    assert memory_usage()["rss"] > 0